@@ -0,0 +1,158 @@
+"""
+Replay fixtures for offline benchmarks.
+Renders every graph prompt (classifier, food, exercise and combined parsers)
+for a fixed set of sample inputs and writes canned responses as a recordings
+file for LLM_BACKEND=replay. Regenerate whenever a prompt changes, since
+recordings are keyed on the exact prompt text.
+
+Usage (from backend/):
+    python -m benchmarks.fixtures --out llm_recordings.jsonl
+"""
+import argparse
+import json
+import re
+
+from llm_service.prompts.classifier import CLASSIFIER_PROMPT
+from llm_service.prompts.classifier_batch import CLASSIFIER_BATCH_PROMPT
+from llm_service.prompts.combined_parser import COMBINED_PARSER_PROMPT
+from llm_service.compact_schema import EXERCISE_KEYS, FOOD_KEYS, compact_item
+from llm_service.prompts.exercise_parser import EXERCISE_PARSER_COMPACT_PROMPT, EXERCISE_PARSER_PROMPT
+from llm_service.prompts.food_parser import FOOD_PARSER_COMPACT_PROMPT, FOOD_PARSER_PROMPT
+from llm_service.replay import prompt_key
+
+
+def food(name, quantity, unit, calories, protein, carbs, fat, fiber, preparation=None):
+    return {
+        "name": name, "quantity": quantity, "unit": unit, "preparation": preparation,
+        "calories_kcal": calories, "protein_g": protein, "carbs_g": carbs,
+        "fat_g": fat, "fiber_g": fiber, "confidence": 0.8,
+    }
+
+
+def exercise(name, minutes, km, intensity, calories):
+    return {
+        "name": name, "duration_minutes": minutes, "distance_km": km,
+        "intensity": intensity, "calories_estimate": calories, "confidence": 0.8,
+    }
+
+
+# input -> (food items, exercise items)
+SAMPLES = {
+    "2 boiled eggs and toast": (
+        [food("egg", 2, "piece", 155, 12.6, 1.1, 10.6, 0, "boiled"),
+         food("toast", 1, "slice", 80, 2.7, 14.7, 1.0, 0.8, "toasted")], []),
+    "1 cup rice with dal": (
+        [food("rice", 1, "cup", 205, 4.3, 44.5, 0.4, 0.6, "cooked"),
+         food("dal", 1, "bowl", 180, 12.0, 30.0, 1.0, 8.0, "cooked")], []),
+    "200g grilled chicken breast": (
+        [food("chicken breast", 200, "g", 330, 62.0, 0, 7.2, 0, "grilled")], []),
+    "coffee with milk": (
+        [food("coffee", 1, "cup", 2, 0.3, 0, 0, 0),
+         food("milk", 50, "ml", 31, 1.6, 2.4, 1.7, 0)], []),
+    "chicken biryani and raita": (
+        [food("chicken biryani", 1, "plate", 500, 25.0, 60.0, 18.0, 3.0),
+         food("raita", 1, "bowl", 90, 4.0, 8.0, 4.5, 0.5)], []),
+    "a slice of pepperoni pizza": (
+        [food("pepperoni pizza", 1, "slice", 300, 13.0, 34.0, 12.0, 2.3, "baked")], []),
+    "ran 5k in 30 minutes": (
+        [], [exercise("running", 30, 5, "high", 350)]),
+    "45 minutes of yoga": (
+        [], [exercise("yoga", 45, None, "low", 150)]),
+    "cycled for an hour": (
+        [], [exercise("cycling", 60, None, "moderate", 480)]),
+    "had a burger then ran 5k": (
+        [food("burger", 1, "piece", 550, 25.0, 45.0, 30.0, 2.0)],
+        [exercise("running", 30, 5, "high", 350)]),
+    "protein shake after 1 hour of weightlifting": (
+        [food("protein shake", 1, "cup", 160, 25.0, 8.0, 3.0, 1.0)],
+        [exercise("weightlifting", 60, None, "moderate", 300)]),
+}
+
+
+def totals(items):
+    keys = ("calories_kcal", "protein_g", "carbs_g", "fat_g", "fiber_g")
+    return {key: round(sum(item[key] for item in items), 1) for key in keys}
+
+
+def intent_for(foods, exercises):
+    if foods and exercises:
+        return "mixed"
+    return "exercise" if exercises else "food"
+
+
+def compact_response(items, keys):
+    """What the compact parser prompts ask for: short keys, no totals."""
+    return {"items": [compact_item(item, keys) for item in items]}
+
+
+def build_recordings(samples=SAMPLES):
+    """One record per (input, prompt) pair the graph can issue."""
+    records = []
+    for text, (foods, exercises) in samples.items():
+        responses = {
+            CLASSIFIER_PROMPT: {"type": intent_for(foods, exercises)},
+            FOOD_PARSER_PROMPT: {"type": "food", "items": foods, "total": totals(foods)},
+            EXERCISE_PARSER_PROMPT: {"type": "exercise", "items": exercises},
+            FOOD_PARSER_COMPACT_PROMPT: compact_response(foods, FOOD_KEYS),
+            EXERCISE_PARSER_COMPACT_PROMPT: compact_response(exercises, EXERCISE_KEYS),
+            COMBINED_PARSER_PROMPT: {
+                "type": intent_for(foods, exercises),
+                "items": [dict(i, kind="food") for i in foods] + [dict(i, kind="exercise") for i in exercises],
+                "total": totals(foods),
+            },
+        }
+        for template, response in responses.items():
+            prompt = template.format(input=text)
+            # Compact answers are single-line, as their prompts ask
+            compact = template in (FOOD_PARSER_COMPACT_PROMPT, EXERCISE_PARSER_COMPACT_PROMPT)
+            records.append({
+                "key": prompt_key(prompt),
+                "prompt": prompt,
+                "response": json.dumps(response, separators=(",", ":") if compact else None),
+            })
+    return records
+
+
+_BATCH_LINE_RE = re.compile(r'^(\d+)\. (".*")$', re.MULTILINE)
+
+
+def classifier_batch_resolver(samples=SAMPLES):
+    """
+    ReplayLLM resolver for batched classifier prompts, whose content depends
+    on which requests happened to share a batch and so cannot be recorded.
+    """
+    header = " ".join(CLASSIFIER_BATCH_PROMPT.format(inputs="").split())
+
+    def resolve(prompt):
+        if not " ".join(prompt.split()).startswith(header):
+            return None
+        results = []
+        for number, quoted in _BATCH_LINE_RE.findall(prompt):
+            text = json.loads(quoted)
+            if text not in samples:
+                return None
+            results.append({"id": int(number), "type": intent_for(*samples[text])})
+        return json.dumps({"results": results})
+
+    return resolve
+
+
+def write_recordings(path, samples=SAMPLES):
+    records = build_recordings(samples)
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+    return len(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--out", default="llm_recordings.jsonl", help="Recordings file to write")
+    args = parser.parse_args()
+
+    count = write_recordings(args.out)
+    print(f"Wrote {count} recordings for {len(SAMPLES)} inputs to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Side-by-side benchmark of the LangGraph modes.
+Runs the same inputs through the two-step (classify -> parse) graph and the
+single-pass (combined classify+parse) graph and reports latency and LLM calls.
+
+Usage (from backend/):
+    python -m benchmarks.graph_modes --runs 3
+"""
+import argparse
+import statistics
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from llm_service.graph import nodes
+from llm_service.graph.workflow import GRAPH_MODES, build_graph
+from llm_service.llm_client import get_llm
+from llm_service.service import initial_state
+
+SAMPLE_INPUTS = [
+    "2 boiled eggs and toast",
+    "1 cup rice with dal",
+    "200g grilled chicken breast",
+    "coffee with milk",
+    "ran 5k in 30 minutes",
+    "45 minutes of yoga",
+    "had a burger then ran 5k",
+]
+
+
+class CountingLLM:
+    """Wraps the shared LLM client to count round trips."""
+
+    def __init__(self, llm):
+        self._llm = llm
+        self.calls = 0
+
+    def invoke(self, *args, **kwargs):
+        self.calls += 1
+        return self._llm.invoke(*args, **kwargs)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def run_mode(mode, inputs, runs):
+    graph = build_graph(mode)
+    counter = CountingLLM(get_llm())
+    original = nodes.llm
+    nodes.llm = counter
+
+    latencies = []
+    intents = {}
+    try:
+        for _ in range(runs):
+            for text in inputs:
+                start = time.perf_counter()
+                result = graph.invoke(initial_state(text))
+                latencies.append((time.perf_counter() - start) * 1000)
+                intents[text] = result["intent"]
+    finally:
+        nodes.llm = original
+
+    return {
+        "mode": mode,
+        "requests": len(latencies),
+        "llm_calls_per_request": counter.calls / len(latencies),
+        "mean_ms": statistics.mean(latencies),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "intents": intents,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=1, help="Passes over the sample inputs")
+    parser.add_argument("--modes", nargs="+", default=list(GRAPH_MODES), choices=GRAPH_MODES)
+    args = parser.parse_args()
+
+    results = [run_mode(mode, SAMPLE_INPUTS, args.runs) for mode in args.modes]
+
+    print(f"{'mode':<12} {'reqs':>5} {'calls/req':>10} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    for r in results:
+        print(
+            f"{r['mode']:<12} {r['requests']:>5} {r['llm_calls_per_request']:>10.2f} "
+            f"{r['mean_ms']:>9.1f} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f}"
+        )
+
+    if len(results) > 1:
+        print("\nIntent agreement:")
+        for text in SAMPLE_INPUTS:
+            labels = " / ".join(str(r["intents"].get(text)) for r in results)
+            print(f"  {text!r}: {labels}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Import-time profile of the app (worker cold start, test collection).
+Imports a module in a fresh interpreter under -X importtime and reports the
+total, the slowest packages and modules, and whether any of the lazily loaded
+stacks (LLM graph/client, speech-to-text SDK) were pulled in at import.
+
+Usage (from backend/):
+    python -m benchmarks.import_profile --top 15
+    python -m benchmarks.import_profile --module llm_service.api --check
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+# Loaded on first use or by the startup warm-up, never by importing the app
+LAZY_STACKS = ("langgraph", "langchain_core", "langchain_groq", "groq", "assemblyai")
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def profile(module):
+    """[(module, self_us, cumulative_us, depth)] in import order."""
+    env = dict(os.environ)
+    # Keep main's create_all away from the working copy's database
+    env.setdefault("DATABASE_URL", "sqlite://")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(proc.stderr.strip().splitlines()[-1])
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--module", default="main", help="Module to import")
+    parser.add_argument("--top", type=int, default=10, help="Rows per table")
+    parser.add_argument("--check", action="store_true",
+                        help="Exit 1 if a lazily loaded stack is imported")
+    args = parser.parse_args()
+
+    rows = profile(args.module)
+    total = next(cumulative for name, _, cumulative, _ in rows if name == args.module)
+
+    packages = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        packages[name.split(".")[0]] += self_us
+
+    print(f"import {args.module}: {total / 1000:.1f} ms, {len(rows)} modules\n")
+
+    print(f"{'package':<32} {'self ms':>9} {'share':>7}")
+    for name, self_us in sorted(packages.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"{name:<32} {self_us / 1000:>9.1f} {self_us / total:>7.1%}")
+
+    print(f"\n{'module':<48} {'cumulative ms':>14}")
+    for name, _, cumulative, _ in sorted(rows, key=lambda r: -r[2])[1:args.top + 1]:
+        print(f"{name:<48} {cumulative / 1000:>14.1f}")
+
+    loaded = sorted({name.split(".")[0] for name, *_ in rows} & set(LAZY_STACKS))
+    print(f"\nLazy stacks imported eagerly: {', '.join(loaded) or 'none'}")
+    if args.check and loaded:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Output-size and latency benchmark for the parser output schemas.
+Compares full food/exercise parser answers (long keys, totals block) with
+compact ones (LLM_PARSER_SCHEMA=compact) for the fixture samples: completion
+tokens, response bytes, the decode time those tokens cost at a given
+generation speed, and the server-side expansion + totals time.
+
+Offline token counts are approximate (one token per word, number or
+punctuation mark, which is close for JSON). With --live both prompts go to
+the provider and the reported completion tokens and latency are measured.
+
+Usage (from backend/):
+    python -m benchmarks.parser_schema
+    python -m benchmarks.parser_schema --tokens-per-second 275 --full-indent 0
+    python -m benchmarks.parser_schema --live --runs 3
+"""
+import argparse
+import json
+import re
+import statistics
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from benchmarks.fixtures import SAMPLES, compact_response, totals
+from llm_service.compact_schema import (
+    EXERCISE_KEYS,
+    FOOD_KEYS,
+    expand_exercise_response,
+    expand_food_response,
+)
+from llm_service.prompts.exercise_parser import EXERCISE_PARSER_COMPACT_PROMPT, EXERCISE_PARSER_PROMPT
+from llm_service.prompts.food_parser import FOOD_PARSER_COMPACT_PROMPT, FOOD_PARSER_PROMPT
+
+_TOKEN_RE = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+# schema -> node -> prompt template
+PROMPTS = {
+    "full": {"food_parser": FOOD_PARSER_PROMPT, "exercise_parser": EXERCISE_PARSER_PROMPT},
+    "compact": {"food_parser": FOOD_PARSER_COMPACT_PROMPT, "exercise_parser": EXERCISE_PARSER_COMPACT_PROMPT},
+}
+
+
+def approx_tokens(text):
+    return len(_TOKEN_RE.findall(text))
+
+
+def answers(full_indent):
+    """(node, input, {schema: answer text}) for every fixture parser call."""
+    for text, (foods, exercises) in SAMPLES.items():
+        if foods:
+            full = {"type": "food", "items": foods, "total": totals(foods)}
+            yield "food_parser", text, {
+                "full": json.dumps(full, indent=full_indent or None),
+                "compact": json.dumps(compact_response(foods, FOOD_KEYS), separators=(",", ":")),
+            }
+        if exercises:
+            full = {"type": "exercise", "items": exercises}
+            yield "exercise_parser", text, {
+                "full": json.dumps(full, indent=full_indent or None),
+                "compact": json.dumps(compact_response(exercises, EXERCISE_KEYS), separators=(",", ":")),
+            }
+
+
+def expansion_us(answer, node, repeat=2000):
+    """Server-side cost of turning a compact answer into parsed_data + totals."""
+    expand = expand_food_response if node == "food_parser" else expand_exercise_response
+    started = time.perf_counter()
+    for _ in range(repeat):
+        expand(json.loads(answer))
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def offline(args):
+    rows = {schema: {"tokens": [], "bytes": [], "prompt_tokens": []} for schema in PROMPTS}
+    expand = []
+    for node, text, by_schema in answers(args.full_indent):
+        for schema, answer in by_schema.items():
+            rows[schema]["tokens"].append(approx_tokens(answer))
+            rows[schema]["bytes"].append(len(answer.encode("utf-8")))
+            rows[schema]["prompt_tokens"].append(approx_tokens(PROMPTS[schema][node].format(input=text)))
+        expand.append(expansion_us(by_schema["compact"], node))
+
+    print(f"{len(rows['full']['tokens'])} parser answers, full answers indented by {args.full_indent}\n")
+    print(f"{'schema':<9} {'prompt tok':>11} {'output tok':>11} {'bytes':>7} {'decode ms':>10}")
+    for schema, r in rows.items():
+        tokens = statistics.mean(r["tokens"])
+        print(
+            f"{schema:<9} {statistics.mean(r['prompt_tokens']):>11.0f} {tokens:>11.0f} "
+            f"{statistics.mean(r['bytes']):>7.0f} {tokens / args.tokens_per_second * 1000:>10.1f}"
+        )
+
+    full, compact = statistics.mean(rows["full"]["tokens"]), statistics.mean(rows["compact"]["tokens"])
+    saved_ms = (full - compact) / args.tokens_per_second * 1000
+    print(f"\nOutput tokens saved: {1 - compact / full:.0%} (~{saved_ms:.0f} ms per parse "
+          f"at {args.tokens_per_second:g} tokens/s)")
+    print(f"Server-side expansion + totals: {statistics.mean(expand):.1f} us per answer")
+
+
+def live(args):
+    from llm_service.llm_client import get_llm
+
+    results = {schema: {"tokens": [], "ms": []} for schema in PROMPTS}
+    for _ in range(args.runs):
+        for node, text, _ in answers(0):
+            for schema, prompts in PROMPTS.items():
+                prompt = prompts[node].format(input=text)
+                started = time.perf_counter()
+                response = get_llm(node).invoke(prompt)
+                results[schema]["ms"].append((time.perf_counter() - started) * 1000)
+                usage = getattr(response, "usage_metadata", None) or {}
+                results[schema]["tokens"].append(usage.get("output_tokens", approx_tokens(response.content)))
+
+    print(f"{'schema':<9} {'calls':>6} {'output tok':>11} {'mean ms':>9} {'p50 ms':>9}")
+    for schema, r in results.items():
+        print(
+            f"{schema:<9} {len(r['ms']):>6} {statistics.mean(r['tokens']):>11.0f} "
+            f"{statistics.mean(r['ms']):>9.1f} {statistics.median(r['ms']):>9.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tokens-per-second", type=float, default=275,
+                        help="Generation speed used to turn saved tokens into time (offline)")
+    parser.add_argument("--full-indent", type=int, default=4,
+                        help="Indentation of full answers; models tend to follow the template's layout")
+    parser.add_argument("--live", action="store_true", help="Call the provider with both prompts")
+    parser.add_argument("--runs", type=int, default=1, help="Passes over the samples (--live)")
+    args = parser.parse_args()
+
+    live(args) if args.live else offline(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Precision/recall sweep for the semantic near-duplicate cache.
+Replays (input, true result) traffic through a fresh SemanticCache per
+threshold and reports hit rate, precision and recall, to pick
+LLM_SEMANTIC_CACHE_THRESHOLD.
+
+Traffic is a JSONL file of {"input": ..., "result": llm_result} lines (e.g.
+collected from /llm/log responses); without one, the benchmark fixtures and
+hand-written paraphrases of them are used.
+
+Usage (from backend/):
+    python -m benchmarks.semantic_cache_eval
+    python -m benchmarks.semantic_cache_eval --traffic traffic.jsonl --thresholds 0.8 0.85 0.9 0.95
+"""
+import argparse
+import json
+
+from benchmarks.fixtures import SAMPLES, exercise, food, intent_for, totals
+from llm_service.semantic_cache import evaluate
+
+PARAPHRASES = {
+    "2 boiled eggs and toast": ["toast and 2 boiled eggs", "two boiled eggs with toast", "2 eggs boiled, toast"],
+    "1 cup rice with dal": ["dal with 1 cup rice", "one cup of rice and dal", "1 cup rice + dal"],
+    "200g grilled chicken breast": ["grilled chicken breast 200g", "200 grams grilled chicken breasts"],
+    "coffee with milk": ["milk coffee", "a coffee with milk", "coffee w milk"],
+    "chicken biryani and raita": ["raita and chicken biryani", "chiken biryani and raita", "had chicken biryani with raita"],
+    "ran 5k in 30 minutes": ["30 minutes run of 5k", "ran 5k in 30 mins"],
+    "45 minutes of yoga": ["yoga for 45 minutes", "45 min yoga"],
+    "had a burger then ran 5k": ["ate a burger and ran 5k", "burger then a 5k run"],
+}
+
+# Lexically close to a sample but a different log; reusing the sample's parse is a false positive
+DISTRACTORS = {
+    "1 cup brown rice with dal": (
+        [food("brown rice", 1, "cup", 218, 4.5, 45.8, 1.6, 3.5), food("dal", 1, "bowl", 180, 12.0, 30.0, 1.0, 8.0)], []),
+    "tea with milk": ([food("tea", 1, "cup", 2, 0, 0.5, 0, 0), food("milk", 50, "ml", 31, 1.6, 2.4, 1.7, 0)], []),
+    "chicken curry and raita": (
+        [food("chicken curry", 1, "bowl", 300, 25.0, 10.0, 18.0, 2.0), food("raita", 1, "bowl", 90, 4.0, 8.0, 4.5, 0.5)], []),
+    "ran 10k in 60 minutes": ([], [exercise("running", 60, 10, "high", 700)]),
+    "45 minutes of pilates": ([], [exercise("pilates", 45, None, "moderate", 180)]),
+    "had a burger then walked 5k": (
+        [food("burger", 1, "piece", 550, 25.0, 45.0, 30.0, 2.0)], [exercise("walking", 60, 5, "low", 250)]),
+}
+
+
+def fixture_result(text, samples=SAMPLES):
+    foods, exercises = samples[text]
+    intent = intent_for(foods, exercises)
+    if intent == "mixed":
+        items = [dict(i, kind="food") for i in foods] + [dict(i, kind="exercise") for i in exercises]
+        nutrition = dict(totals(foods), burned_calories_kcal=sum(e["calories_estimate"] for e in exercises))
+    elif intent == "exercise":
+        items, nutrition = exercises, {"calories_kcal": sum(e["calories_estimate"] for e in exercises)}
+    else:
+        items, nutrition = foods, totals(foods)
+    return {"input": text, "intent": intent, "parsed_data": items, "nutrition": nutrition}
+
+
+def fixture_traffic():
+    """Each sample once, then its paraphrases (hits wanted) and the distractors (hits unwanted)."""
+    traffic = [(text, fixture_result(text)) for text in SAMPLES]
+    for text, variants in PARAPHRASES.items():
+        truth = fixture_result(text)
+        traffic += [(variant, dict(truth, input=variant)) for variant in variants]
+    traffic += [(text, fixture_result(text, DISTRACTORS)) for text in DISTRACTORS]
+    return traffic
+
+
+def load_traffic(path):
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return [(r["input"], r["result"]) for r in records]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--traffic", default=None, help="JSONL of {input, result} lines")
+    parser.add_argument("--thresholds", nargs="+", type=float, default=[0.75, 0.8, 0.85, 0.9, 0.92, 0.95, 0.98])
+    args = parser.parse_args()
+
+    traffic = load_traffic(args.traffic) if args.traffic else fixture_traffic()
+    report = evaluate(traffic, args.thresholds)
+
+    print(f"{len(traffic)} requests")
+    print(f"{'threshold':>9} {'hit rate':>9} {'precision':>10} {'recall':>7} {'TP':>5} {'FP':>5} {'FN':>5}")
+    for row in report:
+        print(
+            f"{row['threshold']:>9.2f} {row['hit_rate']:>9.3f} {row['precision']:>10.3f} {row['recall']:>7.3f} "
+            f"{row['true_positives']:>5} {row['false_positives']:>5} {row['false_negatives']:>5}"
+        )
+
+
+if __name__ == "__main__":
+    main()
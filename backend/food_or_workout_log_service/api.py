@@ -1,41 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from datetime import date
-from pydantic import BaseModel
-from typing import Union
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional, Union
 
 from database.database import get_db
 from auth_service.dependencies import get_current_user
-from .schemas import LLMLogRequest, DailyNutritionResponse
-from .service import process_llm_log, get_or_create_daily_nutrition
-from .models import DailyNutrition
-from llm_service.service import process_user_input
+from .schemas import (
+    BatchEntryResult,
+    BatchLogResponse,
+    DailyNutritionResponse,
+    LLMLogRequest,
+    MemoryEntryResponse,
+    QuickLogRequest,
+)
+from .service import process_llm_log, process_llm_logs, get_or_create_daily_nutrition
+from .models import DailyNutrition, UserFoodMemory
+from .memory import ITEM, arecall_meal, entry_calories, get_food_memory, quick_log_data, top_memory
+from llm_service.service import process_user_input_async
+from llm_service.telemetry import span, traced
 
 router = APIRouter(prefix="/food-or-workout", tags=["Food/Workout Log"])
 
-
-class SimpleLogRequest(BaseModel):
-    input: str
+MAX_BATCH_ENTRIES = 20
 
 
-@router.post("/log", response_model=DailyNutritionResponse)
-def log_food_or_exercise(
-    data: Union[SimpleLogRequest, LLMLogRequest],
-    db: Session = Depends(get_db),
-    current_user=Depends(get_current_user),
-):
-    # Handle both simple text input and full LLMLogRequest
-    if isinstance(data, SimpleLogRequest) or (hasattr(data, 'input') and not hasattr(data, 'intent')):
-        # Process simple text input through LLM
-        text_input = data.input if hasattr(data, 'input') else data.dict().get('input', '')
-        llm_result = process_user_input(text_input)
-        log_data = llm_result
-    else:
-        # Use full LLMLogRequest data
-        log_data = data.dict()
-    
-    daily = process_llm_log(db, current_user.id, log_data)
-
+def daily_nutrition_response(daily: DailyNutrition) -> DailyNutritionResponse:
     return DailyNutritionResponse(
         date=daily.date,
         consumed_calories=daily.consumed_calories,
@@ -50,6 +42,111 @@ def log_food_or_exercise(
     )
 
 
+class SimpleLogRequest(BaseModel):
+    input: str
+    # The UI tab the input came from; skips the LLM classifier
+    intent: Optional[Literal["food", "exercise"]] = None
+
+
+class BatchLogRequest(BaseModel):
+    entries: List[SimpleLogRequest] = Field(..., min_length=1, max_length=MAX_BATCH_ENTRIES)
+
+
+@router.post("/log", response_model=DailyNutritionResponse)
+async def log_food_or_exercise(
+    data: Union[SimpleLogRequest, LLMLogRequest],
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    with traced("/food-or-workout/log") as trace:
+        # Handle both simple text input and full LLMLogRequest
+        if isinstance(data, SimpleLogRequest):
+            # Process simple text input through LLM
+            text_input = data.input
+            # Repeat meals come from the user's food memory, no LLM call
+            llm_result = await arecall_meal(db, current_user.id, text_input)
+            if llm_result is None:
+                llm_result = await process_user_input_async(
+                    text_input, user_id=current_user.id, intent=data.intent
+                )
+            log_data = llm_result
+        else:
+            # Use full LLMLogRequest data
+            log_data = data.dict()
+
+        with span("db.process_llm_log"):
+            daily = await run_in_threadpool(process_llm_log, db, current_user.id, log_data)
+
+    response.headers["Server-Timing"] = trace.server_timing()
+
+    return daily_nutrition_response(daily)
+
+
+async def parse_entries(db: Session, user_id: int, entries: List[SimpleLogRequest]) -> list:
+    """Parsed result, or the HTTPException that stopped it, per entry and in order."""
+    # Memory recall uses the request's session, so it goes one entry at a time
+    recalled = []
+    for entry in entries:
+        try:
+            recalled.append(await arecall_meal(db, user_id, entry.input))
+        except HTTPException as e:
+            recalled.append(e)
+
+    async def parse(entry, found):
+        if found is not None:
+            return found
+        try:
+            return await process_user_input_async(entry.input, user_id=user_id, intent=entry.intent)
+        except HTTPException as e:
+            return e
+
+    return await asyncio.gather(*(parse(entry, found) for entry, found in zip(entries, recalled)))
+
+
+def batch_entry_result(entry: SimpleLogRequest, result) -> BatchEntryResult:
+    if isinstance(result, HTTPException):
+        return BatchEntryResult(
+            input=entry.input, logged=False, status_code=result.status_code, error=str(result.detail)
+        )
+    return BatchEntryResult(
+        input=entry.input,
+        logged=True,
+        intent=result.get("intent"),
+        source=result.get("source"),
+        parsed_data=result.get("parsed_data") or [],
+        nutrition=result.get("nutrition"),
+    )
+
+
+@router.post("/log/batch", response_model=BatchLogResponse)
+async def log_batch(
+    data: BatchLogRequest,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """
+    Log several entries at once (e.g. catching up at night). Entries are parsed
+    concurrently; every parsed one is then applied in a single transaction.
+    Entries that fail are reported in their result and not logged.
+    """
+    with traced("/food-or-workout/log/batch") as trace:
+        results = await parse_entries(db, current_user.id, data.entries)
+        parsed = [result for result in results if not isinstance(result, HTTPException)]
+
+        with span("db.process_llm_logs") as attrs:
+            attrs["entries"] = len(parsed)
+            daily = await run_in_threadpool(process_llm_logs, db, current_user.id, parsed)
+
+    response.headers["Server-Timing"] = trace.server_timing()
+
+    return BatchLogResponse(
+        results=[batch_entry_result(entry, result) for entry, result in zip(data.entries, results)],
+        daily=daily_nutrition_response(daily),
+    )
+
+
 @router.get("/today", response_model=DailyNutritionResponse)
 def get_today_summary(
     db: Session = Depends(get_db),
@@ -62,18 +159,7 @@ def get_today_summary(
     if not daily:
         daily = get_or_create_daily_nutrition(db, current_user.id, today)
 
-    return DailyNutritionResponse(
-        date=daily.date,
-        consumed_calories=daily.consumed_calories,
-        consumed_protein=daily.consumed_protein,
-        consumed_carbs=daily.consumed_carbs,
-        consumed_fat=daily.consumed_fat,
-        burned_calories=daily.burned_calories,
-        remaining_calories=daily.remaining_calories,
-        remaining_protein=daily.remaining_protein,
-        remaining_carbs=daily.remaining_carbs,
-        remaining_fat=daily.remaining_fat,
-    )
+    return daily_nutrition_response(daily)
 
 
 @router.get("/logs/today")
@@ -106,4 +192,48 @@ def get_today_logs(
             "category": log.name,
         })
     
-    return result
\ No newline at end of file
+    return result
+
+
+@router.get("/memory/top", response_model=List[MemoryEntryResponse])
+def get_top_memory(
+    kind: Literal["item", "meal"] = ITEM,
+    limit: int = Query(10, ge=1, le=50),
+    days: int = Query(30, ge=1, le=365),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """The user's most logged items (or whole meals) for one-tap quick-logging."""
+    memory = get_food_memory()
+    if memory is not None:
+        # Loads (and on first use backfills) the user's memory
+        memory.snapshot(db, current_user.id)
+
+    return [
+        MemoryEntryResponse(
+            id=entry.id,
+            kind=entry.kind,
+            label=entry.label,
+            use_count=entry.use_count,
+            last_used_at=entry.last_used_at,
+            calories_kcal=entry_calories(entry.kind, entry.payload),
+            payload=entry.payload,
+        )
+        for entry in top_memory(db, current_user.id, kind=kind, limit=limit, days=days)
+    ]
+
+
+@router.post("/memory/{memory_id}/log", response_model=DailyNutritionResponse)
+def quick_log(
+    memory_id: int,
+    data: QuickLogRequest = QuickLogRequest(),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """Log a remembered item or meal again, scaled by servings, without the LLM."""
+    entry = db.query(UserFoodMemory).filter_by(id=memory_id, user_id=current_user.id).first()
+    if entry is None:
+        raise HTTPException(404, "Memory entry not found")
+
+    daily = process_llm_log(db, current_user.id, quick_log_data(entry, data.servings))
+    return daily_nutrition_response(daily)
@@ -0,0 +1,210 @@
+"""
+Re-enrichment of estimated logs.
+While the LLM is degraded, food logs are entered from a local estimate and
+marked low confidence (see llm_service.degradation), with a
+pending_enrichments row each. A background task re-parses them with the LLM
+once it is healthy again, replacing the estimated FoodLog rows and their
+share of the day's totals with the real parse.
+"""
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from database.database import SessionLocal
+from llm_service.degradation import get_degradation_controller, is_provider_failure
+from llm_service.service import process_user_input_async
+from .memory import remember_logs
+from .models import FoodLog, PendingEnrichment
+from .service import apply_llm_log, apply_nutrition_delta, get_or_create_daily_nutrition
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+
+def _negated(nutrition: Dict) -> Dict:
+    return {key: -value if isinstance(value, (int, float)) else value for key, value in nutrition.items()}
+
+
+class Enricher:
+    """Re-parses up to batch_size pending logs every interval_seconds while the LLM is healthy."""
+
+    def __init__(
+        self,
+        interval_seconds: float = 30,
+        batch_size: int = 5,
+        max_attempts: int = 3,
+        session_factory=SessionLocal,
+    ):
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.session_factory = session_factory
+        self._task: Optional[asyncio.Task] = None
+
+        self.runs = 0
+        self.skipped_degraded = 0
+        self.enriched = 0
+        self.failed_attempts = 0
+        self.given_up = 0
+
+    def start(self):
+        """Run the loop on the serving event loop (idempotent)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Log re-enrichment run failed")
+
+    async def run_once(self) -> int:
+        """One pass; returns how many logs were re-enriched."""
+        controller = get_degradation_controller()
+        if controller is not None and controller.degraded:
+            self.skipped_degraded += 1
+            return 0
+        self.runs += 1
+
+        enriched = 0
+        for task_id, user_id, raw_input in await run_in_threadpool(self._pending):
+            try:
+                result = await process_user_input_async(raw_input, user_id=user_id, degrade=False)
+                if not result.get("parsed_data"):
+                    error = "LLM returned no items"
+                elif result.get("low_confidence"):
+                    # A cut-off answer is no better than the estimate it would replace
+                    error = "LLM answer was cut off"
+                else:
+                    error = None
+                    if await run_in_threadpool(self._replace, task_id, result):
+                        enriched += 1
+                        self.enriched += 1
+            except Exception as e:
+                # Every error is an attempt, so one bad log cannot hold up the queue behind it
+                logger.warning("Re-enrichment of pending log %s failed: %r", task_id, e)
+                await run_in_threadpool(self._record_failure, task_id, repr(e))
+                if is_provider_failure(e):
+                    break   # struggling again; leave the rest for a later pass
+                continue
+
+            if error is not None:
+                await run_in_threadpool(self._record_failure, task_id, error)
+        return enriched
+
+    # ---------- DB work (threadpool) ----------
+    def _pending(self) -> List[tuple]:
+        db = self.session_factory()
+        try:
+            rows = (
+                db.query(PendingEnrichment)
+                .filter_by(status=PENDING)
+                .order_by(PendingEnrichment.created_at)
+                .limit(self.batch_size)
+                .all()
+            )
+            return [(row.id, row.user_id, row.raw_input) for row in rows]
+        finally:
+            db.close()
+
+    def _record_failure(self, task_id: int, error: str):
+        db = self.session_factory()
+        try:
+            task = db.get(PendingEnrichment, task_id)
+            task.attempts += 1
+            task.last_error = error
+            self.failed_attempts += 1
+            if task.attempts >= self.max_attempts:
+                # The estimate stays as logged
+                task.status = FAILED
+                self.given_up += 1
+            db.commit()
+        finally:
+            db.close()
+
+    def _replace(self, task_id: int, result: Dict) -> bool:
+        """
+        Swap the estimate's rows and totals for the LLM parse, in one commit.
+        Totals that were clamped at zero when the estimate was applied are
+        not restored exactly.
+        """
+        db = self.session_factory()
+        try:
+            task = db.get(PendingEnrichment, task_id)
+            if task is None or task.status != PENDING:
+                return False
+
+            ids = [uuid.UUID(log_id) for log_id in task.log_ids]
+            logs = db.query(FoodLog).filter(FoodLog.id.in_(ids)).all() if ids else []
+            logged_at = logs[0].logged_at if logs else None
+
+            daily = get_or_create_daily_nutrition(db, task.user_id, task.log_date)
+            for log in logs:
+                db.delete(log)
+            apply_nutrition_delta(daily, task.intent, _negated(task.nutrition))
+            apply_llm_log(db, task.user_id, daily, result, logged_at=logged_at)
+
+            task.status = DONE
+            task.enriched_at = datetime.now()
+            db.commit()
+
+            remember_logs(db, task.user_id, [result])
+            return True
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "interval_seconds": self.interval_seconds,
+            "runs": self.runs,
+            "skipped_degraded": self.skipped_degraded,
+            "enriched": self.enriched,
+            "failed_attempts": self.failed_attempts,
+            "given_up": self.given_up,
+        }
+
+
+_enricher: Optional[Enricher] = None
+
+
+def get_enricher() -> Optional[Enricher]:
+    """
+    Get or initialize the process-wide re-enrichment task.
+    Returns None when disabled via LLM_ENRICHMENT_ENABLED=false.
+    """
+    global _enricher
+
+    if os.getenv("LLM_ENRICHMENT_ENABLED", "true").lower() != "true":
+        return None
+
+    if _enricher is None:
+        _enricher = Enricher(
+            interval_seconds=float(os.getenv("LLM_ENRICHMENT_INTERVAL_SECONDS", "30")),
+            batch_size=int(os.getenv("LLM_ENRICHMENT_BATCH_SIZE", "5")),
+            max_attempts=int(os.getenv("LLM_ENRICHMENT_MAX_ATTEMPTS", "3")),
+        )
+
+    return _enricher
+
+
+def enrichment_stats() -> Optional[Dict[str, Any]]:
+    return _enricher.stats() if _enricher is not None else None
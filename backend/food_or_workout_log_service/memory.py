@@ -0,0 +1,419 @@
+"""
+Personal food memory.
+Remembers each user's logged meals (whole inputs) and items in the
+user_food_memory table, so an exact repeat or "my usual breakfast" is
+resolved without the LLM, and clients can quick-log a top item. A small
+in-process cache holds each active user's most used meals.
+"""
+import copy
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from llm_service.cache import normalize_input
+from llm_service.food_grammar import food_key
+from llm_service.telemetry import span
+from .models import FoodLog, LogType, UserFoodMemory
+
+logger = logging.getLogger(__name__)
+
+MEAL = "meal"
+ITEM = "item"
+
+# "my usual breakfast", "the usual", "had my usual lunch"
+_USUAL_RE = re.compile(r"^(?:(?:i )?(?:had|ate|have) )?(?:my |the )?usual(?: (breakfast|lunch|dinner|snack))?$")
+
+_NUTRIENT_KEYS = ("calories_kcal", "protein_g", "carbs_g", "fat_g", "fiber_g")
+
+
+class NoUsualMealError(HTTPException):
+    """404 when a user asks for a usual meal they have never logged in that slot."""
+
+    def __init__(self, slot: str):
+        super().__init__(404, f"No usual {slot} logged yet")
+
+
+def meal_slot(when: datetime) -> str:
+    hour = when.hour
+    if 4 <= hour < 11:
+        return "breakfast"
+    if 11 <= hour < 16:
+        return "lunch"
+    if 18 <= hour < 23:
+        return "dinner"
+    return "snack"
+
+
+def item_key(item: Dict) -> str:
+    return f"{food_key(item.get('name') or '')}|{item.get('unit') or ''}"
+
+
+def item_intent(item: Dict, intent: str) -> str:
+    kind = item.get("kind") or intent
+    return "food" if kind == "food" else "exercise"
+
+
+def _number(value) -> float:
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else 0
+
+
+def entry_calories(kind: str, payload: Dict) -> float:
+    if kind == MEAL:
+        return _number((payload.get("nutrition") or {}).get("calories_kcal"))
+    return _number(payload.get("calories_kcal") or payload.get("calories_estimate"))
+
+
+# ---------- Hot cache ----------
+@dataclass
+class MemorySnapshot:
+    """One user's most used meals, keyed by normalized input."""
+    meals: Dict[str, Dict]
+    truncated: bool             # more meals exist in the table than were loaded
+
+    def usual(self, slot: str) -> Optional[Dict]:
+        candidates = [m for m in self.meals.values() if (m["slot_counts"] or {}).get(slot)]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda m: (m["slot_counts"][slot], m["last_used_at"] or datetime.min))
+
+
+def _meal_dict(row: UserFoodMemory) -> Dict:
+    return {
+        "id": row.id,
+        "key": row.key,
+        "label": row.label,
+        "payload": row.payload,
+        "use_count": row.use_count,
+        "slot_counts": dict(row.slot_counts or {}),
+        "last_used_at": row.last_used_at,
+    }
+
+
+class FoodMemory:
+    """Thread-safe LRU + TTL cache of per-user memory snapshots."""
+
+    def __init__(
+        self,
+        max_users: int = 1024,
+        meals_per_user: int = 200,
+        ttl_seconds: float = 300,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_users = max_users
+        self.meals_per_user = meals_per_user
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._users: "OrderedDict[int, tuple]" = OrderedDict()   # user_id -> (expires_at, snapshot)
+
+        self.hits = 0
+        self.loads = 0
+        self.recalls = 0
+
+    def snapshot(self, db: Session, user_id: int) -> MemorySnapshot:
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None and entry[0] > self._clock():
+                self._users.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+
+        snapshot = self._load(db, user_id)
+        with self._lock:
+            self.loads += 1
+            self._users[user_id] = (self._clock() + self.ttl_seconds, snapshot)
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        return snapshot
+
+    def _load(self, db: Session, user_id: int, backfill: bool = True) -> MemorySnapshot:
+        rows = (
+            db.query(UserFoodMemory)
+            .filter_by(user_id=user_id, kind=MEAL)
+            .order_by(UserFoodMemory.use_count.desc(), UserFoodMemory.last_used_at.desc())
+            .limit(self.meals_per_user + 1)
+            .all()
+        )
+        # First sight of a user with history from before the memory existed
+        if not rows and backfill and not has_memory(db, user_id) and rebuild_from_food_logs(db, user_id):
+            return self._load(db, user_id, backfill=False)
+
+        meals = {row.key: _meal_dict(row) for row in rows[:self.meals_per_user]}
+        return MemorySnapshot(meals=meals, truncated=len(rows) > self.meals_per_user)
+
+    def count_recall(self) -> None:
+        with self._lock:
+            self.recalls += 1
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._users.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.loads
+            return {
+                "users": len(self._users),
+                "max_users": self.max_users,
+                "hits": self.hits,
+                "loads": self.loads,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "recalls": self.recalls,
+            }
+
+
+_food_memory: Optional[FoodMemory] = None
+
+
+def get_food_memory() -> Optional[FoodMemory]:
+    """
+    Get or initialize the process-wide food memory cache.
+    Returns None when disabled via LLM_FOOD_MEMORY_ENABLED=false.
+    """
+    global _food_memory
+
+    if os.getenv("LLM_FOOD_MEMORY_ENABLED", "true").lower() != "true":
+        return None
+
+    if _food_memory is None:
+        _food_memory = FoodMemory(
+            max_users=int(os.getenv("LLM_FOOD_MEMORY_MAX_USERS", "1024")),
+            meals_per_user=int(os.getenv("LLM_FOOD_MEMORY_MEALS_PER_USER", "200")),
+            ttl_seconds=float(os.getenv("LLM_FOOD_MEMORY_TTL_SECONDS", "300")),
+        )
+
+    return _food_memory
+
+
+# ---------- Recall ----------
+def recall_meal(db: Session, user_id: int, text: str, now: Optional[datetime] = None) -> Optional[Dict]:
+    """
+    Resolve an exact repeat or "my usual <meal>" from the user's memory.
+    Returns an llm_result-shaped dict (source "memory"), or None to use the LLM.
+    """
+    memory = get_food_memory()
+    if memory is None:
+        return None
+
+    key = normalize_input(text)
+    snapshot = memory.snapshot(db, user_id)
+
+    usual = _USUAL_RE.match(key)
+    if usual:
+        slot = usual.group(1) or meal_slot(now or datetime.now())
+        meal = snapshot.usual(slot)
+        if meal is None:
+            raise NoUsualMealError(slot)
+    else:
+        meal = snapshot.meals.get(key)
+        if meal is None and snapshot.truncated:
+            row = db.query(UserFoodMemory).filter_by(user_id=user_id, kind=MEAL, key=key).first()
+            meal = _meal_dict(row) if row is not None else None
+        if meal is None:
+            return None
+
+    memory.count_recall()
+    result = copy.deepcopy(meal["payload"])
+    result.update(input=text, source="memory", memory_key=meal["key"])
+    return result
+
+
+async def arecall_meal(db: Session, user_id: int, text: str) -> Optional[Dict]:
+    with span("memory.recall") as attrs:
+        result = await run_in_threadpool(recall_meal, db, user_id, text)
+        attrs["hit"] = result is not None
+    return result
+
+
+# ---------- Remember ----------
+def remember(db: Session, user_id: int, llm_data: Dict, logged_at: datetime) -> None:
+    """Upsert the log's meal and items (flushed, not committed)."""
+    items = llm_data.get("parsed_data") or []
+    if not items:
+        return
+
+    intent = llm_data.get("intent")
+    slot = meal_slot(logged_at)
+
+    # Recalled usual meals count towards the meal they resolved to
+    meal_key = llm_data.get("memory_key") or normalize_input(llm_data.get("input") or "")
+    entries = {}
+    if meal_key and not _USUAL_RE.match(meal_key):
+        entries[(MEAL, meal_key)] = (
+            llm_data.get("input") or meal_key,
+            {"intent": intent, "parsed_data": items, "nutrition": llm_data.get("nutrition") or {}},
+        )
+    for item in items:
+        if item.get("name"):
+            entries[(ITEM, item_key(item))] = (item["name"], dict(item, kind=item_intent(item, intent)))
+
+    if not entries:
+        return
+
+    existing = {
+        (row.kind, row.key): row
+        for row in db.query(UserFoodMemory).filter(
+            UserFoodMemory.user_id == user_id,
+            UserFoodMemory.key.in_({key for _, key in entries}),
+        )
+    }
+
+    for (kind, key), (label, payload) in entries.items():
+        row = existing.get((kind, key))
+        if row is None:
+            row = UserFoodMemory(user_id=user_id, kind=kind, key=key, use_count=0, slot_counts={})
+            db.add(row)
+        row.label = label
+        row.payload = payload
+        row.use_count = (row.use_count or 0) + 1
+        # JSON columns are not mutation-tracked; assign a new dict
+        row.slot_counts = dict(row.slot_counts or {}, **{slot: (row.slot_counts or {}).get(slot, 0) + 1})
+        row.last_used_at = logged_at
+
+    db.flush()
+
+
+def remember_logs(db: Session, user_id: int, entries: List[Dict]) -> None:
+    """Best effort: a failed memory update never fails the logs themselves."""
+    memory = get_food_memory()
+    if memory is None:
+        return
+
+    try:
+        now = datetime.now()
+        for llm_data in entries:
+            # Estimates are replaced once re-enriched; only remember real parses
+            if not llm_data.get("low_confidence"):
+                remember(db, user_id, llm_data, now)
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        logger.warning("Food memory update failed for user %s", user_id, exc_info=True)
+
+    memory.invalidate(user_id)
+
+
+def has_memory(db: Session, user_id: int) -> bool:
+    return db.query(UserFoodMemory.id).filter_by(user_id=user_id).first() is not None
+
+
+def rebuild_from_food_logs(db: Session, user_id: int, max_rows: int = 2000) -> bool:
+    """
+    Backfill a user's memory from existing FoodLog rows (one log = the rows
+    sharing raw_input and created_at). Returns whether anything was added.
+    """
+    rows = (
+        db.query(FoodLog)
+        .filter_by(user_id=user_id)
+        .order_by(FoodLog.created_at.desc())
+        .limit(max_rows)
+        .all()
+    )
+    if not rows:
+        return False
+
+    logs: Dict[tuple, List[FoodLog]] = {}
+    for row in reversed(rows):
+        logs.setdefault((row.raw_input, row.created_at), []).append(row)
+
+    try:
+        for (raw_input, created_at), log_rows in logs.items():
+            if raw_input:
+                remember(db, user_id, llm_data_from_food_logs(raw_input, log_rows), created_at or datetime.now())
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        logger.warning("Food memory backfill failed for user %s", user_id, exc_info=True)
+        return False
+    return True
+
+
+def llm_data_from_food_logs(raw_input: str, rows: List[FoodLog]) -> Dict:
+    foods = [
+        {
+            "kind": "food",
+            "name": row.name,
+            "quantity": row.quantity,
+            "unit": row.unit,
+            **{key: getattr(row, key) or 0 for key in _NUTRIENT_KEYS},
+            "confidence": row.confidence,
+        }
+        for row in rows if row.type == LogType.food
+    ]
+    exercises = [
+        {"kind": "exercise", "name": row.name, "calories_estimate": row.calories_kcal or 0}
+        for row in rows if row.type == LogType.exercise
+    ]
+    burned = sum(e["calories_estimate"] for e in exercises)
+    totals = {key: round(sum(f[key] for f in foods), 1) for key in _NUTRIENT_KEYS}
+
+    if foods and exercises:
+        return {"input": raw_input, "intent": "mixed", "parsed_data": foods + exercises,
+                "nutrition": dict(totals, burned_calories_kcal=burned)}
+    if exercises:
+        return {"input": raw_input, "intent": "exercise", "parsed_data": exercises,
+                "nutrition": {"calories_kcal": burned}}
+    return {"input": raw_input, "intent": "food", "parsed_data": foods, "nutrition": totals}
+
+
+# ---------- Top items / quick-log ----------
+def top_memory(db: Session, user_id: int, kind: str = ITEM, limit: int = 10, days: int = 30) -> List[UserFoodMemory]:
+    since = datetime.now() - timedelta(days=days)
+    return (
+        db.query(UserFoodMemory)
+        .filter(
+            UserFoodMemory.user_id == user_id,
+            UserFoodMemory.kind == kind,
+            UserFoodMemory.last_used_at >= since,
+        )
+        .order_by(UserFoodMemory.use_count.desc(), UserFoodMemory.last_used_at.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def _scaled(values: Dict, servings: float, keys) -> Dict:
+    return {
+        key: round(value * servings, 2) if key in keys and isinstance(value, (int, float)) else value
+        for key, value in values.items()
+    }
+
+
+def quick_log_data(entry: UserFoodMemory, servings: float = 1.0) -> Dict:
+    """llm_result-shaped data for logging a memory entry, scaled by servings."""
+    item_keys = set(_NUTRIENT_KEYS) | {"quantity", "calories_estimate"}
+
+    if entry.kind == MEAL:
+        payload = entry.payload
+        return {
+            "input": entry.label,
+            "intent": payload["intent"],
+            "parsed_data": [_scaled(item, servings, item_keys) for item in payload["parsed_data"]],
+            "nutrition": _scaled(payload.get("nutrition") or {}, servings, set(payload.get("nutrition") or {})),
+            "source": "memory",
+            "memory_key": entry.key,
+        }
+
+    item = _scaled(entry.payload, servings, item_keys)
+    intent = item_intent(item, "food")
+    if intent == "food":
+        nutrition = {key: _number(item.get(key)) for key in _NUTRIENT_KEYS}
+    else:
+        nutrition = {"calories_kcal": _number(item.get("calories_estimate"))}
+    return {"input": entry.label, "intent": intent, "parsed_data": [item], "nutrition": nutrition, "source": "memory"}
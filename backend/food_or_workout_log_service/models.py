@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Enum, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Enum, ForeignKey, JSON, Index, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 import uuid
@@ -59,4 +59,51 @@ class DailyNutrition(Base):
     remaining_fat = Column(Float, default=0)
 
     created_at = Column(DateTime, default=func.now())
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
\ No newline at end of file
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+
+class UserFoodMemory(Base):
+    """A user's previously logged meals (whole inputs) and items, for LLM-free repeats."""
+    __tablename__ = "user_food_memory"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    kind = Column(String(10), nullable=False)       # "meal" or "item"
+    key = Column(String, nullable=False)            # normalized input / item name + unit
+    label = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)          # {intent, parsed_data, nutrition} / item dict
+
+    use_count = Column(Integer, default=0, nullable=False)
+    slot_counts = Column(JSON, default=dict)        # {"breakfast": 3, ...}
+    last_used_at = Column(DateTime, default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "kind", "key", name="unique_user_memory"),
+        Index("ix_user_food_memory_top", "user_id", "kind", "use_count"),
+    )
+
+
+class PendingEnrichment(Base):
+    """A log entered from a local estimate while the LLM was degraded, re-parsed once it recovers."""
+    __tablename__ = "pending_enrichments"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    raw_input = Column(String, nullable=False)
+    log_date = Column(Date, nullable=False)         # DailyNutrition row the estimate went into
+    log_ids = Column(JSON, nullable=False)          # FoodLog ids written from the estimate
+    intent = Column(String(10), nullable=False)
+    nutrition = Column(JSON, nullable=False)        # the estimate's totals, reverted on enrichment
+
+    status = Column(String(10), nullable=False, default="pending")     # pending / done / failed
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(String)
+
+    created_at = Column(DateTime, default=func.now())
+    enriched_at = Column(DateTime)
+
+    __table_args__ = (
+        Index("ix_pending_enrichments_status", "status", "created_at"),
+    )
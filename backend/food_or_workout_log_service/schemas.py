@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime, date
 
@@ -51,4 +51,35 @@ class FoodLogResponse(BaseModel):
     id: str
     name: Optional[str]
     calories_kcal: float
-    logged_at: datetime
\ No newline at end of file
+    logged_at: datetime
+
+
+class MemoryEntryResponse(BaseModel):
+    id: int
+    kind: str
+    label: str
+    use_count: int
+    last_used_at: Optional[datetime]
+    calories_kcal: float
+    payload: dict
+
+
+class QuickLogRequest(BaseModel):
+    servings: float = Field(1.0, gt=0, le=20)
+
+
+class BatchEntryResult(BaseModel):
+    input: str
+    logged: bool
+    intent: Optional[str] = None
+    source: Optional[str] = None
+    parsed_data: List[dict] = []
+    nutrition: Optional[dict] = None
+    # Set when the entry could not be parsed; the other entries are still logged
+    status_code: Optional[int] = None
+    error: Optional[str] = None
+
+
+class BatchLogResponse(BaseModel):
+    results: List[BatchEntryResult]
+    daily: DailyNutritionResponse
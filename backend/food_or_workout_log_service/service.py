@@ -1,8 +1,10 @@
 from sqlalchemy.orm import Session
-from datetime import date
+from datetime import date, datetime
+from typing import List, Optional
 from uuid import UUID
 
-from .models import FoodLog, DailyNutrition, LogType
+from .models import FoodLog, DailyNutrition, LogType, PendingEnrichment
+from .memory import remember_logs
 
 
 # TODO: Replace with real goal_service integration
@@ -38,25 +40,91 @@ def get_or_create_daily_nutrition(db: Session, user_id: UUID, today: date) -> Da
 
 
 
+def safe_number(value) -> float:
+    return value if isinstance(value, (int, float)) else 0
+
+
+def item_log_type(intent: str, item: dict) -> LogType:
+    # Mixed logs tag each item with its own kind
+    kind = item.get("kind") or intent
+    return LogType.food if kind == "food" else LogType.exercise
+
+
+def apply_food_delta(daily: DailyNutrition, nutrition: dict):
+    calories = safe_number(nutrition.get("calories_kcal", 0))
+    protein = safe_number(nutrition.get("protein_g", 0))
+    carbs = safe_number(nutrition.get("carbs_g", 0))
+    fat = safe_number(nutrition.get("fat_g", 0))
+
+    # Food reduces net calories (stored as consumed_calories)
+    daily.consumed_calories += calories
+    daily.consumed_protein += protein
+    daily.consumed_carbs += carbs
+    daily.consumed_fat += fat
+
+    # Remaining calories decrease (food is negative contribution)
+    daily.remaining_calories -= calories
+    daily.remaining_protein -= protein
+    daily.remaining_carbs -= carbs
+    daily.remaining_fat -= fat
+
+
+def apply_exercise_delta(daily: DailyNutrition, calories):
+    calories = safe_number(calories)
+
+    # Exercise increases net calories available (burned_calories)
+    daily.burned_calories += calories
+    # Remaining calories increase (exercise is positive contribution)
+    daily.remaining_calories += calories
+
+
 def process_llm_log(db: Session, user_id: UUID, llm_data: dict) -> DailyNutrition:
+    return process_llm_logs(db, user_id, [llm_data])
+
+
+def process_llm_logs(db: Session, user_id: UUID, entries: List[dict]) -> DailyNutrition:
+    """Apply several parsed logs in one transaction: one commit, one refresh."""
     today = date.today()
     daily = get_or_create_daily_nutrition(db, user_id, today)
 
+    for llm_data in entries:
+        logs = apply_llm_log(db, user_id, daily, llm_data)
+        if llm_data.get("low_confidence"):
+            track_estimate(db, user_id, today, llm_data, logs)
+
+    db.commit()
+
+    # Repeats of these meals (or their items) can now skip the LLM. Its own
+    # commit expires daily, so refresh after it: one reload, not two
+    remember_logs(db, user_id, entries)
+    db.refresh(daily)
+
+    return daily
+
+
+def track_estimate(db: Session, user_id: UUID, log_date: date, llm_data: dict, logs: List[FoodLog]):
+    """Queue a low-confidence log (local estimate, cut-off answer) for re-enrichment (see enrichment.py)."""
+    db.flush()  # assigns the FoodLog ids
+    db.add(PendingEnrichment(
+        user_id=user_id,
+        raw_input=llm_data.get("input") or "",
+        log_date=log_date,
+        log_ids=[str(log.id) for log in logs],
+        intent=llm_data["intent"],
+        nutrition=llm_data["nutrition"],
+    ))
+
+
+def apply_llm_log(
+    db: Session, user_id: UUID, daily: DailyNutrition, llm_data: dict, logged_at: Optional[datetime] = None
+) -> List[FoodLog]:
+    """
+    Stage one parsed log's FoodLog rows and DailyNutrition delta; the caller commits.
+    logged_at keeps the original time when a log is replaced (re-enrichment).
+    """
     intent = llm_data["intent"]
     nutrition = llm_data["nutrition"]
-
-    # Safe calorie handling - ensure values are numeric
-    calories = nutrition.get("calories_kcal", 0)
-    calories = calories if isinstance(calories, (int, float)) else 0
-    
-    protein = nutrition.get("protein_g", 0)
-    protein = protein if isinstance(protein, (int, float)) else 0
-    
-    carbs = nutrition.get("carbs_g", 0)
-    carbs = carbs if isinstance(carbs, (int, float)) else 0
-    
-    fat = nutrition.get("fat_g", 0)
-    fat = fat if isinstance(fat, (int, float)) else 0
+    logs = []
 
     # Save individual parsed items
     for item in llm_data.get("parsed_data", []):
@@ -65,7 +133,7 @@ def process_llm_log(db: Session, user_id: UUID, llm_data: dict) -> DailyNutritio
         
         log = FoodLog(
             user_id=user_id,
-            type=LogType.food if intent == "food" else LogType.exercise,
+            type=item_log_type(intent, item),
             raw_input=llm_data.get("input"),
             name=item.get("name"),
             quantity=item.get("quantity"),
@@ -77,34 +145,29 @@ def process_llm_log(db: Session, user_id: UUID, llm_data: dict) -> DailyNutritio
             fiber_g=item.get("fiber_g", 0),
             confidence=item.get("confidence", 0),
         )
+        if logged_at is not None:
+            log.logged_at = log.created_at = logged_at
         db.add(log)
+        logs.append(log)
 
+    apply_nutrition_delta(daily, intent, nutrition)
+    return logs
+
+
+def apply_nutrition_delta(daily: DailyNutrition, intent: str, nutrition: dict):
     if intent == "food":
-        # Food reduces net calories (stored as consumed_calories)
-        daily.consumed_calories += calories
-        daily.consumed_protein += protein
-        daily.consumed_carbs += carbs
-        daily.consumed_fat += fat
-
-        # Remaining calories decrease (food is negative contribution)
-        daily.remaining_calories -= calories
-        daily.remaining_protein -= protein
-        daily.remaining_carbs -= carbs
-        daily.remaining_fat -= fat
+        apply_food_delta(daily, nutrition)
 
     elif intent == "exercise":
-        # Exercise increases net calories available (burned_calories)
-        daily.burned_calories += calories
-        # Remaining calories increase (exercise is positive contribution)
-        daily.remaining_calories += calories
+        apply_exercise_delta(daily, nutrition.get("calories_kcal", 0))
 
-    # Prevent negative values
+    elif intent == "mixed":
+        # Both deltas land in the caller's commit
+        apply_food_delta(daily, nutrition)
+        apply_exercise_delta(daily, nutrition.get("burned_calories_kcal", 0))
+
+    # Prevent negative values (per entry, as if each had been logged on its own)
     daily.remaining_calories = max(0, daily.remaining_calories)
     daily.remaining_protein = max(0, daily.remaining_protein)
     daily.remaining_carbs = max(0, daily.remaining_carbs)
     daily.remaining_fat = max(0, daily.remaining_fat)
-
-    db.commit()
-    db.refresh(daily)
-
-    return daily
\ No newline at end of file
@@ -1,66 +1,278 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, WebSocket, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from llm_service.service import process_user_input
+from llm_service.jobs import FINISHED, JobQueue, get_job_queue, job_queue_stats
+from llm_service.service import process_user_input_async, get_llm_stats
+from llm_service.streaming import astream_user_input, result_events, sse_event
+from llm_service.telemetry import span, traced
 from auth_service.dependencies import get_current_user
 from database.models.user_profile_setup import UserProfile
 from database.models.user_goal_setup import UserGoal
 from food_or_workout_log_service.service import process_llm_log
-from database.database import get_db
+from food_or_workout_log_service.memory import arecall_meal, get_food_memory, recall_meal
+from food_or_workout_log_service.enrichment import enrichment_stats
+from database.database import SessionLocal, get_db
 
 router = APIRouter()
+# Routes that authenticate themselves (WebSockets can't send the bearer header)
+ws_router = APIRouter()
+
+# How long a job WebSocket waits for the result before closing
+JOB_WS_TIMEOUT_SECONDS = 120
 
 
 class LogRequest(BaseModel):
     text: str
 
+
+def load_profile_and_goal(db: Session, user_id: int):
+    profile = db.query(UserProfile).filter_by(user_id=user_id).first()
+    goal = db.query(UserGoal).filter_by(user_id=user_id).first()
+    return profile, goal
+
+
+def daily_nutrition_payload(daily):
+    return {
+        "date": str(daily.date),
+        "consumed_calories": daily.consumed_calories,
+        "burned_calories": daily.burned_calories,
+        "remaining_calories": daily.remaining_calories,
+        "remaining_protein": daily.remaining_protein,
+        "remaining_carbs": daily.remaining_carbs,
+        "remaining_fat": daily.remaining_fat,
+    }
+
+
+def process_llm_log_in_new_session(user_id: int, llm_result):
+    """For streaming responses, which outlive the request-scoped session."""
+    db = SessionLocal()
+    try:
+        return process_llm_log(db, user_id, llm_result)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def recall_meal_in_new_session(user_id: int, text: str):
+    db = SessionLocal()
+    try:
+        return recall_meal(db, user_id, text)
+    finally:
+        db.close()
+
+
+def user_from_token(token: str):
+    db = SessionLocal()
+    try:
+        return get_current_user(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token), db)
+    finally:
+        db.close()
+
+
+async def run_log_job(user_id: int, text: str) -> dict:
+    """The /log pipeline for one queued job, on its own sessions."""
+    with traced("/llm/log/jobs"):
+        with span("memory.recall") as attrs:
+            llm_result = await run_in_threadpool(recall_meal_in_new_session, user_id, text)
+            attrs["hit"] = llm_result is not None
+        if llm_result is None:
+            llm_result = await process_user_input_async(text, user_id=user_id)
+
+        with span("db.process_llm_log"):
+            daily = await run_in_threadpool(process_llm_log_in_new_session, user_id, llm_result)
+
+    return {"llm_result": llm_result, "daily_nutrition": daily_nutrition_payload(daily)}
+
+
+async def log_jobs() -> JobQueue:
+    """The job queue, with its workers running on this event loop."""
+    queue = get_job_queue()
+    await queue.start(run_log_job)
+    return queue
+
+
 @router.post("/log")
-def log_input(
+async def log_input(
     payload: LogRequest,
-    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
     current_user=Depends(get_current_user)
 ):
-    db: Session = request.state.db
+    # Same request-scoped session get_current_user already holds: one pooled
+    # connection per request instead of two (avoids pool exhaustion under load)
+
+    with traced("/llm/log") as trace:
+        # 1. Validate profile & goals
+        # DB work stays in the threadpool; only the LLM wait runs on the event loop
+        with span("db.load_profile"):
+            profile, goal = await run_in_threadpool(load_profile_and_goal, db, current_user.id)
+
+        if not goal:
+            raise HTTPException(400, "Set your goal before using AI logging")
+        if not profile:
+            raise HTTPException(400, "Complete your profile before using AI logging")
+
+        # 2. Repeat meals come from the user's food memory; anything else runs the LLM
+        llm_result = await arecall_meal(db, current_user.id, payload.text)
+        if llm_result is None:
+            llm_result = await process_user_input_async(payload.text, user_id=current_user.id)
+
+        """
+        llm_result format:
+        {
+            input: "...",
+            intent: "food" | "exercise",
+            parsed_data: [...],
+            nutrition: {...}
+        }
+        """
+
+        # 3. Store + update daily nutrition automatically
+        try:
+            with span("db.process_llm_log"):
+                daily = await run_in_threadpool(process_llm_log, db, current_user.id, llm_result)
+        except Exception as e:
+            await run_in_threadpool(db.rollback)
+            raise HTTPException(500, f"Food log failed: {str(e)}")
+
+    # Per-stage cost, readable in browser devtools
+    response.headers["Server-Timing"] = trace.server_timing()
+
+    # 4. Return combined response
+    return {
+        "llm_result": llm_result,
+        "daily_nutrition": daily_nutrition_payload(daily),
+    }
 
-    # 1. Validate profile & goals
-    profile = db.query(UserProfile).filter_by(user_id=current_user.id).first()
-    goal = db.query(UserGoal).filter_by(user_id=current_user.id).first()
+
+@router.post("/log/stream")
+async def log_input_stream(
+    payload: LogRequest,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user)
+):
+    """
+    Server-Sent Events variant of /log. Emits, in order:
+    intent -> item (one per parsed item, as soon as it is complete)
+    -> result (full llm_result) -> daily_nutrition -> done.
+    Failures after the stream has started arrive as an "error" event.
+    """
+    profile, goal = await run_in_threadpool(load_profile_and_goal, db, current_user.id)
 
     if not goal:
         raise HTTPException(400, "Set your goal before using AI logging")
     if not profile:
         raise HTTPException(400, "Complete your profile before using AI logging")
 
-    # 2. Run LLM
-    llm_result = process_user_input(payload.text)
+    user_id = current_user.id
+    recalled = await arecall_meal(db, user_id, payload.text)
+
+    async def events():
+        with traced("/llm/log/stream"):
+            try:
+                if recalled is not None:
+                    llm_result = recalled
+                    for event, data in result_events(recalled):
+                        yield sse_event(event, data)
+                else:
+                    llm_result = None
+                    async for event, data in astream_user_input(payload.text, user_id=user_id):
+                        if event == "result":
+                            llm_result = data
+                        yield sse_event(event, data)
+
+                with span("db.process_llm_log"):
+                    daily = await run_in_threadpool(process_llm_log_in_new_session, user_id, llm_result)
+                yield sse_event("daily_nutrition", daily_nutrition_payload(daily))
+            except HTTPException as e:
+                yield sse_event("error", {"status": e.status_code, "detail": e.detail})
+            except Exception as e:
+                yield sse_event("error", {"status": 500, "detail": f"Food log failed: {str(e)}"})
+
+        yield sse_event("done", {})
 
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/log/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def submit_log_job(
+    payload: LogRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user)
+):
     """
-    llm_result format:
-    {
-        input: "...",
-        intent: "food" | "exercise",
-        parsed_data: [...],
-        nutrition: {...}
-    }
+    Job variant of /log for clients with short HTTP timeouts: queues the input
+    and answers 202 with the job id straight away. Poll GET /log/jobs/{job_id}
+    or subscribe to /log/jobs/{job_id}/ws for the result. Retries carrying the
+    same Idempotency-Key header get the original job back.
     """
+    profile, goal = await run_in_threadpool(load_profile_and_goal, db, current_user.id)
+
+    if not goal:
+        raise HTTPException(400, "Set your goal before using AI logging")
+    if not profile:
+        raise HTTPException(400, "Complete your profile before using AI logging")
+
+    queue = await log_jobs()
+    job = await queue.submit(current_user.id, payload.text, idempotency_key)
+
+    response.headers["Location"] = f"/llm/log/jobs/{job.id}"
+    return job.payload()
+
+
+@router.get("/log/jobs/{job_id}")
+async def get_log_job(
+    job_id: str,
+    wait: float = Query(0, ge=0, le=30, description="Long-poll up to this many seconds for the result"),
+    current_user=Depends(get_current_user)
+):
+    """Status of a job, with llm_result and daily_nutrition once done (or error once failed)."""
+    job = await get_job_queue().wait(job_id, current_user.id, timeout=wait)
+    return job.payload()
+
 
-    # 3. Store + update daily nutrition automatically
+@ws_router.websocket("/log/jobs/{job_id}/ws")
+async def log_job_updates(websocket: WebSocket, job_id: str, token: str = Query(...)):
+    """
+    Sends the job's status on connect and again once it finishes, then
+    closes. Takes the access token as ?token=, since browsers can't set
+    headers on WebSockets.
+    """
+    queue = get_job_queue()
     try:
-        daily = process_llm_log(db, current_user.id, llm_result)
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(500, f"Food log failed: {str(e)}")
+        user = await run_in_threadpool(user_from_token, token)
+        job = await queue.get(job_id, user.id)
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(e.detail))
+        return
 
-    # 4. Return combined response
-    return {
-        "llm_result": llm_result,
-        "daily_nutrition": {
-            "date": str(daily.date),
-            "consumed_calories": daily.consumed_calories,
-            "burned_calories": daily.burned_calories,
-            "remaining_calories": daily.remaining_calories,
-            "remaining_protein": daily.remaining_protein,
-            "remaining_carbs": daily.remaining_carbs,
-            "remaining_fat": daily.remaining_fat,
-        }
-    }
\ No newline at end of file
+    await websocket.accept()
+    await websocket.send_json(job.payload())
+    if job.status not in FINISHED:
+        job = await queue.wait(job_id, user.id, timeout=JOB_WS_TIMEOUT_SECONDS)
+        await websocket.send_json(job.payload())
+    await websocket.close()
+
+
+@router.get("/stats")
+def llm_stats():
+    """Cache, single-flight, scheduler, resilience and telemetry counters for the LLM pipeline."""
+    memory = get_food_memory()
+    return dict(
+        get_llm_stats(),
+        food_memory=memory.stats() if memory is not None else None,
+        jobs=job_queue_stats(),
+        enrichment=enrichment_stats(),
+    )
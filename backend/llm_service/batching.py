@@ -0,0 +1,165 @@
+"""
+Micro-batching for tiny, independent LLM prompts.
+Concurrent submissions are collected for a few milliseconds (or until the
+batch is full) and handed to one batch function, so e.g. a burst of
+classifications costs one round trip instead of one per request.
+"""
+import asyncio
+import os
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+RunBatch = Callable[[List[Any]], Awaitable[List[Any]]]
+
+
+class _LoopBatches:
+    """Pending items, flush timer and in-flight batch count for one event loop."""
+
+    def __init__(self):
+        self.pending: List[tuple] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.in_flight = 0
+
+
+class MicroBatcher:
+    """
+    Collects concurrent submit() calls per event loop and runs them as one batch.
+    A batch is sent when the window expires or it is full; while max_in_flight
+    batches are already running, items keep accumulating, so batches grow
+    with load instead of staying one window wide.
+    """
+
+    def __init__(
+        self,
+        run_batch: RunBatch,
+        window_seconds: float = 0.005,
+        max_size: int = 16,
+        max_in_flight: int = 2,
+    ):
+        self.run_batch = run_batch
+        self.window_seconds = window_seconds
+        self.max_size = max_size
+        self.max_in_flight = max_in_flight
+
+        self._lock = threading.Lock()
+        self._loops: Dict[asyncio.AbstractEventLoop, _LoopBatches] = {}
+        self._tasks = set()
+
+        self.batches = 0
+        self.items = 0
+        self.largest = 0
+        self.failed = 0
+
+    async def submit(self, item: Any) -> Any:
+        """Wait for item's result from the batch it joins."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        with self._lock:
+            state = self._loops.setdefault(loop, _LoopBatches())
+            state.pending.append((item, future))
+            full = len(state.pending) >= self.max_size
+            if not full and state.timer is None:
+                state.timer = loop.call_later(self.window_seconds, self._on_window, loop)
+
+        if full:
+            self._flush(loop, force=True)
+        return await future
+
+    def _on_window(self, loop: asyncio.AbstractEventLoop):
+        with self._lock:
+            state = self._loops.get(loop)
+            if state is not None:
+                state.timer = None
+        self._flush(loop)
+
+    def _flush(self, loop: asyncio.AbstractEventLoop, force: bool = False):
+        with self._lock:
+            state = self._loops.get(loop)
+            if state is None or not state.pending:
+                return
+            # Busy: keep collecting; the next finishing batch flushes
+            if not force and state.in_flight >= self.max_in_flight:
+                return
+            batch, state.pending = state.pending[:self.max_size], state.pending[self.max_size:]
+            if state.timer is not None and not state.pending:
+                state.timer.cancel()
+                state.timer = None
+            state.in_flight += 1
+
+        task = loop.create_task(self._run(loop, batch))
+        # Keep a reference until done; the loop only holds weak ones
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, loop: asyncio.AbstractEventLoop, batch: List[tuple]):
+        with self._lock:
+            self.batches += 1
+            self.items += len(batch)
+            self.largest = max(self.largest, len(batch))
+
+        try:
+            results = await self.run_batch([item for item, _ in batch])
+        except BaseException as e:
+            with self._lock:
+                self.failed += 1
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+        else:
+            for (_, future), result in zip(batch, results):
+                # Waiters that gave up (cancelled requests) are skipped
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            with self._lock:
+                state = self._loops[loop]
+                state.in_flight -= 1
+                idle = not state.pending and not state.in_flight and state.timer is None
+                if idle:
+                    del self._loops[loop]
+            if not idle:
+                self._flush(loop)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "window_ms": round(self.window_seconds * 1000, 2),
+                "max_size": self.max_size,
+                "max_in_flight": self.max_in_flight,
+                "batches": self.batches,
+                "items": self.items,
+                "avg_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+                "largest": self.largest,
+                "failed": self.failed,
+            }
+
+
+_classifier_batcher: Optional[MicroBatcher] = None
+
+
+def get_classifier_batcher(run_batch: RunBatch) -> Optional[MicroBatcher]:
+    """
+    Get or initialize the process-wide classification batcher.
+    Returns None unless LLM_CLASSIFIER_BATCH_ENABLED=true.
+    """
+    global _classifier_batcher
+
+    if os.getenv("LLM_CLASSIFIER_BATCH_ENABLED", "false").lower() != "true":
+        return None
+
+    if _classifier_batcher is None:
+        _classifier_batcher = MicroBatcher(
+            run_batch,
+            window_seconds=float(os.getenv("LLM_CLASSIFIER_BATCH_WINDOW_MS", "5")) / 1000,
+            max_size=int(os.getenv("LLM_CLASSIFIER_BATCH_MAX_SIZE", "16")),
+            max_in_flight=int(os.getenv("LLM_CLASSIFIER_BATCH_MAX_IN_FLIGHT", "2")),
+        )
+
+    return _classifier_batcher
+
+
+def classifier_batch_stats() -> Optional[Dict[str, Any]]:
+    return _classifier_batcher.stats() if _classifier_batcher is not None else None
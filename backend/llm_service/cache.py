@@ -0,0 +1,176 @@
+"""
+Result cache for the LLM pipeline.
+Bounded LRU + TTL cache keyed on a normalized form of the user input,
+so repeated phrases like "2 boiled eggs and toast" skip the LLM entirely.
+"""
+import copy
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+
+_NUMBER_WORDS = {
+    "zero": "0", "one": "1", "two": "2", "three": "3", "four": "4",
+    "five": "5", "six": "6", "seven": "7", "eight": "8", "nine": "9",
+    "ten": "10", "eleven": "11", "twelve": "12", "a dozen": "12",
+    "half": "0.5", "a couple of": "2", "a couple": "2",
+}
+
+_NUMBER_WORD_RE = re.compile(
+    r"\b(" + "|".join(sorted(map(re.escape, _NUMBER_WORDS), key=len, reverse=True)) + r")\b"
+)
+_THOUSANDS_RE = re.compile(r"(?<=\d),(?=\d{3}\b)")
+_FRACTION_RE = re.compile(r"\b(\d+)\s*/\s*(\d+)\b")
+_DECIMAL_RE = re.compile(r"\d+\.\d+")
+_DIGIT_ALPHA_RE = re.compile(r"(?<=\d)(?=[a-z])")
+_PUNCT_RE = re.compile(r"[^\w\s.]|_")
+_STRAY_DOT_RE = re.compile(r"(?<!\d)\.|\.(?!\d)")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def _format_decimal(match: re.Match) -> str:
+    value = float(match.group(0))
+    return str(int(value)) if value.is_integer() else f"{value:g}"
+
+
+def _format_fraction(match: re.Match) -> str:
+    denominator = int(match.group(2))
+    if denominator == 0:
+        return match.group(0)
+    return f"{int(match.group(1)) / denominator:g}"
+
+
+def normalize_input(text: str) -> str:
+    """
+    Canonical cache key for a user input.
+
+    Folds case, unicode forms, punctuation, whitespace and number formatting,
+    e.g. "Two  Boiled eggs, 200 G chicken!" -> "2 boiled eggs 200 g chicken".
+    """
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    text = _NUMBER_WORD_RE.sub(lambda m: _NUMBER_WORDS[m.group(1)], text)
+    text = _THOUSANDS_RE.sub("", text)
+    text = _FRACTION_RE.sub(_format_fraction, text)
+    text = _PUNCT_RE.sub(" ", text)
+    text = _STRAY_DOT_RE.sub(" ", text)
+    text = _DECIMAL_RE.sub(_format_decimal, text)
+    text = _DIGIT_ALPHA_RE.sub(" ", text)
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+class ResultCache:
+    """Thread-safe LRU cache with per-entry TTL and an approximate byte budget."""
+
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        max_bytes: int = 8 * 1024 * 1024,
+        ttl_seconds: float = 6 * 3600,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> (expires_at, size_bytes, value)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a copy of the cached value, or None on miss/expiry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, _, value = entry
+            if expires_at <= self._clock():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        return copy.deepcopy(value)
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a copy of value, evicting least recently used entries as needed."""
+        size = len(key) + len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            return
+
+        value = copy.deepcopy(value)
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (self._clock() + self.ttl_seconds, size, value)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+_result_cache: Optional[ResultCache] = None
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """
+    Get or initialize the process-wide result cache.
+    Returns None when disabled via LLM_CACHE_ENABLED=false.
+    """
+    global _result_cache
+
+    if os.getenv("LLM_CACHE_ENABLED", "true").lower() != "true":
+        return None
+
+    if _result_cache is None:
+        _result_cache = ResultCache(
+            max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2048")),
+            max_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", str(8 * 1024 * 1024))),
+            ttl_seconds=float(os.getenv("LLM_CACHE_TTL_SECONDS", str(6 * 3600))),
+        )
+
+    return _result_cache
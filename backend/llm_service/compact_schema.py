@@ -0,0 +1,82 @@
+"""
+Compact output schema for the food and exercise parsers.
+With LLM_PARSER_SCHEMA=compact the parser prompts ask for short item keys
+and no totals block: completion tokens dominate parse latency, and the
+long key names and the totals are pure repetition. Responses are expanded
+back into the usual parsed_data shape here, and food totals are summed
+server-side from the items.
+"""
+import os
+from typing import Dict, List
+
+from llm_service.local_parser import NUTRIENT_KEYS, sum_nutrition
+
+PARSER_SCHEMAS = ("full", "compact")
+
+FOOD_KEYS = {
+    "n": "name", "q": "quantity", "u": "unit", "p": "preparation",
+    "kc": "calories_kcal", "pr": "protein_g", "cb": "carbs_g", "ft": "fat_g", "fb": "fiber_g",
+    "c": "confidence",
+}
+EXERCISE_KEYS = {
+    "n": "name", "min": "duration_minutes", "km": "distance_km", "i": "intensity",
+    "kc": "calories_estimate", "c": "confidence",
+}
+NODE_KEYS = {"food_parser": FOOD_KEYS, "exercise_parser": EXERCISE_KEYS}
+
+
+def parser_schema() -> str:
+    schema = os.getenv("LLM_PARSER_SCHEMA", "full").lower()
+    if schema not in PARSER_SCHEMAS:
+        raise ValueError(f"Unknown LLM_PARSER_SCHEMA {schema!r}, expected one of {PARSER_SCHEMAS}")
+    return schema
+
+
+def _number(value):
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else 0
+
+
+def is_compact(item) -> bool:
+    return isinstance(item, dict) and "n" in item and "name" not in item
+
+
+def expand_item(item: Dict, keys: Dict[str, str]) -> Dict:
+    """Full-key item from a compact one; full items pass through unchanged."""
+    if not is_compact(item):
+        return item
+    return {keys.get(key, key): value for key, value in item.items()}
+
+
+def compact_item(item: Dict, keys: Dict[str, str]) -> Dict:
+    """The inverse of expand_item (fixtures, benchmarks)."""
+    short = {full: key for key, full in keys.items()}
+    return {short.get(key, key): value for key, value in item.items()}
+
+
+def expand_streamed_item(node: str, item: Dict) -> Dict:
+    keys = NODE_KEYS.get(node)
+    return expand_item(item, keys) if keys is not None else item
+
+
+def expand_food_response(parsed: Dict) -> Dict:
+    """A compact food response in the full shape, totals computed from the items."""
+    items = parsed.get("items") if isinstance(parsed, dict) else None
+    if not isinstance(items, list) or not any(is_compact(item) for item in items):
+        return parsed
+
+    expanded: List[Dict] = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        item = expand_item(item, FOOD_KEYS)
+        for key in NUTRIENT_KEYS:
+            item[key] = _number(item.get(key))
+        expanded.append(item)
+    return {"type": "food", "items": expanded, "total": sum_nutrition(expanded)}
+
+
+def expand_exercise_response(parsed: Dict) -> Dict:
+    items = parsed.get("items") if isinstance(parsed, dict) else None
+    if not isinstance(items, list) or not any(is_compact(item) for item in items):
+        return parsed
+    return {"type": "exercise", "items": [expand_item(item, EXERCISE_KEYS) for item in items]}
@@ -0,0 +1,229 @@
+"""
+Latency-aware degradation from LLM parsing to local estimation.
+Every provider attempt's latency and outcome feed a rolling window; they
+are timed by the resilience policy, so local queue waits and our own 429s
+are left out. When its p95 or error rate crosses a threshold, new food
+inputs are answered from a local estimate (nutrition table + item cache)
+marked low confidence, instead of waiting on a struggling provider; the
+estimated logs are re-parsed once it recovers (see
+food_or_workout_log_service.enrichment).
+"""
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+from llm_service.food_grammar import parse_phrase, split_items
+from llm_service.intent_rules import classify_by_rules
+from llm_service.item_cache import get_item_cache
+from llm_service.local_parser import NUTRIENT_KEYS, resolve_phrase, sum_nutrition
+from llm_service.resilience import LLMUnavailableError, is_transient
+
+NORMAL = "normal"
+DEGRADED = "degraded"
+
+# Estimated items never claim more than this; unknown phrases get 0
+ESTIMATE_CONFIDENCE = 0.5
+
+
+def is_provider_failure(exc: BaseException) -> bool:
+    """Failures that say the provider is unhealthy (not a bad prompt or answer)."""
+    return isinstance(exc, LLMUnavailableError) or is_transient(exc)
+
+
+class DegradationController:
+    """
+    normal -> degraded once the last window_seconds of calls (at least
+    min_samples) have a p95 above p95_threshold_ms or an error rate above
+    error_rate_threshold. While degraded, one request per
+    probe_interval_seconds still goes to the LLM; recovery_probes healthy
+    calls in a row switch back to normal.
+    """
+
+    def __init__(
+        self,
+        p95_threshold_ms: float = 8000,
+        error_rate_threshold: float = 0.5,
+        window_seconds: float = 60,
+        min_samples: int = 20,
+        probe_interval_seconds: float = 5,
+        recovery_probes: int = 3,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.p95_threshold_ms = p95_threshold_ms
+        self.error_rate_threshold = error_rate_threshold
+        self.window_seconds = window_seconds
+        self.min_samples = min_samples
+        self.probe_interval_seconds = probe_interval_seconds
+        self.recovery_probes = recovery_probes
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        self.state = NORMAL
+        self.reason: Optional[str] = None
+        self._samples = deque()             # (at, seconds, failed)
+        self._healthy_streak = 0
+        self._last_probe = -math.inf
+        self._degraded_since: Optional[float] = None
+
+        self.transitions = 0
+        self.degraded_seconds = 0.0
+        self.estimated = 0
+        self.probes = 0
+
+    @property
+    def degraded(self) -> bool:
+        return self.state == DEGRADED
+
+    def record(self, seconds: float, failed: bool):
+        """One finished LLM call."""
+        with self._lock:
+            now = self._clock()
+            if self.state == DEGRADED:
+                healthy = not failed and seconds * 1000 <= self.p95_threshold_ms
+                self._healthy_streak = self._healthy_streak + 1 if healthy else 0
+                if self._healthy_streak >= self.recovery_probes:
+                    self.state = NORMAL
+                    self.reason = None
+                    self.degraded_seconds += now - self._degraded_since
+                    self._degraded_since = None
+                return
+
+            self._samples.append((now, seconds, failed))
+            self._prune(now)
+            if len(self._samples) < self.min_samples:
+                return
+            p95_ms, error_rate = self._window_stats()
+            if p95_ms > self.p95_threshold_ms:
+                self._degrade(now, f"p95 {p95_ms:.0f} ms > {self.p95_threshold_ms:.0f} ms")
+            elif error_rate > self.error_rate_threshold:
+                self._degrade(now, f"error rate {error_rate:.0%} > {self.error_rate_threshold:.0%}")
+
+    def allow_probe(self) -> bool:
+        """While degraded: whether this request goes to the LLM to measure recovery."""
+        with self._lock:
+            now = self._clock()
+            if now - self._last_probe < self.probe_interval_seconds:
+                return False
+            self._last_probe = now
+            self.probes += 1
+            return True
+
+    def count_estimate(self):
+        with self._lock:
+            self.estimated += 1
+
+    def _degrade(self, now: float, reason: str):
+        self.state = DEGRADED
+        self.reason = reason
+        self.transitions += 1
+        self._degraded_since = now
+        self._healthy_streak = 0
+        self._last_probe = now
+        # Recovery is judged on fresh calls only
+        self._samples.clear()
+
+    def _prune(self, now: float):
+        while self._samples and now - self._samples[0][0] > self.window_seconds:
+            self._samples.popleft()
+
+    def _window_stats(self):
+        if not self._samples:
+            return 0.0, 0.0
+        ordered = sorted(seconds for _, seconds, _ in self._samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(0.95 * len(ordered)) - 1))
+        errors = sum(1 for _, _, failed in self._samples if failed)
+        return ordered[index] * 1000, errors / len(self._samples)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._prune(self._clock())
+            p95_ms, error_rate = self._window_stats()
+            degraded_seconds = self.degraded_seconds
+            if self._degraded_since is not None:
+                degraded_seconds += self._clock() - self._degraded_since
+            return {
+                "state": self.state,
+                "reason": self.reason,
+                "window_samples": len(self._samples),
+                "window_p95_ms": round(p95_ms, 1),
+                "window_error_rate": round(error_rate, 4),
+                "p95_threshold_ms": self.p95_threshold_ms,
+                "error_rate_threshold": self.error_rate_threshold,
+                "transitions": self.transitions,
+                "degraded_seconds": round(degraded_seconds, 1),
+                "estimated": self.estimated,
+                "probes": self.probes,
+            }
+
+
+def record_provider_attempt(seconds: float, failed: bool):
+    """ResiliencePolicy hook: feed one provider attempt to the controller."""
+    controller = get_degradation_controller()
+    if controller is not None:
+        controller.record(seconds, failed)
+
+
+def estimate_locally(text: str) -> Optional[Dict]:
+    """
+    Best-effort food parse without the LLM: every phrase the nutrition table
+    or item cache knows, at any confidence, capped at ESTIMATE_CONFIDENCE.
+    Unknown phrases stay as zero-calorie placeholders until re-enrichment.
+    None when nothing resolves or the input reads as exercise.
+    """
+    if classify_by_rules(text).intent in ("exercise", "mixed"):
+        return None
+
+    phrases = [p for p in map(parse_phrase, split_items(text)) if p is not None]
+    cache = get_item_cache()
+    items, resolved = [], 0
+    for phrase in phrases:
+        item = resolve_phrase(phrase) or (cache.lookup(phrase) if cache is not None else None)
+        if item is None:
+            item = {"name": phrase.name, "quantity": phrase.quantity, "unit": phrase.unit}
+            item.update({key: 0 for key in NUTRIENT_KEYS}, confidence=0.0)
+        else:
+            resolved += 1
+            confidence = item.get("confidence") or ESTIMATE_CONFIDENCE
+            item = dict(item, confidence=min(confidence, ESTIMATE_CONFIDENCE))
+        items.append(item)
+
+    if not resolved:
+        return None
+
+    return {
+        "input": text,
+        "intent": "food",
+        "parsed_data": items,
+        "nutrition": sum_nutrition(items),
+        "source": "estimate",
+        "low_confidence": True,
+    }
+
+
+_controller: Optional[DegradationController] = None
+
+
+def get_degradation_controller() -> Optional[DegradationController]:
+    """
+    Get or initialize the process-wide degradation controller.
+    Returns None when disabled via LLM_DEGRADATION_ENABLED=false.
+    """
+    global _controller
+
+    if os.getenv("LLM_DEGRADATION_ENABLED", "true").lower() != "true":
+        return None
+
+    if _controller is None:
+        _controller = DegradationController(
+            p95_threshold_ms=float(os.getenv("LLM_DEGRADE_P95_MS", "8000")),
+            error_rate_threshold=float(os.getenv("LLM_DEGRADE_ERROR_RATE", "0.5")),
+            window_seconds=float(os.getenv("LLM_DEGRADE_WINDOW_SECONDS", "60")),
+            min_samples=int(os.getenv("LLM_DEGRADE_MIN_SAMPLES", "20")),
+            probe_interval_seconds=float(os.getenv("LLM_DEGRADE_PROBE_INTERVAL_SECONDS", "5")),
+            recovery_probes=int(os.getenv("LLM_DEGRADE_RECOVERY_PROBES", "3")),
+        )
+
+    return _controller
@@ -0,0 +1,113 @@
+"""
+Quantity/unit grammar for short food descriptions.
+Splits an input into item phrases and reads "<quantity> <unit> [of] <food>"
+out of each one, e.g. "200g chicken breast" -> (200, "g", "chicken breast").
+"""
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+from llm_service.cache import normalize_input
+
+# Unit spelling -> (output unit, multiplier into that unit)
+UNIT_ALIASES = {
+    "g": ("g", 1), "gm": ("g", 1), "gms": ("g", 1), "gram": ("g", 1), "grams": ("g", 1),
+    "gr": ("g", 1), "kg": ("g", 1000), "kgs": ("g", 1000), "kilogram": ("g", 1000),
+    "kilograms": ("g", 1000), "oz": ("g", 28.35), "ounce": ("g", 28.35), "ounces": ("g", 28.35),
+    "ml": ("ml", 1), "milliliter": ("ml", 1), "milliliters": ("ml", 1), "millilitre": ("ml", 1),
+    "millilitres": ("ml", 1), "l": ("ml", 1000), "liter": ("ml", 1000), "liters": ("ml", 1000),
+    "litre": ("ml", 1000), "litres": ("ml", 1000), "glass": ("ml", 250), "glasses": ("ml", 250),
+    "cup": ("cup", 1), "cups": ("cup", 1), "mug": ("cup", 1), "mugs": ("cup", 1),
+    "tbsp": ("tbsp", 1), "tablespoon": ("tbsp", 1), "tablespoons": ("tbsp", 1),
+    "tsp": ("tsp", 1), "teaspoon": ("tsp", 1), "teaspoons": ("tsp", 1),
+    "slice": ("slice", 1), "slices": ("slice", 1),
+    "bowl": ("bowl", 1), "bowls": ("bowl", 1),
+    "plate": ("plate", 1), "plates": ("plate", 1),
+    "piece": ("piece", 1), "pieces": ("piece", 1), "pc": ("piece", 1), "pcs": ("piece", 1),
+}
+
+PREPARATIONS = {
+    "boiled", "fried", "grilled", "raw", "baked", "scrambled", "poached", "roasted",
+    "steamed", "toasted", "sauteed", "cooked", "stir fried", "deep fried", "air fried",
+}
+_PREPARATIONS_LONGEST_FIRST = sorted(PREPARATIONS, key=len, reverse=True)
+
+_LEADING_FILLERS = {
+    "i", "ive", "ve", "had", "have", "ate", "eaten", "eat", "just", "drank", "drink", "also",
+    "then", "some", "for", "breakfast", "lunch", "dinner", "snack",
+}
+_TRAILING_FILLER_RE = re.compile(
+    r"\s+(for|at|in the|this)\s+(breakfast|lunch|dinner|snack|morning|evening|night)$"
+    r"|\s+(today|tonight|this morning|this evening)$"
+)
+_SPLIT_RE = re.compile(r",(?!\d{3}\b)|;|\+|&|\n|\band\b|\bwith\b|\bplus\b", re.IGNORECASE)
+_NUMBER_RE = re.compile(r"^\d+(\.\d+)?$")
+
+
+@dataclass
+class FoodPhrase:
+    text: str                       # normalized phrase
+    name: str                       # food words, e.g. "boiled egg"
+    quantity: Optional[float]       # None when the phrase has no amount
+    unit: Optional[str]             # g, ml, cup, tbsp, tsp, slice, bowl, plate, piece or None
+    preparation: Optional[str]
+
+
+def split_items(text: str) -> List[str]:
+    """Split an input into item phrases on commas, "and", "with", "+" and friends."""
+    return [part.strip() for part in _SPLIT_RE.split(text or "") if part and part.strip()]
+
+
+def singularize(word: str) -> str:
+    if len(word) <= 3 or word.endswith("ss"):
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("oes", "ches", "shes", "xes", "sses")):
+        return word[:-2]
+    if word.endswith("s"):
+        return word[:-1]
+    return word
+
+
+def food_key(name: str) -> str:
+    """Lookup key for a food name: normalized, singular, filler-free."""
+    return " ".join(singularize(word) for word in normalize_input(name).split())
+
+
+def parse_phrase(phrase: str) -> Optional[FoodPhrase]:
+    """Parse "<quantity> <unit> [of] <food>"; returns None if no food words remain."""
+    text = _TRAILING_FILLER_RE.sub("", normalize_input(phrase))
+    tokens = text.split()
+
+    while tokens and tokens[0] in _LEADING_FILLERS:
+        tokens.pop(0)
+
+    quantity = None
+    if tokens and _NUMBER_RE.match(tokens[0]):
+        quantity = float(tokens.pop(0))
+    elif tokens and tokens[0] in ("a", "an"):
+        quantity = 1.0
+        tokens.pop(0)
+
+    unit = None
+    if tokens and tokens[0] in UNIT_ALIASES:
+        unit, factor = UNIT_ALIASES[tokens.pop(0)]
+        quantity = (1.0 if quantity is None else quantity) * factor
+
+    if tokens and tokens[0] == "of":
+        tokens.pop(0)
+
+    if not tokens:
+        return None
+
+    name = " ".join(tokens)
+    preparation = next((p for p in _PREPARATIONS_LONGEST_FIRST if re.search(rf"\b{p}\b", name)), None)
+
+    return FoodPhrase(
+        text=text,
+        name=name,
+        quantity=quantity,
+        unit=unit,
+        preparation=preparation,
+    )
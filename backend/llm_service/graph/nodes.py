@@ -1,87 +1,479 @@
+import asyncio
+import contextvars
 import json
-from llm_service.llm_client import get_llm
+import time
+from concurrent.futures import ThreadPoolExecutor
+from llm_service.llm_client import get_llm, get_llm_config
 from llm_service.prompts.classifier import CLASSIFIER_PROMPT
-from llm_service.prompts.food_parser import FOOD_PARSER_PROMPT
-from llm_service.prompts.exercise_parser import EXERCISE_PARSER_PROMPT
+from llm_service.prompts.classifier_batch import CLASSIFIER_BATCH_PROMPT
+from llm_service.prompts.food_parser import FOOD_PARSER_COMPACT_PROMPT, FOOD_PARSER_PROMPT
+from llm_service.prompts.exercise_parser import EXERCISE_PARSER_COMPACT_PROMPT, EXERCISE_PARSER_PROMPT
+from llm_service.prompts.combined_parser import COMBINED_PARSER_PROMPT
+from llm_service.local_parser import local_parser_enabled, parse_locally, sum_nutrition
+from llm_service.compact_schema import parser_schema
+from llm_service.structured import (
+    AnswerError,
+    get_parse_stats,
+    parse_answer,
+    reask_enabled,
+    reask_prompt,
+    rejected_generation,
+)
+from llm_service.item_cache import get_item_cache
+from llm_service.intent_rules import get_rule_classifier
+from llm_service.scheduler import get_scheduler
+from llm_service.resilience import get_resilience_policy
+from llm_service.batching import get_classifier_batcher
+from llm_service.telemetry import get_telemetry, record_llm_response, record_parse_failure, span
+
+# Client override for every node (tests, benchmarks). When None, each node
+# uses its registry client, created on first use rather than at import.
+llm = None
+
+# Runs the food and exercise parsers side by side for "mixed" inputs (sync path)
+_mixed_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="mixed-parser")
+
+VALID_INTENTS = ("food", "exercise", "mixed")
+
+# ---------- LLM Calls ----------
+def llm_for(node, streaming=False):
+    """The client and model settings a node calls with."""
+    config = get_llm_config(node)
+    if llm is not None:
+        return llm, config, type(llm).__name__
+    # The provider does not stream in JSON mode
+    client = get_llm(node, json_mode=False) if streaming and config.json_mode else get_llm(node)
+    return client, config, config.model
+
+
+def call_llm(state, prompt, node):
+    client, _, model = llm_for(node)
+
+    # Retries/breaker wrap the call; every attempt takes its own scheduler
+    # slot (concurrency cap + fair queue) so backoff never holds a slot
+    def slot():
+        return get_scheduler().slot(state.get("user_id"))
+
+    with span(f"{node}.llm") as attrs:
+        attrs["model"] = model
+        response = get_resilience_policy().call(node, lambda: client.invoke(prompt), slot=slot)
+        record_llm_response(node, response, attrs)
+    return response
+
+
+async def acall_llm(state, prompt, node):
+    client, config, model = llm_for(node)
+
+    def slot():
+        return get_scheduler().aslot(state.get("user_id"))
+
+    with span(f"{node}.llm") as attrs:
+        attrs["model"] = model
+        response = await get_resilience_policy().acall(
+            node, lambda: client.ainvoke(prompt), timeout=config.timeout, slot=slot
+        )
+        record_llm_response(node, response, attrs)
+    return response
+
+
+async def astream_llm(state, prompt, node):
+    """Yield the response text chunk by chunk; same slot/resilience/telemetry as acall_llm."""
+    client, config, model = llm_for(node, streaming=True)
+
+    def slot():
+        return get_scheduler().aslot(state.get("user_id"))
+
+    with span(f"{node}.stream") as attrs:
+        attrs["model"] = model
+        started = time.perf_counter()
+        full = None
+        async for chunk in get_resilience_policy().astream(
+            node, lambda: client.astream(prompt), timeout=config.timeout, slot=slot
+        ):
+            if full is None:
+                attrs["first_chunk_ms"] = round((time.perf_counter() - started) * 1000, 2)
+                full = chunk
+            else:
+                full = full + chunk
+            yield chunk.content
+        if full is not None:
+            record_llm_response(node, full, attrs)
+
+
+# ---------- Structured Answers ----------
+def ask_llm(state, prompt, node):
+    """
+    The node's validated answer to prompt, or None when it is unusable.
+    Answers that local repair cannot fix, or that were cut off, are re-asked
+    once.
+    """
+    answer, error = try_parse(node, llm_content(state, prompt, node))
+    if error is not None and reask_enabled():
+        get_parse_stats().count(node, "reasked")
+        retry = llm_content(state, reask_prompt(prompt, error.raw, error.error), node)
+        answer, error = try_parse(node, retry, reask=True)
+    return answer if error is None else fail_answer(node, error, state)
+
+
+async def aask_llm(state, prompt, node, content=None):
+    """Async ask_llm; content is an answer already received (streaming)."""
+    if content is None:
+        content = await allm_content(state, prompt, node)
+    answer, error = try_parse(node, content)
+    if error is not None and reask_enabled():
+        get_parse_stats().count(node, "reasked")
+        retry = await allm_content(state, reask_prompt(prompt, error.raw, error.error), node)
+        answer, error = try_parse(node, retry, reask=True)
+    return answer if error is None else fail_answer(node, error, state)
+
+
+def llm_content(state, prompt, node):
+    try:
+        return call_llm(state, prompt, node).content
+    except Exception as e:
+        # In JSON mode invalid JSON comes back as an error; repair it like any answer
+        content = rejected_generation(e)
+        if content is None:
+            raise
+        return content
+
+
+async def allm_content(state, prompt, node):
+    try:
+        return (await acall_llm(state, prompt, node)).content
+    except Exception as e:
+        content = rejected_generation(e)
+        if content is None:
+            raise
+        return content
+
+
+def decode_answer(node, content, state=None):
+    """The node's validated answer, or None when it is unusable (no re-ask)."""
+    answer, error = try_parse(node, content)
+    return answer if error is None else fail_answer(node, error, state)
+
+
+def try_parse(node, content, reask=False):
+    """(answer, None), or (None, AnswerError)."""
+    stats = get_parse_stats()
+    if not reask:
+        stats.count(node, "answers")
+
+    with span(f"{node}.parse") as attrs:
+        try:
+            answer, repaired = parse_answer(node, content)
+        except AnswerError as e:
+            attrs["invalid"] = e.error
+            return None, e
+
+        if repaired:
+            attrs["repaired"] = True
+            stats.count(node, "repaired")
+        if reask:
+            stats.count(node, "reask_recovered")
+    return answer, None
+
+
+def fail_answer(node, error, state=None):
+    """
+    The complete part of a cut-off answer, or None. A partial answer is
+    missing whatever followed the cut, so state is marked low confidence:
+    kept out of the caches and queued for re-enrichment once logged.
+    """
+    if error.partial is not None:
+        get_parse_stats().count(node, "partial")
+        if state is not None:
+            state["low_confidence"] = True
+        return error.partial
+
+    get_parse_stats().count(node, "failed")
+    record_parse_failure(node, error.raw)
+    return None
+
+
+# ---------- Local Fast-Path Parser (no LLM) ----------
+def local_parser_node(state):
+    if not local_parser_enabled():
+        return state
+
+    result = parse_locally(state["input"])
+    if result is not None:
+        state["intent"] = result["intent"]
+        state["parsed_data"] = result["parsed_data"]
+        state["nutrition"] = result["nutrition"]
+        state["source"] = "local"
+
+    return state
+
+
+# ---------- Rule Pre-Classifier (no LLM) ----------
+def rule_classifier_node(state):
+    # Only confident verdicts set the intent; the rest fall through to the LLM
+    rules = get_rule_classifier()
+    if rules is None:
+        return state
+
+    verdict = rules.decide(state["input"])
+    if verdict is not None:
+        state["intent"] = verdict.intent
+
+    return state
+
+
+def observe_rule_agreement(state):
+    rules = get_rule_classifier()
+    if rules is not None:
+        rules.observe(state["input"], state["intent"])
+    return state
 
-llm = get_llm()
 
 # ---------- Classifier Agent ----------
 def classify_node(state):
-    response = llm.invoke(
-        CLASSIFIER_PROMPT.format(input=state["input"])
-    )
-    state["intent"] = json.loads(response.content)["type"]
+    answer = ask_llm(state, CLASSIFIER_PROMPT.format(input=state["input"]), "classifier")
+    return observe_rule_agreement(apply_classifier_answer(state, answer))
+
+
+async def aclassify_node(state):
+    # Under concurrency, classifications can share one batched round trip
+    batcher = get_classifier_batcher(aclassify_batch)
+    if batcher is not None:
+        with span("classifier.batched"):
+            state["intent"] = await batcher.submit(state)
+        return observe_rule_agreement(state)
+
+    answer = await aask_llm(state, CLASSIFIER_PROMPT.format(input=state["input"]), "classifier")
+    return observe_rule_agreement(apply_classifier_answer(state, answer))
+
+
+async def aclassify_batch(states):
+    """
+    Classify several inputs with one numbered prompt.
+    Inputs whose answer is missing or invalid fall back to single calls.
+    """
+    if len(states) == 1:
+        return [await aclassify_single(states[0])]
+
+    inputs = "\n".join(f"{i}. {json.dumps(state['input'])}" for i, state in enumerate(states, 1))
+    # The batch serves several users; it queues for a slot under its own key
+    prompt = CLASSIFIER_BATCH_PROMPT.format(inputs=inputs)
+    response = await acall_llm({"user_id": "classifier-batch"}, prompt, "classifier_batch")
+    intents = parse_batch_intents(response.content, len(states))
+
+    missing = [i for i, intent in enumerate(intents) if intent is None]
+    if missing:
+        get_telemetry().increment("batch_fallbacks", "classifier")
+        fallbacks = await asyncio.gather(*(aclassify_single(states[i]) for i in missing))
+        for i, intent in zip(missing, fallbacks):
+            intents[i] = intent
+
+    return intents
+
+
+async def aclassify_single(state):
+    answer = await aask_llm(state, CLASSIFIER_PROMPT.format(input=state["input"]), "classifier")
+    return apply_classifier_answer({}, answer)["intent"]
+
+
+def parse_batch_intents(content, count):
+    """Intent per input (1-based "id" in the answer), None where unusable."""
+    # Unusable answers fall back to single calls rather than a re-ask
+    answer = decode_answer("classifier_batch", content)
+    intents = [None] * count
+
+    for result in answer["results"] if answer is not None else []:
+        if not isinstance(result, dict):
+            continue
+        index = result.get("id")
+        if isinstance(index, int) and 1 <= index <= count and result.get("type") in VALID_INTENTS:
+            intents[index - 1] = result["type"]
+    return intents
+
+
+def handle_classifier_response(state, response):
+    return apply_classifier_answer(state, decode_answer("classifier", response.content, state))
+
+
+def apply_classifier_answer(state, answer):
+    # Unusable answers fall back to food, the most common log
+    state["intent"] = answer["type"] if answer is not None else "food"
     return state
 
 
 # ---------- Food Parser Agent ----------
 def food_parser_node(state):
-    response = llm.invoke(
-        FOOD_PARSER_PROMPT.format(input=state["input"])
-    )
+    plan = plan_food_items(state)
+    if plan is not None and plan.complete:
+        return apply_item_plan(state, plan, [])
 
-    raw = response.content.strip()
+    answer = ask_llm(state, food_parser_prompt(state, plan), "food_parser")
+    return apply_food_answer(state, answer, plan)
 
-    if raw.startswith("```"):
-        raw = raw.replace("```json", "").replace("```", "").strip()
 
-    try:
-        parsed = json.loads(raw)
-        state["parsed_data"] = parsed.get("items", [])
-        
-        # Safe nutrition extraction - handle None and invalid values
-        nutrition = parsed.get("total", {})
-        # Ensure calories_kcal is a valid number
-        cal = nutrition.get("calories_kcal")
-        if not isinstance(cal, (int, float)) or cal is None:
-            nutrition["calories_kcal"] = 0
-        
-        state["nutrition"] = nutrition
-    except json.JSONDecodeError:
-        print("❌ Food parser returned invalid JSON:")
-        print(raw)
+async def afood_parser_node(state):
+    plan = plan_food_items(state)
+    if plan is not None and plan.complete:
+        return apply_item_plan(state, plan, [])
+
+    answer = await aask_llm(state, food_parser_prompt(state, plan), "food_parser")
+    return apply_food_answer(state, answer, plan)
+
+
+def handle_food_response(state, response, plan=None):
+    return apply_food_answer(state, decode_answer("food_parser", response.content, state), plan)
+
+
+def apply_food_answer(state, answer, plan=None):
+    if answer is None:
         state["parsed_data"] = []
         state["nutrition"] = default_nutrition()
+        return state
 
+    apply_food_result(state, answer)
+    if plan is not None:
+        apply_item_plan(state, plan, state["parsed_data"])
+    return state
+
+
+# ---------- Item Cache (per-food reuse inside the food parser) ----------
+def plan_food_items(state):
+    """Answer the input's item phrases from the item cache; None when not applicable."""
+    cache = get_item_cache()
+    # Mixed inputs also describe exercise, so only plain food logs are split
+    if cache is None or state.get("intent") != "food":
+        return None
+
+    with span("item_cache.lookup") as attrs:
+        plan = cache.plan(state["input"])
+        if plan is not None:
+            attrs["known"] = len(plan.known)
+            attrs["unknown"] = len(plan.unknown)
+    return plan
+
+
+def food_parser_prompt(state, plan=None):
+    template = FOOD_PARSER_COMPACT_PROMPT if parser_schema() == "compact" else FOOD_PARSER_PROMPT
+    # Only the phrases the item cache could not answer go to the LLM
+    return template.format(input=plan.llm_input if plan is not None else state["input"])
+
+
+def apply_item_plan(state, plan, llm_items):
+    """Learn the LLM's items, then merge them with the cached ones."""
+    cache = get_item_cache()
+    # A cut-off answer may have lost items, so its phrases could pair wrongly
+    if cache is not None and llm_items and not state.get("low_confidence"):
+        cache.learn(plan, llm_items)
+
+    if plan.known:
+        state["parsed_data"] = plan.merge(llm_items)
+        state["nutrition"] = sum_nutrition(state["parsed_data"])
+    if plan.complete:
+        state["source"] = "item_cache"
     return state
 
 
 # ---------- Exercise Parser Agent ----------
 def exercise_parser_node(state):
-    response = llm.invoke(
-        EXERCISE_PARSER_PROMPT.format(input=state["input"])
-    )
+    answer = ask_llm(state, exercise_parser_prompt(state), "exercise_parser")
+    return apply_exercise_answer(state, answer)
 
-    raw = response.content.strip()
 
-    if raw.startswith("```"):
-        raw = raw.replace("```json", "").replace("```", "").strip()
+async def aexercise_parser_node(state):
+    answer = await aask_llm(state, exercise_parser_prompt(state), "exercise_parser")
+    return apply_exercise_answer(state, answer)
 
-    try:
-        parsed = json.loads(raw)
-
-        items = parsed.get("items", [])
-
-        # Safe calorie summation - handle None and invalid values
-        total_calories = 0
-        for ex in items:
-            cal = ex.get("calories_estimate")
-            # Treat None, missing, or non-numeric values as 0
-            safe_cal = cal if isinstance(cal, (int, float)) and cal is not None else 0
-            total_calories += safe_cal
-
-        state["parsed_data"] = items
-        state["nutrition"] = {
-            "calories_kcal": total_calories
-        }
-
-    except json.JSONDecodeError:
-        print("❌ Exercise parser returned invalid JSON:")
-        print(raw)
+
+def exercise_parser_prompt(state):
+    template = EXERCISE_PARSER_COMPACT_PROMPT if parser_schema() == "compact" else EXERCISE_PARSER_PROMPT
+    return template.format(input=state["input"])
+
+
+def handle_exercise_response(state, response):
+    return apply_exercise_answer(state, decode_answer("exercise_parser", response.content, state))
+
+
+def apply_exercise_answer(state, answer):
+    if answer is None:
         state["parsed_data"] = []
         state["nutrition"] = {"calories_kcal": 0}
+        return state
+    return apply_exercise_result(state, answer)
+
+
+# ---------- Combined Classifier + Parser Agent (single round trip) ----------
+def combined_parser_node(state):
+    answer = ask_llm(state, COMBINED_PARSER_PROMPT.format(input=state["input"]), "combined_parser")
+    return apply_combined_answer(state, answer)
+
 
+async def acombined_parser_node(state):
+    answer = await aask_llm(state, COMBINED_PARSER_PROMPT.format(input=state["input"]), "combined_parser")
+    return apply_combined_answer(state, answer)
+
+
+def handle_combined_response(state, response):
+    return apply_combined_answer(state, decode_answer("combined_parser", response.content, state))
+
+
+def apply_combined_answer(state, parsed):
+    if parsed is None:
+        state["intent"] = "food"
+        state["parsed_data"] = []
+        state["nutrition"] = default_nutrition()
+        return state
+
+    intent = parsed.get("type")
+    items = parsed["items"]
+    state["intent"] = intent if intent in VALID_INTENTS else "food"
+
+    foods = [item for item in items if item.get("kind") != "exercise"]
+    exercises = [item for item in items if item.get("kind") != "food"]
+
+    if state["intent"] == "exercise":
+        apply_exercise_result(state, {"items": exercises})
+    elif state["intent"] == "food":
+        apply_food_result(state, {"items": foods, "total": parsed.get("total", {})})
+    else:
+        food_state = apply_food_result({}, {"items": foods, "total": parsed.get("total", {})})
+        exercise_state = apply_exercise_result({}, {"items": exercises})
+        merge_mixed_results(state, food_state, exercise_state)
+
+    return state
+
+
+# ---------- Mixed Parser (food + exercise fan-out) ----------
+def mixed_parser_node(state):
+    # Carry the request's context (trace) into the worker threads
+    food_future = _mixed_executor.submit(contextvars.copy_context().run, food_parser_node, dict(state))
+    exercise_future = _mixed_executor.submit(contextvars.copy_context().run, exercise_parser_node, dict(state))
+    return merge_mixed_results(state, food_future.result(), exercise_future.result())
+
+
+async def amixed_parser_node(state):
+    food_state, exercise_state = await asyncio.gather(
+        afood_parser_node(dict(state)),
+        aexercise_parser_node(dict(state)),
+    )
+    return merge_mixed_results(state, food_state, exercise_state)
+
+
+def merge_mixed_results(state, food_state, exercise_state):
+    """
+    Merge food and exercise parses into one state.
+    Items are tagged with "kind"; nutrition holds the food totals plus
+    the exercise total as "burned_calories_kcal".
+    """
+    foods = [dict(item, kind="food") for item in food_state.get("parsed_data") or []]
+    exercises = [dict(item, kind="exercise") for item in exercise_state.get("parsed_data") or []]
+
+    nutrition = dict(food_state.get("nutrition") or default_nutrition())
+    nutrition["burned_calories_kcal"] = (exercise_state.get("nutrition") or {}).get("calories_kcal", 0)
+
+    state["intent"] = "mixed"
+    state["parsed_data"] = foods + exercises
+    state["nutrition"] = nutrition
+    if food_state.get("low_confidence") or exercise_state.get("low_confidence"):
+        state["low_confidence"] = True
     return state
 
 
@@ -89,6 +481,42 @@ def exercise_parser_node(state):
 def calculator_node(state):
     if state.get("nutrition") is None:
         state["nutrition"] = {"calories_kcal": 0}
+    if state.get("source") is None:
+        state["source"] = "llm"
+    return state
+
+
+# ---------- Helpers ----------
+def apply_food_result(state, parsed):
+    state["parsed_data"] = parsed.get("items", [])
+
+    # Safe nutrition extraction - handle None and invalid values; a missing
+    # total (e.g. cut off with the end of a truncated answer) is summed
+    nutrition = parsed.get("total") or sum_nutrition(state["parsed_data"])
+    # Ensure calories_kcal is a valid number
+    cal = nutrition.get("calories_kcal")
+    if not isinstance(cal, (int, float)) or cal is None:
+        nutrition["calories_kcal"] = 0
+
+    state["nutrition"] = nutrition
+    return state
+
+
+def apply_exercise_result(state, parsed):
+    items = parsed.get("items", [])
+
+    # Safe calorie summation - handle None and invalid values
+    total_calories = 0
+    for ex in items:
+        cal = ex.get("calories_estimate")
+        # Treat None, missing, or non-numeric values as 0
+        safe_cal = cal if isinstance(cal, (int, float)) and cal is not None else 0
+        total_calories += safe_cal
+
+    state["parsed_data"] = items
+    state["nutrition"] = {
+        "calories_kcal": total_calories
+    }
     return state
 
 
@@ -99,4 +527,4 @@ def default_nutrition():
         "carbs_g": 0,
         "fat_g": 0,
         "fiber_g": 0
-    }
\ No newline at end of file
+    }
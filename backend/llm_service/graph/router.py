@@ -1,2 +1,13 @@
 def route_by_intent(state):
-    return state["intent"]
\ No newline at end of file
+    return state["intent"]
+
+
+def route_after_rules(state):
+    return state.get("intent") or "unsure"
+
+
+def route_after_local_parse(state):
+    if state.get("source") == "local":
+        return "resolved"
+    # A client intent hint goes straight to its parser
+    return state.get("intent") or "unresolved"
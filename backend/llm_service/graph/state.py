@@ -4,4 +4,7 @@ class LLMState(TypedDict):
     input: str
     intent: Optional[str]
     parsed_data: Optional[Dict]
-    nutrition: Optional[Dict]
\ No newline at end of file
+    nutrition: Optional[Dict]
+    source: Optional[str]  # "local" (fast path), "item_cache" or "llm"
+    low_confidence: Optional[bool]  # set when an answer was cut off and only partly used
+    user_id: Optional[int]  # used for fair scheduling, never cached
\ No newline at end of file
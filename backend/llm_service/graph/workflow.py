@@ -1,35 +1,135 @@
+import os
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph
 from llm_service.graph.state import LLMState
 from llm_service.graph.nodes import (
+    local_parser_node,
+    rule_classifier_node,
     classify_node,
+    aclassify_node,
     food_parser_node,
+    afood_parser_node,
     exercise_parser_node,
+    aexercise_parser_node,
+    combined_parser_node,
+    acombined_parser_node,
+    mixed_parser_node,
+    amixed_parser_node,
     calculator_node,
 )
-from llm_service.graph.router import route_by_intent
+from llm_service.graph.router import route_by_intent, route_after_local_parse, route_after_rules
+from llm_service.telemetry import span
 
+# "two_step": classifier -> parser (two LLM round trips)
+# "single_pass": combined classify+parse prompt (one LLM round trip)
+GRAPH_MODES = ("two_step", "single_pass")
 
-def build_graph():
+
+def get_graph_mode():
+    mode = os.getenv("LLM_GRAPH_MODE", "two_step").lower()
+    if mode not in GRAPH_MODES:
+        raise ValueError(f"Unknown LLM_GRAPH_MODE '{mode}', expected one of {GRAPH_MODES}")
+    return mode
+
+
+def graph_node(name, func, afunc=None):
+    """
+    Node usable from both graph.invoke (sync) and graph.ainvoke (async),
+    timed as a telemetry stage. Without afunc, func is cheap and runs inline.
+    """
+    def run(state):
+        with span(name):
+            return func(state)
+
+    async def arun(state):
+        with span(name):
+            if afunc is None:
+                return func(state)
+            return await afunc(state)
+
+    return RunnableLambda(run, afunc=arun, name=name)
+
+
+def build_graph(mode=None):
+    mode = mode or get_graph_mode()
+
+    if mode == "single_pass":
+        return build_single_pass_graph()
+
+    return build_two_step_graph()
+
+
+def add_local_parser(graph, fallback):
+    """
+    Entry stage: resolve simple inputs from the nutrition table, else go to the
+    LLM. Inputs with an intent hint skip classification and go to their parser.
+    """
+    graph.add_node("local_parser", graph_node("local_parser", local_parser_node))
+    graph.set_entry_point("local_parser")
+    graph.add_conditional_edges(
+        "local_parser",
+        route_after_local_parse,
+        {
+            "resolved": "calculator",
+            "food": "food_parser",
+            "exercise": "exercise_parser",
+            "unresolved": fallback,
+        },
+    )
+
+
+def build_two_step_graph():
     graph = StateGraph(LLMState)
 
-    graph.add_node("classifier", classify_node)
-    graph.add_node("food_parser", food_parser_node)
-    graph.add_node("exercise_parser", exercise_parser_node)
-    graph.add_node("calculator", calculator_node)
+    graph.add_node("rule_classifier", graph_node("rule_classifier", rule_classifier_node))
+    graph.add_node("classifier", graph_node("classifier", classify_node, aclassify_node))
+    graph.add_node("food_parser", graph_node("food_parser", food_parser_node, afood_parser_node))
+    graph.add_node("exercise_parser", graph_node("exercise_parser", exercise_parser_node, aexercise_parser_node))
+    graph.add_node("mixed_parser", graph_node("mixed_parser", mixed_parser_node, amixed_parser_node))
+    graph.add_node("calculator", graph_node("calculator", calculator_node))
 
-    graph.set_entry_point("classifier")
+    add_local_parser(graph, "rule_classifier")
 
+    # Confident rule verdicts skip the LLM classifier
+    graph.add_conditional_edges(
+        "rule_classifier",
+        route_after_rules,
+        {
+            "food": "food_parser",
+            "exercise": "exercise_parser",
+            "mixed": "mixed_parser",
+            "unsure": "classifier",
+        },
+    )
     graph.add_conditional_edges(
         "classifier",
         route_by_intent,
         {
             "food": "food_parser",
             "exercise": "exercise_parser",
-            "mixed": "food_parser",
+            "mixed": "mixed_parser",
         },
     )
 
+    graph.add_edge("food_parser", "calculator")
+    graph.add_edge("exercise_parser", "calculator")
+    graph.add_edge("mixed_parser", "calculator")
+
+    return graph.compile()
+
+
+def build_single_pass_graph():
+    graph = StateGraph(LLMState)
+
+    graph.add_node("combined_parser", graph_node("combined_parser", combined_parser_node, acombined_parser_node))
+    # Only reached with an intent hint
+    graph.add_node("food_parser", graph_node("food_parser", food_parser_node, afood_parser_node))
+    graph.add_node("exercise_parser", graph_node("exercise_parser", exercise_parser_node, aexercise_parser_node))
+    graph.add_node("calculator", graph_node("calculator", calculator_node))
+
+    add_local_parser(graph, "combined_parser")
+    graph.add_edge("combined_parser", "calculator")
     graph.add_edge("food_parser", "calculator")
     graph.add_edge("exercise_parser", "calculator")
 
-    return graph.compile()
\ No newline at end of file
+    return graph.compile()
@@ -0,0 +1,223 @@
+"""
+Shared HTTP connection pool for the LLM provider.
+Every node's ChatGroq client sends through one keep-alive pool per process
+(HTTP/2 when h2 is installed), so TCP/TLS handshakes are paid once per
+connection rather than per client, and the startup hook can open
+connections before the first request. Connection opens and TLS handshakes
+are counted through httpcore's trace extension.
+"""
+import asyncio
+import importlib.util
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Same default the groq SDK uses
+GROQ_BASE_URL = "https://api.groq.com"
+
+
+class PoolStats:
+    """Request and connection counters shared by the sync and async transports."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.errors = 0
+        self.connects = 0
+        self.tls_handshakes = 0
+
+    def begin(self):
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def end(self, failed: bool):
+        with self._lock:
+            self.in_flight -= 1
+            self.errors += failed
+
+    def trace(self, event: str):
+        if event == "connection.connect_tcp.complete":
+            with self._lock:
+                self.connects += 1
+        elif event == "connection.start_tls.complete":
+            with self._lock:
+                self.tls_handshakes += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            completed = self.requests - self.in_flight - self.errors
+            return {
+                "requests": self.requests,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "errors": self.errors,
+                "connects": self.connects,
+                "tls_handshakes": self.tls_handshakes,
+                # Share of completed requests that went out on an already open connection
+                "reuse_ratio": round(max(0.0, 1 - self.connects / completed), 4) if completed else None,
+            }
+
+
+def _connections(transport) -> Dict[str, int]:
+    # httpx keeps its httpcore pool private; report what it exposes, if anything
+    pool = getattr(transport, "_pool", None)
+    connections = list(getattr(pool, "connections", []))
+    idle = sum(1 for c in connections if c.is_idle())
+    return {"open": len(connections), "idle": idle, "active": len(connections) - idle}
+
+
+class _Transport(httpx.HTTPTransport):
+    def __init__(self, stats: PoolStats, **kwargs):
+        super().__init__(**kwargs)
+        self.stats = stats
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.extensions["trace"] = lambda event, info: self.stats.trace(event)
+        self.stats.begin()
+        failed = True
+        try:
+            response = super().handle_request(request)
+            failed = False
+            return response
+        finally:
+            self.stats.end(failed)
+
+
+class _AsyncTransport(httpx.AsyncHTTPTransport):
+    def __init__(self, stats: PoolStats, **kwargs):
+        super().__init__(**kwargs)
+        self.stats = stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        async def trace(event, info):
+            self.stats.trace(event)
+
+        request.extensions["trace"] = trace
+        self.stats.begin()
+        failed = True
+        try:
+            response = await super().handle_async_request(request)
+            failed = False
+            return response
+        finally:
+            self.stats.end(failed)
+
+
+class HTTPPool:
+    """
+    One sync and one async httpx client over tuned keep-alive pools.
+    The async client belongs to the event loop that first uses it (the
+    server's), which is also where warm() must run.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive: int = 20,
+        keepalive_expiry: float = 120.0,
+        http2: Optional[bool] = None,
+        base_url: str = GROQ_BASE_URL,
+    ):
+        h2_installed = importlib.util.find_spec("h2") is not None
+        if http2 and not h2_installed:
+            logger.warning("LLM_HTTP2 requested but the h2 package is not installed; using HTTP/1.1")
+        self.http2 = h2_installed if http2 is None else bool(http2 and h2_installed)
+        self.base_url = base_url.rstrip("/")
+
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.limits = limits
+        self.counters = PoolStats()
+        self._transport = _Transport(self.counters, limits=limits, http2=self.http2)
+        self._async_transport = _AsyncTransport(self.counters, limits=limits, http2=self.http2)
+        self.client = httpx.Client(transport=self._transport)
+        self.async_client = httpx.AsyncClient(transport=self._async_transport)
+
+    async def warm(self, connections: int = 2, timeout: float = 5.0) -> int:
+        """
+        Open up to `connections` keep-alive connections to the provider with
+        cheap authenticated GETs. Returns how many completed; failures are
+        only logged, since the first real request simply opens its own.
+        Skipped without GROQ_API_KEY: an empty bearer token is not a valid header.
+        """
+        api_key = os.getenv("GROQ_API_KEY")
+        if not api_key:
+            logger.info("LLM connection warm-up skipped: GROQ_API_KEY is not set")
+            return 0
+
+        headers = {"Authorization": f"Bearer {api_key}"}
+        url = f"{self.base_url}/openai/v1/models"
+        results = await asyncio.gather(
+            *(self.async_client.get(url, headers=headers, timeout=timeout) for _ in range(connections)),
+            return_exceptions=True,
+        )
+        failures = [r for r in results if isinstance(r, Exception)]
+        if failures:
+            logger.warning("LLM connection warm-up: %d of %d failed (%r)", len(failures), connections, failures[0])
+        return connections - len(failures)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive": self.limits.max_keepalive_connections,
+            "keepalive_expiry_seconds": self.limits.keepalive_expiry,
+            **self.counters.snapshot(),
+            "sync_connections": _connections(self._transport),
+            "async_connections": _connections(self._async_transport),
+        }
+
+
+_http_pool: Optional[HTTPPool] = None
+_lock = threading.Lock()
+
+
+def get_http_pool() -> Optional[HTTPPool]:
+    """
+    Get or initialize the process-wide provider connection pool.
+    Returns None if LLM_HTTP_POOL_ENABLED=false (each client then keeps its own).
+    """
+    global _http_pool
+
+    if os.getenv("LLM_HTTP_POOL_ENABLED", "true").lower() != "true":
+        return None
+
+    with _lock:
+        if _http_pool is None:
+            http2 = os.getenv("LLM_HTTP2", "auto").lower()
+            _http_pool = HTTPPool(
+                max_connections=int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100")),
+                max_keepalive=int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "20")),
+                keepalive_expiry=float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS", "120")),
+                http2=None if http2 == "auto" else http2 == "true",
+                base_url=os.getenv("GROQ_BASE_URL") or GROQ_BASE_URL,
+            )
+
+    return _http_pool
+
+
+def http_pool_stats() -> Optional[Dict[str, Any]]:
+    return _http_pool.stats() if _http_pool is not None else None
+
+
+async def warm_connections() -> Optional[str]:
+    """Startup hook: open LLM_HTTP_WARM_CONNECTIONS connections on the serving loop."""
+    if os.getenv("LLM_BACKEND", "groq").lower() == "replay":
+        return None
+    pool = get_http_pool()
+    if pool is None:
+        return None
+    count = int(os.getenv("LLM_HTTP_WARM_CONNECTIONS", "2"))
+    return f"{await pool.warm(count)} of {count} connections open"
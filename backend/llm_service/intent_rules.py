@@ -0,0 +1,232 @@
+"""
+Rule-based intent pre-classifier.
+Scores food and exercise evidence in an input (verbs, meal words, known
+foods, distances, reps, durations) and turns it into an intent with a
+confidence. Confident verdicts route straight to a parser; the rest go to
+the LLM classifier, which the verdict is compared against (shadow mode)
+so the threshold can be tuned from /llm/stats.
+"""
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from llm_service.cache import normalize_input
+from llm_service.local_parser import lookup_food
+
+RULE_MODES = ("off", "shadow", "on")
+
+FOOD_VERBS = {
+    "ate", "eat", "eaten", "eating", "had", "have", "having", "drank", "drink",
+    "drinking", "snacked", "consumed", "munched",
+}
+MEAL_WORDS = {"breakfast", "brunch", "lunch", "dinner", "supper", "snack", "meal", "dessert"}
+# Common foods beyond the nutrition table (which lookup_food already covers)
+FOOD_WORDS = {
+    "burger", "pizza", "sandwich", "salad", "soup", "curry", "fries", "steak", "chips",
+    "cereal", "smoothie", "shake", "taco", "burrito", "sushi", "noodles", "cake",
+    "cookie", "biscuit", "chocolate", "juice", "soda", "wine", "latte", "cappuccino",
+    "bagel", "muffin", "pancake", "waffle", "donut", "icecream", "ice cream",
+    "biryani", "roti", "naan", "paratha", "dosa", "samosa", "omelette", "omelet",
+}
+
+EXERCISE_VERBS = {
+    "ran", "run", "running", "jogged", "jog", "jogging", "walked", "walk", "walking",
+    "cycled", "cycling", "biked", "bike", "biking", "swam", "swim", "swimming",
+    "hiked", "hike", "hiking", "rowed", "rowing", "lifted", "lifting", "trained",
+    "training", "stretched", "stretching", "danced", "dancing", "climbed", "climbing",
+    "sprinted", "exercised", "worked out", "work out", "played",
+}
+EXERCISE_WORDS = {
+    "workout", "gym", "yoga", "pilates", "hiit", "cardio", "crossfit", "squats", "squat",
+    "pushups", "push ups", "pullups", "pull ups", "situps", "sit ups", "crunches",
+    "burpees", "plank", "deadlifts", "deadlift", "bench press", "treadmill", "elliptical",
+    "zumba", "spinning", "marathon", "laps", "tennis", "football", "soccer", "basketball",
+    "badminton", "cricket", "volleyball", "boxing", "weights", "jumping jacks", "skipping",
+}
+
+_FOOD_AMOUNT_RE = re.compile(
+    r"\b\d+(?:\.\d+)? (?:g|gm|gms|grams?|kg|ml|l|oz|cups?|tbsp|tsp|slices?|bowls?|plates?|glass(?:es)?)\b"
+)
+_DISTANCE_RE = re.compile(
+    r"\b\d+(?:\.\d+)? (?:km|kms|k|kilometers?|kilometres?|mi|miles?|steps|laps)\b"
+)
+_REPS_RE = re.compile(r"\b\d+ (?:reps?|sets?)\b|\b\d+ x ?\d+\b")
+_DURATION_RE = re.compile(r"\b\d+(?:\.\d+)? (?:min|mins|minutes?|hr|hrs|hours?)\b")
+
+# Evidence score -> confidence when only one side has evidence
+_CONFIDENCE_BY_SCORE = (0.0, 0.6, 0.8, 0.9)
+CONFIDENCE_MAX = 0.95
+# Confidence lost per point of evidence for the other intent
+CONFLICT_PENALTY = 0.2
+
+
+@dataclass
+class RuleVerdict:
+    intent: Optional[str]       # None when there is no usable evidence
+    confidence: float
+    food_score: int
+    exercise_score: int
+
+
+def _confidence(score: int) -> float:
+    return _CONFIDENCE_BY_SCORE[score] if score < len(_CONFIDENCE_BY_SCORE) else CONFIDENCE_MAX
+
+
+def score_evidence(text: str) -> Dict[str, int]:
+    normalized = normalize_input(text)
+    tokens = normalized.split()
+    food = exercise = 0
+    food_verb = meal = exercise_verb = False
+    foods = set()
+
+    # Greedy longest match first, so "chicken breast" counts once, not twice
+    i = 0
+    while i < len(tokens):
+        for n in range(min(3, len(tokens) - i), 0, -1):
+            phrase = " ".join(tokens[i:i + n])
+            if phrase in EXERCISE_VERBS:
+                exercise_verb = True
+            elif phrase in EXERCISE_WORDS:
+                exercise += 2
+            elif phrase in FOOD_VERBS:
+                food_verb = True
+            elif phrase in MEAL_WORDS:
+                meal = True
+            elif phrase in FOOD_WORDS or (not phrase[0].isdigit() and lookup_food(phrase)):
+                foods.add(lookup_food(phrase) or phrase)
+            else:
+                continue
+            i += n
+            break
+        else:
+            i += 1
+
+    food += 2 * len(foods) + food_verb + meal + bool(_FOOD_AMOUNT_RE.search(normalized))
+    exercise += 2 * exercise_verb + 2 * bool(_DISTANCE_RE.search(normalized))
+    exercise += 2 * bool(_REPS_RE.search(normalized)) + bool(_DURATION_RE.search(normalized))
+    return {"food": food, "exercise": exercise}
+
+
+def classify_by_rules(text: str) -> RuleVerdict:
+    """Intent and confidence from lexicon/regex evidence alone."""
+    scores = score_evidence(text)
+    food, exercise = scores["food"], scores["exercise"]
+
+    if food >= 2 and exercise >= 2:
+        return RuleVerdict("mixed", min(_confidence(food), _confidence(exercise)), food, exercise)
+    if food == exercise:
+        return RuleVerdict(None, 0.0, food, exercise)
+
+    intent = "food" if food > exercise else "exercise"
+    dominant, other = max(food, exercise), min(food, exercise)
+    confidence = max(0.0, _confidence(dominant) - CONFLICT_PENALTY * other)
+    return RuleVerdict(intent, round(confidence, 2), food, exercise)
+
+
+class RuleClassifier:
+    """
+    Routes confident rule verdicts (mode "on") and tracks how often the
+    rules agree with the LLM classifier on the inputs that reach it.
+    """
+
+    def __init__(self, mode: str = "shadow", min_confidence: float = 0.9):
+        if mode not in RULE_MODES:
+            raise ValueError(f"Unknown rule classifier mode {mode!r}, expected one of {RULE_MODES}")
+        self.mode = mode
+        self.min_confidence = min_confidence
+
+        self._lock = threading.Lock()
+        self.decided = 0
+        self.deferred = 0
+        self.no_guess = 0
+        self.hints = {"accepted": 0, "overridden": 0}
+        self._by_confidence: Dict[float, Dict[str, int]] = {}
+        self._disagreements: Dict[str, int] = {}
+
+    def decide(self, text: str) -> Optional[RuleVerdict]:
+        """The verdict to route on, or None to defer to the LLM."""
+        verdict = classify_by_rules(text)
+        confident = (
+            self.mode == "on" and verdict.intent is not None
+            and verdict.confidence >= self.min_confidence
+        )
+        with self._lock:
+            if confident:
+                self.decided += 1
+            else:
+                self.deferred += 1
+        return verdict if confident else None
+
+    def check_hint(self, text: str, hint: str) -> Optional[str]:
+        """
+        A client intent hint (the UI tab), or None when the rules confidently
+        disagree, e.g. a meal typed on the workout tab. Applies in every mode.
+        """
+        verdict = classify_by_rules(text)
+        overridden = (
+            verdict.intent not in (None, hint)
+            and verdict.confidence >= self.min_confidence
+        )
+        with self._lock:
+            self.hints["overridden" if overridden else "accepted"] += 1
+        return None if overridden else hint
+
+    def observe(self, text: str, llm_intent: str):
+        """Shadow comparison of the rule verdict with the LLM's answer."""
+        verdict = classify_by_rules(text)
+        with self._lock:
+            if verdict.intent is None:
+                self.no_guess += 1
+                return
+            bucket = self._by_confidence.setdefault(verdict.confidence, {"compared": 0, "agreed": 0})
+            bucket["compared"] += 1
+            if verdict.intent == llm_intent:
+                bucket["agreed"] += 1
+            else:
+                key = f"{verdict.intent}->{llm_intent}"
+                self._disagreements[key] = self._disagreements.get(key, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            compared = sum(b["compared"] for b in self._by_confidence.values())
+            agreed = sum(b["agreed"] for b in self._by_confidence.values())
+            return {
+                "mode": self.mode,
+                "min_confidence": self.min_confidence,
+                "decided": self.decided,
+                "deferred": self.deferred,
+                "no_guess": self.no_guess,
+                "hints": dict(self.hints),
+                "compared": compared,
+                "agreement": round(agreed / compared, 4) if compared else None,
+                "by_confidence": {
+                    f"{confidence:g}": dict(bucket, agreement=round(bucket["agreed"] / bucket["compared"], 4))
+                    for confidence, bucket in sorted(self._by_confidence.items())
+                },
+                "disagreements": dict(sorted(self._disagreements.items())),
+            }
+
+
+_rule_classifier: Optional[RuleClassifier] = None
+
+
+def get_rule_classifier() -> Optional[RuleClassifier]:
+    """
+    Get or initialize the process-wide rule classifier.
+    LLM_RULE_CLASSIFIER_MODE: off (None), shadow (default: compare only) or on (route).
+    """
+    global _rule_classifier
+
+    mode = os.getenv("LLM_RULE_CLASSIFIER_MODE", "shadow").lower()
+    if mode == "off":
+        return None
+
+    if _rule_classifier is None:
+        _rule_classifier = RuleClassifier(
+            mode=mode,
+            min_confidence=float(os.getenv("LLM_RULE_CLASSIFIER_MIN_CONFIDENCE", "0.9")),
+        )
+
+    return _rule_classifier
@@ -0,0 +1,194 @@
+"""
+Item-level nutrition cache for the food parser.
+Inputs are split into item phrases ("2 eggs", "200g rice"); every item the
+LLM returns is stored per unit of the phrase's amount, so a later "3 eggs"
+is answered by scaling what was learned from "2 eggs". Only phrases the
+cache cannot answer are sent to the LLM, and the results are merged back
+into the usual parsed_data/nutrition shape.
+"""
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from llm_service.cache import ResultCache
+from llm_service.food_grammar import FoodPhrase, food_key, parse_phrase, split_items
+from llm_service.local_parser import NUTRIENT_KEYS
+
+# Amount slot for phrases without an explicit unit: "2 eggs" (count) vs "eggs" (one serving)
+COUNT = "count"
+SERVING = "serving"
+
+_DIGIT_RE = re.compile(r"\d")
+
+
+def _number(value) -> Optional[float]:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def phrase_key(phrase: FoodPhrase) -> Optional[str]:
+    """Cache key for a phrase's food and amount slot; None if the name is ambiguous."""
+    # "ran 5k", "2 eggs 1 toast": numbers left in the name mean the grammar did not split it
+    if _DIGIT_RE.search(phrase.name):
+        return None
+    slot = phrase.unit or (COUNT if phrase.quantity is not None else SERVING)
+    return f"{food_key(phrase.name)}|{slot}"
+
+
+def phrase_amount(phrase: FoodPhrase) -> float:
+    return phrase.quantity if phrase.quantity is not None else 1.0
+
+
+@dataclass
+class ItemPlan:
+    """Which phrases of an input the cache answered and which need the LLM."""
+    text: str
+    phrases: List[FoodPhrase]
+    known: Dict[int, Dict] = field(default_factory=dict)   # phrase index -> item
+
+    @property
+    def unknown(self) -> List[int]:
+        return [i for i in range(len(self.phrases)) if i not in self.known]
+
+    @property
+    def complete(self) -> bool:
+        return not self.unknown
+
+    @property
+    def llm_input(self) -> str:
+        """Prompt input for the unknown phrases (the original text if nothing was known)."""
+        if not self.known:
+            return self.text
+        return ", ".join(self.phrases[i].text for i in self.unknown)
+
+    def merge(self, llm_items: List[Dict]) -> List[Dict]:
+        """Known items in input order, with the LLM's items where the first unknown phrase was."""
+        items, inserted = [], False
+        for i in range(len(self.phrases)):
+            if i in self.known:
+                items.append(self.known[i])
+            elif not inserted:
+                items.extend(llm_items)
+                inserted = True
+        if not inserted:
+            items.extend(llm_items)
+        return items
+
+
+class ItemCache:
+    """Per-food nutrition normalized to one unit of amount, scaled on lookup."""
+
+    def __init__(self, min_confidence: float = 0.6, **cache_kwargs):
+        self.min_confidence = min_confidence
+        self._cache = ResultCache(**cache_kwargs)
+        self.learned = 0
+
+    def plan(self, text: str) -> Optional[ItemPlan]:
+        """Split text into phrases and answer what the cache can; None if nothing parses."""
+        phrases = [p for p in map(parse_phrase, split_items(text)) if p is not None]
+        if not phrases:
+            return None
+
+        plan = ItemPlan(text=text, phrases=phrases)
+        for i, phrase in enumerate(phrases):
+            item = self.lookup(phrase)
+            if item is not None:
+                plan.known[i] = item
+        return plan
+
+    def lookup(self, phrase: FoodPhrase) -> Optional[Dict]:
+        key = phrase_key(phrase)
+        amount = phrase_amount(phrase)
+        if key is None or amount <= 0:
+            return None
+
+        template = self._cache.get(key)
+        if template is None:
+            return None
+        return scale_item(template, amount)
+
+    def learn(self, plan: ItemPlan, llm_items: List[Dict]) -> None:
+        """Store the LLM's items for the plan's unknown phrases, per unit of amount."""
+        phrases = [plan.phrases[i] for i in plan.unknown]
+
+        # Pair by name, never by position: the LLM may reorder, merge or
+        # split items, and a wrong pair would teach one food another's nutrition
+        by_name: Dict[str, List[Dict]] = {}
+        for item in llm_items:
+            by_name.setdefault(food_key(item.get("name") or ""), []).append(item)
+
+        pairs = []
+        for phrase in phrases:
+            matches = next((by_name[name] for name in phrase_names(phrase) if by_name.get(name)), None)
+            if matches:
+                pairs.append((phrase, matches.pop(0)))
+
+        for phrase, item in pairs:
+            key = phrase_key(phrase)
+            template = self._template(item, phrase_amount(phrase))
+            if key is not None and template is not None:
+                self._cache.set(key, template)
+                self.learned += 1
+
+    def _template(self, item: Dict, amount: float) -> Optional[Dict]:
+        confidence = _number(item.get("confidence"))
+        if confidence is not None and confidence < self.min_confidence:
+            return None
+
+        quantity = _number(item.get("quantity"))
+        calories = _number(item.get("calories_kcal"))
+        if amount <= 0 or not quantity or quantity <= 0 or calories is None:
+            return None
+
+        template = dict(item, quantity=quantity / amount)
+        for nutrient in NUTRIENT_KEYS:
+            value = _number(item.get(nutrient))
+            template[nutrient] = value / amount if value is not None else 0
+        return template
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> Dict:
+        return dict(self._cache.stats(), learned=self.learned)
+
+
+def phrase_names(phrase: FoodPhrase) -> List[str]:
+    """Item names the phrase may come back as: as written, or without its preparation."""
+    name = food_key(phrase.name)
+    names = [name]
+    if phrase.preparation:
+        bare = " ".join(word for word in name.split() if word != phrase.preparation)
+        if bare and bare != name:
+            names.append(bare)
+    return names
+
+
+def scale_item(template: Dict, amount: float) -> Dict:
+    item = dict(template, quantity=round(template["quantity"] * amount, 2))
+    for nutrient in NUTRIENT_KEYS:
+        item[nutrient] = round(template[nutrient] * amount, 1)
+    return item
+
+
+_item_cache: Optional[ItemCache] = None
+
+
+def get_item_cache() -> Optional[ItemCache]:
+    """
+    Get or initialize the process-wide item cache.
+    Returns None when disabled via LLM_ITEM_CACHE_ENABLED=false.
+    """
+    global _item_cache
+
+    if os.getenv("LLM_ITEM_CACHE_ENABLED", "true").lower() != "true":
+        return None
+
+    if _item_cache is None:
+        _item_cache = ItemCache(
+            min_confidence=float(os.getenv("LLM_ITEM_CACHE_MIN_CONFIDENCE", "0.6")),
+            max_entries=int(os.getenv("LLM_ITEM_CACHE_MAX_ENTRIES", "8192")),
+            ttl_seconds=float(os.getenv("LLM_CACHE_TTL_SECONDS", str(6 * 3600))),
+        )
+
+    return _item_cache
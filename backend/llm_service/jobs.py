@@ -0,0 +1,429 @@
+"""
+Asynchronous AI logging jobs.
+POST /llm/log/jobs answers 202 with a job id straight away; a pool of worker
+tasks on the serving loop runs the same recall -> LLM -> log pipeline as
+/llm/log, and clients poll or subscribe over a WebSocket for the result, so
+a slow provider no longer trips mobile HTTP timeouts (and their retries).
+Jobs live in memory; with LLM_JOB_STORE=db they are also kept in the
+log_jobs table, so polling works from any process and queued jobs survive
+a restart (requeueing on startup assumes one serving process per database).
+"""
+import asyncio
+import logging
+import math
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
+
+from database.database import SessionLocal
+from llm_service.models import LogJob
+
+logger = logging.getLogger(__name__)
+
+JOB_STORES = ("memory", "db")
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+FINISHED = (DONE, FAILED)
+
+# Runs one job: (user_id, text) -> {"llm_result": ..., "daily_nutrition": ...}
+JobHandler = Callable[[int, str], Awaitable[Dict[str, Any]]]
+
+
+class JobNotFoundError(HTTPException):
+    """404 for unknown, expired or other users' jobs."""
+
+    def __init__(self, job_id: str):
+        super().__init__(status.HTTP_404_NOT_FOUND, f"Job {job_id} not found")
+
+
+class JobQueueFullError(HTTPException):
+    """429 when the pending-job limit is reached."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many AI logging jobs pending, please retry shortly",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+
+@dataclass
+class Job:
+    id: str
+    user_id: int
+    text: str
+    idempotency_key: Optional[str] = None
+    status: str = QUEUED
+    result: Optional[Dict[str, Any]] = None     # {"llm_result", "daily_nutrition"}
+    error: Optional[Dict[str, Any]] = None      # {"status", "detail"}
+    created_at: datetime = field(default_factory=datetime.now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    finished: asyncio.Event = field(default_factory=asyncio.Event, repr=False, compare=False)
+
+    def payload(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "llm_result": (self.result or {}).get("llm_result"),
+            "daily_nutrition": (self.result or {}).get("daily_nutrition"),
+            "error": self.error,
+        }
+
+
+# ---------- Durable store ----------
+def _job_from_row(row: LogJob) -> Job:
+    job = Job(
+        id=row.id,
+        user_id=row.user_id,
+        text=row.text,
+        idempotency_key=row.idempotency_key,
+        status=row.status,
+        result=row.result,
+        error=row.error,
+        created_at=row.created_at,
+        started_at=row.started_at,
+        finished_at=row.finished_at,
+    )
+    if job.status in FINISHED:
+        job.finished.set()
+    return job
+
+
+class DBJobStore:
+    """Mirrors jobs into the log_jobs table (each call uses its own session)."""
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+
+    def _run(self, fn):
+        db = self.session_factory()
+        try:
+            result = fn(db)
+            db.commit()
+            return result
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def save(self, job: Job) -> Job:
+        """
+        Store job. A new job whose Idempotency-Key another submit stored
+        first is not saved; that job is returned instead.
+        """
+        def save(db):
+            db.merge(LogJob(
+                id=job.id,
+                user_id=job.user_id,
+                text=job.text,
+                idempotency_key=job.idempotency_key,
+                status=job.status,
+                result=job.result,
+                error=job.error,
+                created_at=job.created_at,
+                started_at=job.started_at,
+                finished_at=job.finished_at,
+            ))
+        try:
+            self._run(save)
+        except IntegrityError:
+            existing = self.find(job.user_id, job.idempotency_key) if job.idempotency_key else None
+            if existing is None:
+                raise
+            return existing
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        def get(db):
+            row = db.get(LogJob, job_id)
+            return _job_from_row(row) if row else None
+        return self._run(get)
+
+    def find(self, user_id: int, idempotency_key: str) -> Optional[Job]:
+        def find(db):
+            row = db.query(LogJob).filter_by(user_id=user_id, idempotency_key=idempotency_key).first()
+            return _job_from_row(row) if row else None
+        return self._run(find)
+
+    def recover(self, retention_seconds: float) -> list:
+        """
+        Queued jobs to run again after a restart. Jobs that were running are
+        failed rather than rerun: their log may already have been written.
+        Finished jobs past retention are deleted.
+        """
+        def recover(db):
+            now = datetime.now()
+            db.query(LogJob).filter(
+                LogJob.status.in_(FINISHED),
+                LogJob.finished_at < now - timedelta(seconds=retention_seconds),
+            ).delete(synchronize_session=False)
+            db.query(LogJob).filter_by(status=RUNNING).update({
+                "status": FAILED,
+                "finished_at": now,
+                "error": {"status": 500, "detail": "Interrupted by a restart; check today's log before retrying"},
+            }, synchronize_session=False)
+            rows = db.query(LogJob).filter_by(status=QUEUED).order_by(LogJob.created_at).all()
+            return [_job_from_row(row) for row in rows]
+        return self._run(recover)
+
+
+# ---------- Queue ----------
+class JobQueue:
+    """
+    Bounded in-process queue drained by `workers` tasks on the serving loop.
+    Finished jobs are kept for `retention_seconds` for polling; a repeated
+    Idempotency-Key from the same user returns the original job.
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        max_pending: int = 1000,
+        retention_seconds: float = 900,
+        store: Optional[DBJobStore] = None,
+    ):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        self.store = store
+
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Job] = {}
+        self._keys: Dict[tuple, str] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: list = []
+        self._handler: Optional[JobHandler] = None
+
+        self.submitted = 0
+        self.deduplicated = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.running = 0
+        self._wait_total = 0.0
+        self._run_total = 0.0
+
+    # ----- lifecycle -----
+    async def start(self, handler: JobHandler):
+        """Start the workers on the running loop (idempotent) and requeue durable jobs."""
+        loop = asyncio.get_running_loop()
+        self._handler = handler
+        if self._loop is loop:
+            return
+        # A new loop (a restarted server, or a test client) gets its own queue and workers
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._tasks = [loop.create_task(self._work()) for _ in range(self.workers)]
+
+        if self.store is not None:
+            recovered = await run_in_threadpool(self.store.recover, self.retention_seconds)
+            for job in recovered:
+                self._track(job)
+                self._queue.put_nowait(job)
+            if recovered:
+                logger.info("Requeued %d AI logging jobs", len(recovered))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._loop = None
+
+    # ----- submit / read -----
+    async def submit(self, user_id: int, text: str, idempotency_key: Optional[str] = None) -> Job:
+        if self._queue is None:
+            raise RuntimeError("JobQueue.start() must run before submit()")
+        self._expire()
+
+        if idempotency_key:
+            existing = await self._find(user_id, idempotency_key)
+            if existing is not None:
+                with self._lock:
+                    self.deduplicated += 1
+                return existing
+
+        if self._queue.qsize() >= self.max_pending:
+            with self._lock:
+                self.rejected += 1
+            raise JobQueueFullError(self._retry_after())
+
+        job = Job(id=uuid.uuid4().hex, user_id=user_id, text=text, idempotency_key=idempotency_key)
+        if self.store is not None:
+            stored = await run_in_threadpool(self.store.save, job)
+            if stored is not job:
+                # A concurrent submit (or another process) won the key
+                with self._lock:
+                    self.deduplicated += 1
+                return stored
+        self._track(job)
+        with self._lock:
+            self.submitted += 1
+        self._queue.put_nowait(job)
+        return job
+
+    async def get(self, job_id: str, user_id: int) -> Job:
+        """The caller's job; other processes' jobs are read from the durable store."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None and self.store is not None:
+            job = await run_in_threadpool(self.store.get, job_id)
+        if job is None or job.user_id != user_id:
+            raise JobNotFoundError(job_id)
+        return job
+
+    async def wait(self, job_id: str, user_id: int, timeout: float, poll_interval: float = 1.0) -> Job:
+        """The job once finished, or as it stands after `timeout` seconds."""
+        job = await self.get(job_id, user_id)
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            local = self._jobs.get(job_id) is job
+        while job.status not in FINISHED and time.monotonic() < deadline:
+            remaining = deadline - time.monotonic()
+            if local:
+                try:
+                    await asyncio.wait_for(job.finished.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                # Running in another process: poll the durable store
+                await asyncio.sleep(min(poll_interval, remaining))
+                job = await self.get(job_id, user_id)
+        return job
+
+    # ----- internals -----
+    def _track(self, job: Job):
+        with self._lock:
+            self._jobs[job.id] = job
+            if job.idempotency_key:
+                self._keys[(job.user_id, job.idempotency_key)] = job.id
+
+    async def _find(self, user_id: int, idempotency_key: str) -> Optional[Job]:
+        with self._lock:
+            job_id = self._keys.get((user_id, idempotency_key))
+            job = self._jobs.get(job_id) if job_id else None
+        if job is None and self.store is not None:
+            job = await run_in_threadpool(self.store.find, user_id, idempotency_key)
+        return job
+
+    def _expire(self):
+        cutoff = datetime.now() - timedelta(seconds=self.retention_seconds)
+        with self._lock:
+            expired = [j for j in self._jobs.values() if j.finished_at is not None and j.finished_at < cutoff]
+            for job in expired:
+                del self._jobs[job.id]
+                self._keys.pop((job.user_id, job.idempotency_key), None)
+
+    def _retry_after(self) -> float:
+        with self._lock:
+            finished = self.completed + self.failed
+            average_run = self._run_total / finished if finished else 5.0
+        return average_run * self.max_pending / max(1, self.workers)
+
+    async def _work(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            except Exception:
+                logger.exception("AI logging job %s crashed", job.id)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job):
+        job.status = RUNNING
+        job.started_at = datetime.now()
+        with self._lock:
+            self.running += 1
+            self._wait_total += (job.started_at - job.created_at).total_seconds()
+        if self.store is not None:
+            await run_in_threadpool(self.store.save, job)
+
+        started = time.perf_counter()
+        try:
+            job.result = await self._handler(job.user_id, job.text)
+            job.status = DONE
+        except HTTPException as e:
+            job.error = {"status": e.status_code, "detail": e.detail}
+            job.status = FAILED
+        except Exception as e:
+            job.error = {"status": 500, "detail": f"Food log failed: {str(e)}"}
+            job.status = FAILED
+        job.finished_at = datetime.now()
+
+        with self._lock:
+            self.running -= 1
+            self._run_total += time.perf_counter() - started
+            if job.status == DONE:
+                self.completed += 1
+            else:
+                self.failed += 1
+        try:
+            if self.store is not None:
+                await run_in_threadpool(self.store.save, job)
+        finally:
+            job.finished.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            started = self.completed + self.failed + self.running
+            finished = self.completed + self.failed
+            return {
+                "store": "db" if self.store is not None else "memory",
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self._queue.qsize() if self._queue is not None else 0,
+                "running": self.running,
+                "submitted": self.submitted,
+                "deduplicated": self.deduplicated,
+                "rejected": self.rejected,
+                "completed": self.completed,
+                "failed": self.failed,
+                "tracked": len(self._jobs),
+                "avg_queue_wait_ms": round(1000 * self._wait_total / started, 1) if started else None,
+                "avg_run_ms": round(1000 * self._run_total / finished, 1) if finished else None,
+            }
+
+
+_job_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    """
+    Get or initialize the process-wide AI logging job queue.
+    LLM_JOB_STORE: memory (default) or db (durable, in the log_jobs table).
+    """
+    global _job_queue
+
+    if _job_queue is None:
+        store = os.getenv("LLM_JOB_STORE", "memory").lower()
+        if store not in JOB_STORES:
+            raise ValueError(f"Unknown LLM_JOB_STORE {store!r}, expected one of {JOB_STORES}")
+        _job_queue = JobQueue(
+            workers=int(os.getenv("LLM_JOB_WORKERS", "4")),
+            max_pending=int(os.getenv("LLM_JOB_MAX_PENDING", "1000")),
+            retention_seconds=float(os.getenv("LLM_JOB_RETENTION_SECONDS", "900")),
+            store=DBJobStore() if store == "db" else None,
+        )
+
+    return _job_queue
+
+
+def job_queue_stats() -> Optional[Dict[str, Any]]:
+    return _job_queue.stats() if _job_queue is not None else None
@@ -1,16 +1,140 @@
 import os
-from langchain_groq import ChatGroq
+import threading
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Optional
 
-_llm_instance = None  # singleton
+from llm_service.http_pool import get_http_pool
 
-def get_llm():
+LLM_BACKENDS = ("groq", "replay", "record")
+
+DEFAULT_MODEL = "llama-3.3-70b-versatile"
+SMALL_MODEL = "llama-3.1-8b-instant"
+
+# Per-node defaults on top of LLM_MODEL / LLM_ATTEMPT_TIMEOUT_SECONDS.
+# Classification answers with one word, so it runs on the small model with a
+# short output budget; the parsers need the large model's nutrition knowledge.
+# Timeouts bound the provider call only: the scheduler slot is taken outside
+# it (see llm_service.resilience), its wait capped by LLM_MAX_QUEUE_WAIT_SECONDS.
+NODE_DEFAULTS: Dict[str, Dict[str, Any]] = {
+    "classifier": {"model": SMALL_MODEL, "temperature": 0.0, "max_tokens": 64, "timeout": 8.0},
+    "classifier_batch": {"model": SMALL_MODEL, "temperature": 0.0, "max_tokens": 1024, "timeout": 10.0},
+    "food_parser": {},
+    "exercise_parser": {},
+    "combined_parser": {},
+}
+
+
+@dataclass(frozen=True)
+class LLMConfig:
+    """Model settings for one graph node."""
+    model: str
+    temperature: float = 0.1
+    max_tokens: Optional[int] = None
+    timeout: float = 20.0
+    # Provider JSON mode: the answer is always a syntactically valid object
+    json_mode: bool = True
+
+
+_llm_instance = None  # shared client (replay backend, or no node given)
+_clients: Dict[LLMConfig, Any] = {}  # one live client per distinct config
+_lock = threading.Lock()
+
+
+def get_llm_config(node: Optional[str] = None) -> LLMConfig:
+    """
+    Resolve a node's model settings. LLM_<NODE>_MODEL, _TEMPERATURE,
+    _MAX_TOKENS, _TIMEOUT_SECONDS and _JSON_MODE override NODE_DEFAULTS, which
+    override the global LLM_MODEL, LLM_ATTEMPT_TIMEOUT_SECONDS and LLM_JSON_MODE.
+    """
+    defaults = dict(
+        model=os.getenv("LLM_MODEL", DEFAULT_MODEL),
+        temperature=0.1,
+        max_tokens=None,
+        timeout=float(os.getenv("LLM_ATTEMPT_TIMEOUT_SECONDS", "20")),
+        json_mode=os.getenv("LLM_JSON_MODE", "true").lower() == "true",
+    )
+    if node is None:
+        return LLMConfig(**defaults)
+    if node not in NODE_DEFAULTS:
+        raise ValueError(f"Unknown LLM node {node!r}, expected one of {tuple(NODE_DEFAULTS)}")
+
+    defaults.update(NODE_DEFAULTS[node])
+    prefix = f"LLM_{node.upper()}_"
+    max_tokens = os.getenv(prefix + "MAX_TOKENS")
+    return LLMConfig(
+        model=os.getenv(prefix + "MODEL", defaults["model"]),
+        temperature=float(os.getenv(prefix + "TEMPERATURE", defaults["temperature"])),
+        max_tokens=(int(max_tokens) or None) if max_tokens is not None else defaults["max_tokens"],
+        timeout=float(os.getenv(prefix + "TIMEOUT_SECONDS", defaults["timeout"])),
+        json_mode=os.getenv(prefix + "JSON_MODE", str(defaults["json_mode"])).lower() == "true",
+    )
+
+
+def llm_registry() -> Dict[str, Dict[str, Any]]:
+    """Resolved settings of every node, for /llm/stats."""
+    return {node: vars(get_llm_config(node)) for node in NODE_DEFAULTS}
+
+
+def get_llm(node: Optional[str] = None, json_mode: Optional[bool] = None):
+    """
+    Get the LLM client for a graph node (or the default client); json_mode
+    overrides the node's setting (streaming calls pass False, the provider
+    does not stream in JSON mode). LLM_BACKEND selects:
+    - groq: the live Groq API (default), one client per distinct node config
+    - record: Groq, appending every call to LLM_REPLAY_FILE
+    - replay: offline responses from LLM_REPLAY_FILE with LLM_REPLAY_LATENCY,
+      shared by all nodes (recordings are keyed by prompt, not model)
+    """
     global _llm_instance
 
-    if _llm_instance is None:
-        _llm_instance = ChatGroq(
-            model="llama-3.3-70b-versatile",
-            temperature=0.1,
-            api_key=os.getenv("GROQ_API_KEY")
-        )
+    backend = os.getenv("LLM_BACKEND", "groq").lower()
+    if backend not in LLM_BACKENDS:
+        raise ValueError(f"Unknown LLM_BACKEND {backend!r}, expected one of {LLM_BACKENDS}")
+
+    replay_file = os.getenv("LLM_REPLAY_FILE", "llm_recordings.jsonl")
+
+    # Imported here: the replay and Groq stacks are slow to import and
+    # only needed once a node actually calls the LLM
+    from llm_service.replay import LatencyModel, RecordingLLM, ReplayLLM, load_recordings
+
+    if backend == "replay":
+        with _lock:
+            if _llm_instance is None:
+                _llm_instance = ReplayLLM(
+                    load_recordings(replay_file),
+                    latency=LatencyModel(os.getenv("LLM_REPLAY_LATENCY", "none")),
+                    default_response=os.getenv("LLM_REPLAY_DEFAULT_RESPONSE") or None,
+                )
+            return _llm_instance
+
+    config = get_llm_config(node)
+    if json_mode is not None:
+        config = replace(config, json_mode=json_mode)
+    with _lock:
+        client = _clients.get(config)
+        if client is None:
+            client = create_groq_llm(config)
+            if backend == "record":
+                client = RecordingLLM(client, replay_file)
+            _clients[config] = client
+        return client
+
+
+def create_groq_llm(config: Optional[LLMConfig] = None):
+    from langchain_groq import ChatGroq
 
-    return _llm_instance
\ No newline at end of file
+    config = config or get_llm_config()
+    # All node clients share one keep-alive pool (see llm_service.http_pool)
+    pool = get_http_pool()
+    return ChatGroq(
+        model=config.model,
+        temperature=config.temperature,
+        max_tokens=config.max_tokens,
+        api_key=os.getenv("GROQ_API_KEY"),
+        # Per-attempt timeout; retries are owned by llm_service.resilience
+        timeout=config.timeout,
+        max_retries=0,
+        http_client=pool.client if pool is not None else None,
+        http_async_client=pool.async_client if pool is not None else None,
+        model_kwargs={"response_format": {"type": "json_object"}} if config.json_mode else {},
+    )
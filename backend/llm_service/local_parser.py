@@ -0,0 +1,125 @@
+"""
+Deterministic fast-path food parser.
+Resolves common well-formed inputs ("3 eggs", "1 cup rice", "200g chicken breast")
+against the bundled nutrition table, producing the same parsed_data/nutrition
+shape as food_parser_node. Anything it cannot resolve with high confidence
+returns None and falls through to the LLM.
+"""
+import math
+import os
+from typing import Dict, List, Optional
+
+from llm_service.food_grammar import FoodPhrase, food_key, parse_phrase, split_items
+from llm_service.nutrition_table import NUTRITION_TABLE
+
+NUTRIENT_KEYS = ("calories_kcal", "protein_g", "carbs_g", "fat_g", "fiber_g")
+
+# Explicit weight/volume > household unit > assumed count
+CONFIDENCE_EXACT = 0.95
+CONFIDENCE_HOUSEHOLD_UNIT = 0.9
+CONFIDENCE_DEFAULT_QUANTITY = 0.85
+
+_ALIAS_INDEX = {
+    food_key(alias): name
+    for name, entry in NUTRITION_TABLE.items()
+    for alias in entry["aliases"] + [name]
+}
+
+
+def lookup_food(name: str) -> Optional[str]:
+    return _ALIAS_INDEX.get(food_key(name))
+
+
+def grams_for(entry: Dict, quantity: float, unit: str) -> Optional[float]:
+    if unit == "g":
+        return quantity
+    if unit == "ml":
+        density = entry["units"].get("ml")
+        return quantity * density if density else None
+
+    unit_grams = entry["units"].get(unit)
+    return quantity * unit_grams if unit_grams else None
+
+
+def resolve_phrase(phrase: FoodPhrase) -> Optional[Dict]:
+    """Resolve one parsed phrase to a food item dict, or None if unsure."""
+    name = lookup_food(phrase.name)
+    if name is None:
+        return None
+
+    entry = NUTRITION_TABLE[name]
+    quantity, unit = phrase.quantity, phrase.unit
+
+    if unit is None:
+        unit = entry["default_unit"]
+        if unit is None:
+            return None
+        confidence = CONFIDENCE_HOUSEHOLD_UNIT if quantity is not None else CONFIDENCE_DEFAULT_QUANTITY
+        quantity = 1.0 if quantity is None else quantity
+    else:
+        confidence = CONFIDENCE_EXACT if unit in ("g", "ml") else CONFIDENCE_HOUSEHOLD_UNIT
+
+    if quantity <= 0:
+        return None
+
+    grams = grams_for(entry, quantity, unit)
+    if grams is None:
+        return None
+
+    factor = grams / 100
+    item = {
+        "name": name,
+        "quantity": round(quantity, 2),
+        "unit": unit,
+        "preparation": phrase.preparation,
+    }
+    for key, per_100g in zip(NUTRIENT_KEYS, entry["per_100g"]):
+        item[key] = round(per_100g * factor, 1)
+    item["confidence"] = confidence
+
+    return item
+
+
+def sum_nutrition(items: List[Dict]) -> Dict:
+    # fsum: exact column sums, no float drift however many items are added
+    return {
+        key: round(math.fsum(item.get(key) or 0 for item in items), 1)
+        for key in NUTRIENT_KEYS
+    }
+
+
+def parse_locally(text: str, min_confidence: Optional[float] = None) -> Optional[Dict]:
+    """
+    Parse text without the LLM.
+    Returns {"intent", "parsed_data", "nutrition"} only if every phrase resolves
+    at or above min_confidence; otherwise None.
+    """
+    if min_confidence is None:
+        min_confidence = float(os.getenv("LLM_LOCAL_PARSER_MIN_CONFIDENCE", "0.85"))
+
+    phrases = split_items(text)
+    if not phrases:
+        return None
+
+    items = []
+    for raw in phrases:
+        phrase = parse_phrase(raw)
+        if phrase is None:
+            continue
+        item = resolve_phrase(phrase)
+        if item is None or item["confidence"] < min_confidence:
+            return None
+        items.append(item)
+
+    if not items:
+        return None
+
+    return {
+        "intent": "food",
+        "parsed_data": items,
+        "nutrition": sum_nutrition(items),
+    }
+
+
+def local_parser_enabled() -> bool:
+    return os.getenv("LLM_LOCAL_PARSER_ENABLED", "true").lower() == "true"
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, JSON, String, UniqueConstraint
+from sqlalchemy.sql import func
+
+from database.database import Base
+
+
+class LogJob(Base):
+    """An asynchronous AI logging job (kept only with LLM_JOB_STORE=db)."""
+    __tablename__ = "log_jobs"
+
+    id = Column(String(32), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    text = Column(String, nullable=False)
+    idempotency_key = Column(String)
+    status = Column(String(10), nullable=False)     # queued / running / done / failed
+
+    result = Column(JSON)                           # {llm_result, daily_nutrition}
+    error = Column(JSON)                            # {status, detail}
+
+    created_at = Column(DateTime, default=func.now())
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+    __table_args__ = (
+        Index("ix_log_jobs_status", "status"),
+        # One job per Idempotency-Key, even across concurrent submits and processes
+        UniqueConstraint("user_id", "idempotency_key", name="unique_user_job_key"),
+    )
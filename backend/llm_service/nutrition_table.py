@@ -0,0 +1,408 @@
+"""
+Bundled nutrition table for the local fast-path parser.
+
+Values are per 100 g of the food as usually eaten (cooked where relevant),
+rounded from USDA FoodData Central reference entries. "units" maps a
+household unit to its weight in grams; "ml" is the density for liquids.
+"default_unit" is used when the input gives a count without a unit
+("3 eggs"); foods without one need an explicit amount.
+"""
+
+# name: (calories_kcal, protein_g, carbs_g, fat_g, fiber_g) per 100 g,
+#       units, default_unit, aliases
+NUTRITION_TABLE = {
+    # ---------- Eggs & dairy ----------
+    "egg": {
+        "per_100g": (155, 13.0, 1.1, 11.0, 0),
+        "units": {"piece": 50},
+        "default_unit": "piece",
+        "aliases": ["egg", "boiled egg", "hard boiled egg", "soft boiled egg", "poached egg", "whole egg"],
+    },
+    "fried egg": {
+        "per_100g": (196, 13.6, 0.8, 14.8, 0),
+        "units": {"piece": 46},
+        "default_unit": "piece",
+        "aliases": ["fried egg", "sunny side up egg"],
+    },
+    "scrambled egg": {
+        "per_100g": (149, 10.0, 1.6, 11.0, 0),
+        "units": {"piece": 60, "cup": 220},
+        "default_unit": "piece",
+        "aliases": ["scrambled egg"],
+    },
+    "egg white": {
+        "per_100g": (52, 10.9, 0.7, 0.2, 0),
+        "units": {"piece": 33},
+        "default_unit": "piece",
+        "aliases": ["egg white", "boiled egg white"],
+    },
+    "milk": {
+        "per_100g": (61, 3.2, 4.8, 3.3, 0),
+        "units": {"cup": 244, "ml": 1.03, "tbsp": 15},
+        "default_unit": None,
+        "aliases": ["milk", "whole milk", "full cream milk"],
+    },
+    "skim milk": {
+        "per_100g": (34, 3.4, 5.0, 0.1, 0),
+        "units": {"cup": 245, "ml": 1.03},
+        "default_unit": None,
+        "aliases": ["skim milk", "skimmed milk", "low fat milk", "nonfat milk"],
+    },
+    "yogurt": {
+        "per_100g": (61, 3.5, 4.7, 3.3, 0),
+        "units": {"cup": 245, "bowl": 245, "tbsp": 15},
+        "default_unit": None,
+        "aliases": ["yogurt", "plain yogurt", "curd", "dahi", "yoghurt"],
+    },
+    "greek yogurt": {
+        "per_100g": (59, 10.0, 3.6, 0.4, 0),
+        "units": {"cup": 245, "bowl": 245, "tbsp": 15},
+        "default_unit": None,
+        "aliases": ["greek yogurt", "greek yoghurt"],
+    },
+    "cottage cheese": {
+        "per_100g": (84, 11.0, 4.3, 2.3, 0),
+        "units": {"cup": 226},
+        "default_unit": None,
+        "aliases": ["cottage cheese"],
+    },
+    "cheddar cheese": {
+        "per_100g": (403, 25.0, 1.3, 33.0, 0),
+        "units": {"slice": 28},
+        "default_unit": "slice",
+        "aliases": ["cheddar cheese", "cheddar", "cheese slice", "slice of cheese"],
+    },
+    "paneer": {
+        "per_100g": (265, 18.3, 1.2, 20.8, 0),
+        "units": {},
+        "default_unit": None,
+        "aliases": ["paneer"],
+    },
+    "butter": {
+        "per_100g": (717, 0.9, 0.1, 81.0, 0),
+        "units": {"tbsp": 14.2, "tsp": 4.7},
+        "default_unit": None,
+        "aliases": ["butter"],
+    },
+
+    # ---------- Grains & breads ----------
+    "white rice": {
+        "per_100g": (130, 2.7, 28.0, 0.3, 0.4),
+        "units": {"cup": 158, "bowl": 200, "plate": 300},
+        "default_unit": None,
+        "aliases": ["rice", "white rice", "cooked rice", "steamed rice", "boiled rice", "plain rice"],
+    },
+    "brown rice": {
+        "per_100g": (123, 2.7, 25.6, 1.0, 1.6),
+        "units": {"cup": 195, "bowl": 200, "plate": 300},
+        "default_unit": None,
+        "aliases": ["brown rice", "cooked brown rice"],
+    },
+    "white bread": {
+        "per_100g": (265, 9.0, 49.0, 3.2, 2.7),
+        "units": {"slice": 25, "piece": 25},
+        "default_unit": "slice",
+        "aliases": ["bread", "white bread", "bread slice", "slice of bread"],
+    },
+    "toast": {
+        "per_100g": (293, 9.0, 54.0, 4.0, 2.5),
+        "units": {"slice": 22, "piece": 22},
+        "default_unit": "slice",
+        "aliases": ["toast", "white toast", "toasted bread"],
+    },
+    "whole wheat bread": {
+        "per_100g": (247, 13.0, 41.0, 3.4, 7.0),
+        "units": {"slice": 32, "piece": 32},
+        "default_unit": "slice",
+        "aliases": ["whole wheat bread", "brown bread", "wheat bread", "whole grain bread", "whole wheat toast"],
+    },
+    "chapati": {
+        "per_100g": (297, 9.8, 46.0, 9.2, 4.9),
+        "units": {"piece": 40},
+        "default_unit": "piece",
+        "aliases": ["chapati", "chapatti", "roti", "phulka"],
+    },
+    "oats": {
+        "per_100g": (389, 16.9, 66.3, 6.9, 10.6),
+        "units": {"cup": 81, "tbsp": 5},
+        "default_unit": None,
+        "aliases": ["oats", "rolled oats", "dry oats"],
+    },
+    "oatmeal": {
+        "per_100g": (71, 2.5, 12.0, 1.5, 1.7),
+        "units": {"cup": 234, "bowl": 250},
+        "default_unit": None,
+        "aliases": ["oatmeal", "porridge", "cooked oats"],
+    },
+    "pasta": {
+        "per_100g": (158, 5.8, 30.9, 0.9, 1.8),
+        "units": {"cup": 140, "bowl": 200, "plate": 250},
+        "default_unit": None,
+        "aliases": ["pasta", "cooked pasta", "spaghetti", "penne", "macaroni"],
+    },
+    "corn flakes": {
+        "per_100g": (357, 7.5, 84.0, 0.4, 3.3),
+        "units": {"cup": 28, "bowl": 40},
+        "default_unit": None,
+        "aliases": ["corn flakes", "cornflakes"],
+    },
+    "granola": {
+        "per_100g": (471, 10.0, 64.0, 20.0, 5.0),
+        "units": {"cup": 122, "tbsp": 8},
+        "default_unit": None,
+        "aliases": ["granola"],
+    },
+    "idli": {
+        "per_100g": (130, 4.0, 27.0, 0.4, 1.0),
+        "units": {"piece": 30},
+        "default_unit": "piece",
+        "aliases": ["idli", "idly"],
+    },
+
+    # ---------- Protein ----------
+    "chicken breast": {
+        "per_100g": (165, 31.0, 0, 3.6, 0),
+        "units": {"piece": 170},
+        "default_unit": "piece",
+        "aliases": ["chicken breast", "grilled chicken breast", "grilled chicken", "boiled chicken breast",
+                    "baked chicken breast", "skinless chicken breast"],
+    },
+    "salmon": {
+        "per_100g": (206, 22.0, 0, 12.0, 0),
+        "units": {"piece": 154},
+        "default_unit": "piece",
+        "aliases": ["salmon", "grilled salmon", "baked salmon", "salmon fillet"],
+    },
+    "tuna": {
+        "per_100g": (116, 25.5, 0, 0.8, 0),
+        "units": {"cup": 154},
+        "default_unit": None,
+        "aliases": ["tuna", "canned tuna", "tuna in water"],
+    },
+    "ground beef": {
+        "per_100g": (250, 25.9, 0, 15.4, 0),
+        "units": {},
+        "default_unit": None,
+        "aliases": ["ground beef", "minced beef", "beef mince"],
+    },
+    "turkey breast": {
+        "per_100g": (135, 30.0, 0, 1.0, 0),
+        "units": {"slice": 28},
+        "default_unit": None,
+        "aliases": ["turkey breast", "roast turkey", "turkey"],
+    },
+    "bacon": {
+        "per_100g": (541, 37.0, 1.4, 42.0, 0),
+        "units": {"slice": 8, "piece": 8},
+        "default_unit": "slice",
+        "aliases": ["bacon", "bacon strip", "bacon rasher"],
+    },
+    "ham": {
+        "per_100g": (145, 21.0, 1.5, 5.5, 0),
+        "units": {"slice": 28},
+        "default_unit": "slice",
+        "aliases": ["ham", "sliced ham"],
+    },
+    "tofu": {
+        "per_100g": (144, 17.3, 2.8, 8.7, 2.3),
+        "units": {"cup": 252},
+        "default_unit": None,
+        "aliases": ["tofu", "firm tofu"],
+    },
+    "dal": {
+        "per_100g": (116, 9.0, 20.0, 0.4, 7.9),
+        "units": {"cup": 198, "bowl": 200},
+        "default_unit": None,
+        "aliases": ["dal", "daal", "dhal", "lentils", "cooked lentils", "lentil soup"],
+    },
+
+    # ---------- Fruit ----------
+    "banana": {
+        "per_100g": (89, 1.1, 22.8, 0.3, 2.6),
+        "units": {"piece": 118},
+        "default_unit": "piece",
+        "aliases": ["banana"],
+    },
+    "apple": {
+        "per_100g": (52, 0.3, 13.8, 0.2, 2.4),
+        "units": {"piece": 182},
+        "default_unit": "piece",
+        "aliases": ["apple"],
+    },
+    "orange": {
+        "per_100g": (47, 0.9, 11.8, 0.1, 2.4),
+        "units": {"piece": 131},
+        "default_unit": "piece",
+        "aliases": ["orange"],
+    },
+    "mango": {
+        "per_100g": (60, 0.8, 15.0, 0.4, 1.6),
+        "units": {"piece": 207, "cup": 165},
+        "default_unit": "piece",
+        "aliases": ["mango"],
+    },
+    "grapes": {
+        "per_100g": (69, 0.7, 18.0, 0.2, 0.9),
+        "units": {"cup": 151, "bowl": 151},
+        "default_unit": None,
+        "aliases": ["grapes", "grape"],
+    },
+    "strawberries": {
+        "per_100g": (32, 0.7, 7.7, 0.3, 2.0),
+        "units": {"cup": 152, "piece": 12},
+        "default_unit": "piece",
+        "aliases": ["strawberries", "strawberry"],
+    },
+    "blueberries": {
+        "per_100g": (57, 0.7, 14.5, 0.3, 2.4),
+        "units": {"cup": 148},
+        "default_unit": None,
+        "aliases": ["blueberries", "blueberry"],
+    },
+    "avocado": {
+        "per_100g": (160, 2.0, 8.5, 14.7, 6.7),
+        "units": {"piece": 150},
+        "default_unit": "piece",
+        "aliases": ["avocado"],
+    },
+
+    # ---------- Vegetables ----------
+    "potato": {
+        "per_100g": (87, 1.9, 20.0, 0.1, 1.8),
+        "units": {"piece": 150, "cup": 156},
+        "default_unit": "piece",
+        "aliases": ["potato", "boiled potato"],
+    },
+    "sweet potato": {
+        "per_100g": (90, 2.0, 20.7, 0.2, 3.3),
+        "units": {"piece": 130},
+        "default_unit": "piece",
+        "aliases": ["sweet potato", "baked sweet potato"],
+    },
+    "broccoli": {
+        "per_100g": (35, 2.4, 7.2, 0.4, 3.3),
+        "units": {"cup": 156},
+        "default_unit": None,
+        "aliases": ["broccoli", "steamed broccoli", "boiled broccoli"],
+    },
+    "spinach": {
+        "per_100g": (23, 3.0, 3.8, 0.3, 2.4),
+        "units": {"cup": 180},
+        "default_unit": None,
+        "aliases": ["spinach", "cooked spinach"],
+    },
+    "carrot": {
+        "per_100g": (41, 0.9, 9.6, 0.2, 2.8),
+        "units": {"piece": 61, "cup": 128},
+        "default_unit": "piece",
+        "aliases": ["carrot", "raw carrot"],
+    },
+    "cucumber": {
+        "per_100g": (15, 0.7, 3.6, 0.1, 0.5),
+        "units": {"piece": 300, "cup": 119},
+        "default_unit": "piece",
+        "aliases": ["cucumber"],
+    },
+    "tomato": {
+        "per_100g": (18, 0.9, 3.9, 0.2, 1.2),
+        "units": {"piece": 123, "cup": 180},
+        "default_unit": "piece",
+        "aliases": ["tomato"],
+    },
+
+    # ---------- Nuts, spreads & fats ----------
+    "almonds": {
+        "per_100g": (579, 21.0, 22.0, 50.0, 12.5),
+        "units": {"piece": 1.2, "cup": 143},
+        "default_unit": "piece",
+        "aliases": ["almonds", "almond"],
+    },
+    "cashews": {
+        "per_100g": (553, 18.0, 30.0, 44.0, 3.3),
+        "units": {"piece": 1.5, "cup": 137},
+        "default_unit": "piece",
+        "aliases": ["cashews", "cashew", "cashew nuts"],
+    },
+    "walnuts": {
+        "per_100g": (654, 15.2, 13.7, 65.2, 6.7),
+        "units": {"cup": 117},
+        "default_unit": None,
+        "aliases": ["walnuts", "walnut"],
+    },
+    "peanuts": {
+        "per_100g": (567, 25.8, 16.1, 49.2, 8.5),
+        "units": {"cup": 146},
+        "default_unit": None,
+        "aliases": ["peanuts", "peanut"],
+    },
+    "peanut butter": {
+        "per_100g": (588, 25.0, 20.0, 50.0, 6.0),
+        "units": {"tbsp": 16, "tsp": 5.3},
+        "default_unit": None,
+        "aliases": ["peanut butter"],
+    },
+    "olive oil": {
+        "per_100g": (884, 0, 0, 100.0, 0),
+        "units": {"tbsp": 13.5, "tsp": 4.5, "ml": 0.91},
+        "default_unit": None,
+        "aliases": ["olive oil"],
+    },
+    "sugar": {
+        "per_100g": (387, 0, 100.0, 0, 0),
+        "units": {"tsp": 4.2, "tbsp": 12.5},
+        "default_unit": None,
+        "aliases": ["sugar", "white sugar"],
+    },
+    "honey": {
+        "per_100g": (304, 0.3, 82.0, 0, 0.2),
+        "units": {"tsp": 7, "tbsp": 21},
+        "default_unit": None,
+        "aliases": ["honey"],
+    },
+
+    # ---------- Drinks ----------
+    "coffee": {
+        "per_100g": (1, 0.1, 0, 0, 0),
+        "units": {"cup": 237, "ml": 1.0},
+        "default_unit": "cup",
+        "aliases": ["coffee", "black coffee", "espresso", "americano"],
+    },
+    "tea": {
+        "per_100g": (1, 0, 0.3, 0, 0),
+        "units": {"cup": 237, "ml": 1.0},
+        "default_unit": "cup",
+        "aliases": ["tea", "black tea", "green tea"],
+    },
+    "orange juice": {
+        "per_100g": (45, 0.7, 10.4, 0.2, 0.2),
+        "units": {"cup": 248, "ml": 1.04},
+        "default_unit": None,
+        "aliases": ["orange juice", "oj"],
+    },
+    "cola": {
+        "per_100g": (42, 0, 10.6, 0, 0),
+        "units": {"ml": 1.04},
+        "default_unit": None,
+        "aliases": ["cola", "coke", "soda", "soft drink"],
+    },
+    "beer": {
+        "per_100g": (43, 0.5, 3.6, 0, 0),
+        "units": {"ml": 1.01},
+        "default_unit": None,
+        "aliases": ["beer"],
+    },
+    "water": {
+        "per_100g": (0, 0, 0, 0, 0),
+        "units": {"cup": 237, "ml": 1.0},
+        "default_unit": "cup",
+        "aliases": ["water"],
+    },
+
+    # ---------- Prepared foods ----------
+    "cheese pizza": {
+        "per_100g": (266, 11.0, 33.0, 10.0, 2.3),
+        "units": {"slice": 107},
+        "default_unit": "slice",
+        "aliases": ["pizza", "cheese pizza", "pizza slice", "margherita pizza"],
+    },
+}
@@ -0,0 +1,14 @@
+CLASSIFIER_BATCH_PROMPT = """
+You are a strict JSON API.
+
+Classify EACH numbered user input below into:
+- food
+- exercise
+- mixed
+
+Return ONLY valid JSON with exactly one result per input:
+{{ "results": [ {{ "id": 1, "type": "food" | "exercise" | "mixed" }} ] }}
+
+Inputs:
+{inputs}
+"""
@@ -38,3 +38,33 @@ Do not include markdown.
 Do not include code fences.
 
 """
+
+# LLM_PARSER_SCHEMA=compact: short keys (see llm_service.compact_schema)
+EXERCISE_PARSER_COMPACT_PROMPT = """
+You are a fitness activity extraction API.
+
+Extract ALL exercises from the user input.
+
+For each exercise return an object with these keys:
+- n: name (string)
+- min: duration in minutes (number or null)
+- km: distance in km (number or null)
+- i: intensity (low, moderate, high, or unknown)
+- kc: calories burned estimate (number or null)
+- c: confidence (0.0 to 1.0)
+
+If duration or distance is missing, estimate reasonably.
+
+Return ONLY valid JSON on a single line, in this format:
+
+{{"items":[{{"n":"","min":null,"km":null,"i":"","kc":null,"c":0.0}}]}}
+
+User input:
+{input}
+
+You must respond with ONLY valid JSON.
+Do not include any explanation.
+Do not include markdown.
+Do not include code fences.
+
+"""
@@ -59,4 +59,36 @@ Do not include any explanation.
 Do not include markdown.
 Do not include code fences.
 
-"""
\ No newline at end of file
+"""
+
+# LLM_PARSER_SCHEMA=compact: short keys, no totals (see llm_service.compact_schema)
+FOOD_PARSER_COMPACT_PROMPT = """
+You are a nutrition analysis API.
+
+Extract ALL food items from the user input and estimate their nutritional values.
+
+For each food item return an object with these keys:
+- n: name (string)
+- q: quantity (number)
+- u: unit (one of: g, ml, piece, cup, tbsp, tsp, slice, bowl, plate)
+- p: preparation (boiled, fried, grilled, raw, baked, etc. or null)
+- kc, pr, cb, ft, fb: calories (kcal), protein, carbs, fat and fiber (g),
+  as numbers for the given quantity, not per 100g
+- c: confidence (0.0 to 1.0)
+
+If quantity or unit is missing, make a reasonable estimate.
+Do not include totals.
+
+Return ONLY valid JSON on a single line, in this format:
+
+{{"items":[{{"n":"","q":0,"u":"","p":null,"kc":0,"pr":0,"cb":0,"ft":0,"fb":0,"c":0.0}}]}}
+
+User input:
+{input}
+
+You must respond with ONLY valid JSON.
+Do not include any explanation.
+Do not include markdown.
+Do not include code fences.
+
+"""
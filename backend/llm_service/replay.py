@@ -0,0 +1,223 @@
+"""
+Record/replay stand-ins for the LLM client.
+RecordingLLM wraps the real client and appends every prompt -> response pair
+to a JSONL file; ReplayLLM serves those pairs back offline with a synthetic
+latency distribution, so the AI logging path can be load-tested without
+network access or provider quota.
+"""
+import asyncio
+import hashlib
+import json
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+
+class ReplayMissError(LookupError):
+    """Raised when a prompt has no recording and no default response is set."""
+
+
+def prompt_text(prompt: Any) -> str:
+    """Flatten a string, PromptValue or message list into plain text."""
+    if isinstance(prompt, str):
+        return prompt
+    if hasattr(prompt, "to_string"):
+        return prompt.to_string()
+    if isinstance(prompt, (list, tuple)):
+        return "\n".join(str(getattr(m, "content", m)) for m in prompt)
+    return str(prompt)
+
+
+def prompt_key(prompt: Any) -> str:
+    """Stable key for a prompt; insensitive to surrounding/repeated whitespace."""
+    text = " ".join(prompt_text(prompt).split())
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class LatencyModel:
+    """
+    Synthetic latency distribution, parsed from a spec string (milliseconds):
+        "none" | "fixed:300" | "uniform:200:900" | "lognormal:450:0.4"
+    lognormal takes the median and sigma. "recorded" replays the latency
+    captured with each recording.
+    """
+
+    def __init__(self, spec: str = "none", seed: Optional[int] = None):
+        self.spec = spec
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+        kind, *params = spec.split(":")
+        self.kind = kind
+        self.params = [float(p) for p in params]
+
+        expected = {"none": 0, "recorded": 0, "fixed": 1, "uniform": 2, "lognormal": 2}
+        if kind not in expected or len(self.params) != expected[kind]:
+            raise ValueError(f"Invalid latency spec: {spec!r}")
+
+    def sample(self, recorded_ms: Optional[float] = None) -> float:
+        """Latency in seconds for one call."""
+        with self._lock:
+            if self.kind == "fixed":
+                ms = self.params[0]
+            elif self.kind == "uniform":
+                ms = self._rng.uniform(*self.params)
+            elif self.kind == "lognormal":
+                median, sigma = self.params
+                ms = median * self._rng.lognormvariate(0, sigma)
+            elif self.kind == "recorded":
+                ms = recorded_ms or 0
+            else:
+                ms = 0
+        return ms / 1000
+
+
+def load_recordings(path) -> Dict[str, Dict]:
+    """Read a JSONL recordings file into {prompt_key: record}; later lines win."""
+    recordings = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                recordings[record["key"]] = record
+    return recordings
+
+
+class ReplayLLM:
+    """Drop-in for ChatGroq's invoke/ainvoke that serves recorded responses."""
+
+    def __init__(
+        self,
+        recordings: Dict[str, Dict],
+        latency: Optional[LatencyModel] = None,
+        default_response: Optional[str] = None,
+        resolver: Optional[Callable[[str], Optional[str]]] = None,
+    ):
+        self.recordings = recordings
+        self.latency = latency or LatencyModel()
+        self.default_response = default_response
+        # Answers prompts that cannot be recorded verbatim (e.g. batches of varying content)
+        self.resolver = resolver
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, prompt: Any):
+        record = self.recordings.get(prompt_key(prompt))
+        if record is None and self.resolver is not None:
+            content = self.resolver(prompt_text(prompt))
+            if content is not None:
+                record = {"response": content}
+
+        with self._lock:
+            if record is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if record is not None:
+            return record["response"], self.latency.sample(record.get("latency_ms"))
+        if self.default_response is not None:
+            return self.default_response, self.latency.sample()
+
+        preview = " ".join(prompt_text(prompt).split())[-80:]
+        raise ReplayMissError(f"No recording for prompt ending: {preview!r}")
+
+    def invoke(self, prompt: Any, *args, **kwargs) -> AIMessage:
+        content, delay = self._lookup(prompt)
+        if delay:
+            time.sleep(delay)
+        return self._message(prompt, content)
+
+    async def ainvoke(self, prompt: Any, *args, **kwargs) -> AIMessage:
+        content, delay = self._lookup(prompt)
+        if delay:
+            await asyncio.sleep(delay)
+        return self._message(prompt, content)
+
+    async def astream(self, prompt: Any, *args, **kwargs):
+        """Yield the response in small chunks: ~30% of the latency before the first, the rest spread out."""
+        content, delay = self._lookup(prompt)
+        pieces = [content[i:i + 16] for i in range(0, len(content), 16)] or [""]
+
+        if delay:
+            await asyncio.sleep(delay * 0.3)
+        for i, piece in enumerate(pieces):
+            if i and delay:
+                await asyncio.sleep(delay * 0.7 / len(pieces))
+            last = i == len(pieces) - 1
+            yield AIMessageChunk(
+                content=piece,
+                usage_metadata=self._usage(prompt, content) if last else None,
+            )
+
+    @classmethod
+    def _message(cls, prompt: Any, content: str) -> AIMessage:
+        return AIMessage(content=content, usage_metadata=cls._usage(prompt, content))
+
+    @staticmethod
+    def _usage(prompt: Any, content: str) -> Dict[str, int]:
+        # Rough token estimate (~4 chars/token) so replayed runs still report usage
+        input_tokens = len(prompt_text(prompt)) // 4
+        output_tokens = len(content) // 4
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "recordings": len(self.recordings),
+                "hits": self.hits,
+                "misses": self.misses,
+                "latency": self.latency.spec,
+            }
+
+
+class RecordingLLM:
+    """Wraps a real client and appends every call to a JSONL recordings file."""
+
+    def __init__(self, llm, path):
+        self._llm = llm
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def invoke(self, prompt: Any, *args, **kwargs):
+        started = time.perf_counter()
+        response = self._llm.invoke(prompt, *args, **kwargs)
+        self._record(prompt, response, started)
+        return response
+
+    async def ainvoke(self, prompt: Any, *args, **kwargs):
+        started = time.perf_counter()
+        response = await self._llm.ainvoke(prompt, *args, **kwargs)
+        self._record(prompt, response, started)
+        return response
+
+    async def astream(self, prompt: Any, *args, **kwargs):
+        started = time.perf_counter()
+        full = None
+        async for chunk in self._llm.astream(prompt, *args, **kwargs):
+            full = chunk if full is None else full + chunk
+            yield chunk
+        if full is not None:
+            self._record(prompt, full, started)
+
+    def _record(self, prompt: Any, response, started: float):
+        record = {
+            "key": prompt_key(prompt),
+            "prompt": prompt_text(prompt),
+            "response": response.content,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
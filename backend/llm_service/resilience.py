@@ -0,0 +1,483 @@
+"""
+Resilience policy for outbound LLM calls.
+Each provider call gets a per-attempt timeout, jittered retries for transient
+failures only, an optional hedged second request once it runs past a latency
+percentile, and a circuit breaker that fails fast with a 503 while the
+provider is unhealthy. The scheduler slot (see llm_service.scheduler) is
+taken around each attempt but outside its timer: waiting in the local queue
+is neither a provider timeout, a breaker failure nor hedge latency.
+"""
+import asyncio
+import math
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import AsyncExitStack, ExitStack
+from typing import Any, AsyncContextManager, AsyncIterator, Awaitable, Callable, ContextManager, Dict, Optional
+
+import httpx
+from fastapi import HTTPException, status
+from tenacity import (
+    AsyncRetrying,
+    Retrying,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+# Status codes worth retrying: request timeout, conflict, rate limit, 5xx
+_RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+_END_OF_STREAM = object()
+
+
+class LLMUnavailableError(HTTPException):
+    """Raised when the LLM provider is failing or the circuit breaker is open."""
+
+    def __init__(self, reason: str, retry_after: float):
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"AI logging is temporarily unavailable ({reason}), please retry shortly",
+            headers={"Retry-After": str(self.retry_after)},
+        )
+
+
+def _groq():
+    """The groq SDK once a client has loaded it; before that none of its errors can occur."""
+    return sys.modules.get("groq")
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Whether a failed call is worth retrying."""
+    # Our own 429/503 responses are final decisions, not provider hiccups
+    if isinstance(exc, HTTPException):
+        return False
+    if isinstance(exc, (TimeoutError, httpx.TimeoutException, httpx.TransportError)):
+        return True
+    groq = _groq()
+    if groq is not None and isinstance(exc, groq.APIConnectionError):
+        return True
+    if groq is not None and isinstance(exc, groq.APIStatusError):
+        return exc.status_code in _RETRYABLE_STATUS_CODES or exc.status_code >= 500
+    return False
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker: closed -> open after failure_threshold
+    transient failures, half-open after reset_seconds (one trial call),
+    closed again on the first success.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_started: Optional[float] = None
+
+        self.opened_count = 0
+        self.short_circuited = 0
+
+    def before_call(self):
+        with self._lock:
+            if self.state == "open":
+                elapsed = self._clock() - self._opened_at
+                if elapsed < self.reset_seconds:
+                    self.short_circuited += 1
+                    raise LLMUnavailableError("circuit open", self.reset_seconds - elapsed)
+                self.state = "half_open"
+
+            if self.state == "half_open":
+                # One trial at a time; a trial that never reported back is stale
+                now = self._clock()
+                if self._trial_started is not None and now - self._trial_started < self.reset_seconds:
+                    self.short_circuited += 1
+                    raise LLMUnavailableError("circuit half-open", 1)
+                self._trial_started = now
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self._failures = 0
+            self._trial_started = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_started = None
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.opened_count += 1
+                self.state = "open"
+                self._opened_at = self._clock()
+
+    def release(self):
+        """The call never reached the provider; free the half-open trial."""
+        with self._lock:
+            self._trial_started = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self._failures,
+                "opened_count": self.opened_count,
+                "short_circuited": self.short_circuited,
+            }
+
+
+class LatencyWindow:
+    """Rolling window of recent successful call latencies, per node."""
+
+    def __init__(self, size: int = 200):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float, min_samples: int = 20) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+
+class ResiliencePolicy:
+    """Timeout + retry + hedge + circuit breaker around one provider call."""
+
+    def __init__(
+        self,
+        attempt_timeout: float = 20.0,
+        max_attempts: int = 3,
+        retry_base_seconds: float = 0.5,
+        retry_max_wait_seconds: float = 4.0,
+        hedge_percentile: Optional[float] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        on_attempt: Optional[Callable[[float, bool], None]] = None,
+    ):
+        self.attempt_timeout = attempt_timeout
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_wait_seconds = retry_max_wait_seconds
+        self.hedge_percentile = hedge_percentile
+        self.breaker = breaker or CircuitBreaker()
+        # Called with each timed provider attempt's seconds and whether it failed transiently
+        self.on_attempt = on_attempt
+
+        self._lock = threading.Lock()
+        self._latency: Dict[str, LatencyWindow] = {}
+
+        self.attempts = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.failures = {"transient": 0, "permanent": 0}
+        self.hedges = {"launched": 0, "won": 0}
+
+    # ---------- Sync API ----------
+    def call(
+        self, node: str, fn: Callable[[], Any], slot: Optional[Callable[[], ContextManager]] = None
+    ) -> Any:
+        """
+        Run fn under the policy, each attempt inside slot() when given. The
+        sync path relies on the client's own request timeout (see
+        llm_client) and does not hedge.
+        """
+        try:
+            for attempt in Retrying(**self._retry_options()):
+                with attempt:
+                    self.breaker.before_call()
+                    with ExitStack() as stack:
+                        self._acquire(stack, slot)
+                        return self._observe(node, time.monotonic(), fn)
+        except Exception as e:
+            # Retries exhausted on a provider failure: answer 503, not a bare 500
+            if is_transient(e):
+                raise LLMUnavailableError("provider error", self.retry_max_wait_seconds) from e
+            raise
+
+    # ---------- Async API ----------
+    async def acall(
+        self,
+        node: str,
+        fn: Callable[[], Awaitable[Any]],
+        timeout: Optional[float] = None,
+        slot: Optional[Callable[[], AsyncContextManager]] = None,
+    ) -> Any:
+        """
+        Run fn under the policy, each attempt (and hedge) inside slot() when
+        given; timeout overrides attempt_timeout for this node.
+        """
+        try:
+            async for attempt in AsyncRetrying(**self._retry_options()):
+                with attempt:
+                    self.breaker.before_call()
+                    return await self._hedged(node, fn, timeout or self.attempt_timeout, slot)
+        except Exception as e:
+            # Retries exhausted on a provider failure: answer 503, not a bare 500
+            if is_transient(e):
+                raise LLMUnavailableError("provider error", self.retry_max_wait_seconds) from e
+            raise
+
+    async def astream(
+        self,
+        node: str,
+        fn: Callable[[], AsyncIterator[Any]],
+        timeout: Optional[float] = None,
+        slot: Optional[Callable[[], AsyncContextManager]] = None,
+    ) -> AsyncIterator[Any]:
+        """
+        Streaming variant: retries (and the breaker) only cover the wait for the
+        first chunk, since a partial stream cannot be replayed to the consumer.
+        attempt_timeout (or timeout) bounds the gap before each chunk. slot()
+        is held for the whole stream.
+        """
+        timeout = timeout or self.attempt_timeout
+        async with AsyncExitStack() as stack:
+            try:
+                async for attempt in AsyncRetrying(**self._retry_options()):
+                    with attempt:
+                        self.breaker.before_call()
+                        await self._aacquire(stack, slot)
+                        started = time.monotonic()
+                        stream = fn()
+                        try:
+                            chunk = await self._next_chunk(stream, timeout, started)
+                        except BaseException:
+                            await stream.aclose()
+                            # Free the slot before backing off
+                            await stack.aclose()
+                            raise
+            except Exception as e:
+                if is_transient(e):
+                    raise LLMUnavailableError("provider error", self.retry_max_wait_seconds) from e
+                raise
+
+            try:
+                while chunk is not _END_OF_STREAM:
+                    yield chunk
+                    chunk = await self._next_chunk(stream, timeout, started)
+            except Exception as e:
+                if is_transient(e):
+                    raise LLMUnavailableError("stream interrupted", self.retry_max_wait_seconds) from e
+                raise
+            finally:
+                await stream.aclose()
+
+        self._record_success(f"{node}.stream", started)
+
+    async def _next_chunk(self, stream: AsyncIterator[Any], timeout: float, started: float) -> Any:
+        try:
+            return await asyncio.wait_for(stream.__anext__(), timeout)
+        except StopAsyncIteration:
+            return _END_OF_STREAM
+        except Exception as e:
+            self._record_failure(e, started)
+            raise
+
+    async def _hedged(
+        self,
+        node: str,
+        fn: Callable[[], Awaitable[Any]],
+        timeout: float,
+        slot: Optional[Callable[[], AsyncContextManager]],
+    ) -> Any:
+        """Start one request; if it outlives the hedge delay, race a second one."""
+        admitted = asyncio.Event()
+        first = asyncio.ensure_future(self._timed(node, fn, timeout, slot, admitted))
+        tasks = [first]
+        try:
+            delay = self._hedge_delay(node)
+            if delay is not None:
+                # The delay runs from when the first request leaves the queue
+                waiting = asyncio.ensure_future(admitted.wait())
+                await asyncio.wait([first, waiting], return_when=asyncio.FIRST_COMPLETED)
+                waiting.cancel()
+                if not first.done():
+                    done, _ = await asyncio.wait(tasks, timeout=delay)
+                    if not done:
+                        with self._lock:
+                            self.hedges["launched"] += 1
+                        tasks.append(asyncio.ensure_future(self._timed(node, fn, timeout, slot)))
+
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            with self._lock:
+                                self.hedges["won"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _timed(
+        self,
+        node: str,
+        fn: Callable[[], Awaitable[Any]],
+        timeout: float,
+        slot: Optional[Callable[[], AsyncContextManager]],
+        admitted: Optional[asyncio.Event] = None,
+    ) -> Any:
+        async with AsyncExitStack() as stack:
+            await self._aacquire(stack, slot)
+            if admitted is not None:
+                admitted.set()
+            # Only the provider call is timed
+            started = time.monotonic()
+            try:
+                result = await asyncio.wait_for(fn(), timeout)
+            except Exception as e:
+                self._record_failure(e, started)
+                raise
+        self._record_success(node, started)
+        return result
+
+    # ---------- Internals ----------
+    def _acquire(self, stack: ExitStack, slot: Optional[Callable[[], ContextManager]]):
+        if slot is None:
+            return
+        try:
+            stack.enter_context(slot())
+        except BaseException:
+            # Rejected or cancelled in the queue: the provider was never asked
+            self.breaker.release()
+            raise
+
+    async def _aacquire(self, stack: AsyncExitStack, slot: Optional[Callable[[], AsyncContextManager]]):
+        if slot is None:
+            return
+        try:
+            await stack.enter_async_context(slot())
+        except BaseException:
+            self.breaker.release()
+            raise
+
+    def _retry_options(self) -> Dict[str, Any]:
+        return {
+            "stop": stop_after_attempt(self.max_attempts),
+            "wait": wait_random_exponential(
+                multiplier=self.retry_base_seconds, max=self.retry_max_wait_seconds
+            ),
+            "retry": retry_if_exception(is_transient),
+            "before_sleep": self._count_retry,
+            "reraise": True,
+        }
+
+    def _observe(self, node: str, started: float, fn: Callable[[], Any]) -> Any:
+        try:
+            result = fn()
+        except Exception as e:
+            self._record_failure(e, started)
+            raise
+        self._record_success(node, started)
+        return result
+
+    def _record_success(self, node: str, started: float):
+        seconds = time.monotonic() - started
+        with self._lock:
+            self.attempts += 1
+            window = self._latency.setdefault(node, LatencyWindow())
+        window.add(seconds)
+        self.breaker.record_success()
+        if self.on_attempt is not None:
+            self.on_attempt(seconds, False)
+
+    def _record_failure(self, exc: BaseException, started: float):
+        transient = is_transient(exc)
+        if transient and self.on_attempt is not None:
+            self.on_attempt(time.monotonic() - started, True)
+        with self._lock:
+            self.attempts += 1
+            self.failures["transient" if transient else "permanent"] += 1
+            groq = _groq()
+            if isinstance(exc, (TimeoutError, httpx.TimeoutException)) or (
+                groq is not None and isinstance(exc, groq.APITimeoutError)
+            ):
+                self.timeouts += 1
+        # Only provider-health failures count towards opening the breaker;
+        # a 4xx still proves the provider is up
+        if transient:
+            self.breaker.record_failure()
+        elif isinstance(exc, HTTPException):
+            self.breaker.release()
+        else:
+            self.breaker.record_success()
+
+    def _count_retry(self, retry_state):
+        with self._lock:
+            self.retries += 1
+
+    def _hedge_delay(self, node: str) -> Optional[float]:
+        if not self.hedge_percentile:
+            return None
+        window = self._latency.get(node)
+        return window.percentile(self.hedge_percentile) if window is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = {
+                "attempts": self.attempts,
+                "retries": self.retries,
+                "timeouts": self.timeouts,
+                "failures": dict(self.failures),
+                "hedges": dict(self.hedges),
+                "hedge_delay_ms": {
+                    node: round(delay * 1000, 2)
+                    for node in self._latency
+                    if (delay := self._hedge_delay(node)) is not None
+                },
+            }
+        stats["breaker"] = self.breaker.stats()
+        return stats
+
+
+_policy: Optional[ResiliencePolicy] = None
+
+
+def get_resilience_policy() -> ResiliencePolicy:
+    """Get or initialize the process-wide LLM resilience policy."""
+    global _policy
+
+    if _policy is None:
+        # degradation imports this module, so its hook is loaded with the policy
+        from llm_service.degradation import record_provider_attempt
+
+        hedge_percentile = float(os.getenv("LLM_HEDGE_PERCENTILE", "0"))
+        _policy = ResiliencePolicy(
+            attempt_timeout=float(os.getenv("LLM_ATTEMPT_TIMEOUT_SECONDS", "20")),
+            max_attempts=int(os.getenv("LLM_MAX_ATTEMPTS", "3")),
+            retry_base_seconds=float(os.getenv("LLM_RETRY_BASE_SECONDS", "0.5")),
+            retry_max_wait_seconds=float(os.getenv("LLM_RETRY_MAX_WAIT_SECONDS", "4")),
+            hedge_percentile=hedge_percentile or None,
+            breaker=CircuitBreaker(
+                failure_threshold=int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5")),
+                reset_seconds=float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30")),
+            ),
+            on_attempt=record_provider_attempt,
+        )
+
+    return _policy
@@ -0,0 +1,243 @@
+"""
+Bounded scheduler for outbound LLM calls.
+Caps concurrent provider calls, queues the overflow per user with round-robin
+fairness, and rejects work that cannot start before its deadline with a
+429 + Retry-After instead of letting latency pile up for every endpoint.
+"""
+import asyncio
+import math
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException, status
+
+
+class LLMOverloadedError(HTTPException):
+    """Raised when an LLM call cannot be scheduled in time."""
+
+    def __init__(self, reason: str, retry_after: float):
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"AI logging is busy ({reason}), please retry shortly",
+            headers={"Retry-After": str(self.retry_after)},
+        )
+
+
+class _Waiter(ABC):
+    def __init__(self, user_key: str, enqueued_at: float):
+        self.user_key = user_key
+        self.enqueued_at = enqueued_at
+        self.granted = False
+
+    @abstractmethod
+    def wake(self):
+        """Hand the granted slot to the waiting thread or coroutine."""
+
+
+class _ThreadWaiter(_Waiter):
+    def __init__(self, user_key: str, enqueued_at: float):
+        super().__init__(user_key, enqueued_at)
+        self.event = threading.Event()
+
+    def wake(self):
+        self.event.set()
+
+
+class _AsyncWaiter(_Waiter):
+    def __init__(self, user_key: str, enqueued_at: float, loop: asyncio.AbstractEventLoop):
+        super().__init__(user_key, enqueued_at)
+        self.loop = loop
+        self.future = loop.create_future()
+
+    def wake(self):
+        # May be called from another thread or loop
+        self.loop.call_soon_threadsafe(lambda: self.future.done() or self.future.set_result(None))
+
+
+class LLMScheduler:
+    """Concurrency cap + bounded per-user fair queue, usable from threads and coroutines."""
+
+    def __init__(
+        self,
+        max_concurrency: int = 16,
+        max_queue: int = 256,
+        max_wait_seconds: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        self._active = 0
+        # user -> deque of waiters; served round-robin across users
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()
+        self._queued = 0
+        # Smoothed provider call duration, used to estimate queue wait
+        self._service_time = 1.0
+
+        self.peak_queue_depth = 0
+        self.admitted = 0
+        self.rejected = {"queue_full": 0, "deadline": 0, "timeout": 0}
+        self._wait_count = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    # ---------- Sync API ----------
+    @contextmanager
+    def slot(self, user_id: Any = None, deadline: Optional[float] = None):
+        waiter = self._enter(user_id, deadline, _ThreadWaiter)
+        if waiter is not None:
+            waiter.event.wait(self._remaining(deadline))
+            self._resolve_wait(waiter)
+        started = self._clock()
+        try:
+            yield
+        finally:
+            self._release(self._clock() - started)
+
+    # ---------- Async API ----------
+    @asynccontextmanager
+    async def aslot(self, user_id: Any = None, deadline: Optional[float] = None):
+        loop = asyncio.get_running_loop()
+        waiter = self._enter(user_id, deadline, lambda user_key, now: _AsyncWaiter(user_key, now, loop))
+        if waiter is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter.future), self._remaining(deadline))
+            except asyncio.TimeoutError:
+                pass
+            except asyncio.CancelledError:
+                self._abandon(waiter)
+                raise
+            self._resolve_wait(waiter)
+        started = self._clock()
+        try:
+            yield
+        finally:
+            self._release(self._clock() - started)
+
+    # ---------- Internals ----------
+    def _remaining(self, deadline: Optional[float]) -> float:
+        if deadline is None:
+            return self.max_wait_seconds
+        return max(0.0, min(self.max_wait_seconds, deadline - self._clock()))
+
+    def _enter(self, user_id, deadline, make_waiter) -> Optional[_Waiter]:
+        """Take a free slot (returns None) or enqueue and return the waiter."""
+        user_key = str(user_id) if user_id is not None else "anonymous"
+
+        with self._lock:
+            if self._active < self.max_concurrency and self._queued == 0:
+                self._active += 1
+                self.admitted += 1
+                self._record_wait(0.0)
+                return None
+
+            estimated_wait = (self._queued + 1) / self.max_concurrency * self._service_time
+            if self._queued >= self.max_queue:
+                self.rejected["queue_full"] += 1
+                raise LLMOverloadedError("queue full", estimated_wait)
+            if estimated_wait > self._remaining(deadline):
+                self.rejected["deadline"] += 1
+                raise LLMOverloadedError("deadline", estimated_wait)
+
+            waiter = make_waiter(user_key, self._clock())
+            self._queues.setdefault(user_key, deque()).append(waiter)
+            self._queued += 1
+            self.peak_queue_depth = max(self.peak_queue_depth, self._queued)
+            return waiter
+
+    def _resolve_wait(self, waiter: _Waiter):
+        """After waking or timing out: keep the slot if granted, else leave the queue and reject."""
+        with self._lock:
+            if waiter.granted:
+                self.admitted += 1
+                self._record_wait(self._clock() - waiter.enqueued_at)
+                return
+            self._dequeue(waiter)
+            self.rejected["timeout"] += 1
+            retry_after = self._queued / self.max_concurrency * self._service_time
+
+        raise LLMOverloadedError("timed out waiting", retry_after)
+
+    def _abandon(self, waiter: _Waiter):
+        with self._lock:
+            if not waiter.granted:
+                self._dequeue(waiter)
+                return
+        # Granted just as the caller went away: hand the slot on
+        self._release(None)
+
+    def _dequeue(self, waiter: _Waiter):
+        queue = self._queues.get(waiter.user_key)
+        if queue and waiter in queue:
+            queue.remove(waiter)
+            self._queued -= 1
+            if not queue:
+                del self._queues[waiter.user_key]
+
+    def _release(self, service_time: Optional[float]):
+        with self._lock:
+            if service_time is not None:
+                self._service_time = 0.8 * self._service_time + 0.2 * service_time
+
+            if not self._queues:
+                self._active -= 1
+                return
+
+            # Round-robin: serve the user at the head, then move them to the back
+            user_key, queue = next(iter(self._queues.items()))
+            waiter = queue.popleft()
+            self._queued -= 1
+            if queue:
+                self._queues.move_to_end(user_key)
+            else:
+                del self._queues[user_key]
+            waiter.granted = True
+
+        waiter.wake()
+
+    def _record_wait(self, seconds: float):
+        self._wait_count += 1
+        self._wait_total += seconds
+        self._wait_max = max(self._wait_max, seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "active": self._active,
+                "queue_depth": self._queued,
+                "peak_queue_depth": self.peak_queue_depth,
+                "queued_users": len(self._queues),
+                "admitted": self.admitted,
+                "rejected": dict(self.rejected),
+                "avg_wait_ms": round(self._wait_total / self._wait_count * 1000, 2) if self._wait_count else 0.0,
+                "max_wait_ms": round(self._wait_max * 1000, 2),
+                "est_service_time_ms": round(self._service_time * 1000, 2),
+            }
+
+
+_scheduler: Optional[LLMScheduler] = None
+
+
+def get_scheduler() -> LLMScheduler:
+    """Get or initialize the process-wide LLM scheduler."""
+    global _scheduler
+
+    if _scheduler is None:
+        _scheduler = LLMScheduler(
+            max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "16")),
+            max_queue=int(os.getenv("LLM_MAX_QUEUE", "256")),
+            max_wait_seconds=float(os.getenv("LLM_MAX_QUEUE_WAIT_SECONDS", "10")),
+        )
+
+    return _scheduler
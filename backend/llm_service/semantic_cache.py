@@ -0,0 +1,337 @@
+"""
+Semantic near-duplicate cache for meal descriptions.
+Inputs are embedded locally as hashed character n-gram vectors (no external
+embedding service) and indexed with SimHash LSH, so paraphrases such as
+"two eggs scrambled" / "scrambled 2 eggs" reuse a stored parse when their
+cosine similarity clears a threshold. Inputs must also mention exactly the
+same quantities of the same items: "2 eggs" never answers for "3 eggs", nor
+"1 egg and 2 toasts" for "2 eggs and 1 toast".
+"""
+import copy
+import hashlib
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from llm_service.cache import normalize_input
+from llm_service.food_grammar import singularize, split_items
+
+VECTOR_DIM = 2048
+NGRAM_SIZE = 3
+SIGNATURE_BITS = 60
+BANDS = 10                      # 10 bands x 6 rows
+ROWS = SIGNATURE_BITS // BANDS
+
+# Words that carry no meal information
+STOPWORDS = {
+    "i", "ive", "had", "have", "ate", "eaten", "eat", "just", "drank", "some", "a", "an",
+    "the", "of", "my", "for", "today", "also", "then", "and", "with",
+}
+
+_NUMBER_RE = re.compile(r"^\d+(\.\d+)?$")
+
+Vector = Dict[int, float]
+# (number, sorted words of the item it counts)
+Quantity = Tuple[str, Tuple[str, ...]]
+
+
+@lru_cache(maxsize=65536)
+def _feature_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+@lru_cache(maxsize=VECTOR_DIM)
+def _hyperplane(index: int) -> int:
+    """Random-but-fixed 60-bit hyperplane pattern for one vector dimension."""
+    return _feature_hash(f"plane:{index}") >> (64 - SIGNATURE_BITS)
+
+
+def analyze(text: str) -> Tuple[List[str], Tuple[Quantity, ...]]:
+    """
+    Content words (singular, stopwords dropped) and the sorted quantities in
+    the input. Each number is bound to the words of its item: the item
+    phrase it is in, split again before every further number, so
+    "scrambled 2 eggs" binds 2 to {egg, scrambled}.
+    """
+    words, quantities = [], []
+    for phrase in split_items(normalize_input(text)):
+        segments = [[None, []]]     # [number, words]; words before the first number join it
+        for token in phrase.split():
+            if _NUMBER_RE.match(token):
+                if segments[-1][0] is None:
+                    segments[-1][0] = token
+                else:
+                    segments.append([token, []])
+            elif token not in STOPWORDS:
+                word = singularize(token)
+                words.append(word)
+                segments[-1][1].append(word)
+        quantities += [(number, tuple(sorted(set(item)))) for number, item in segments if number is not None]
+    return words, tuple(sorted(quantities))
+
+
+def features(words: List[str], quantities: Tuple[Quantity, ...]) -> List[str]:
+    """The words plus one number+word token per counted word, so swapped quantities embed apart."""
+    return words + [f"{number}{word}" for number, item in quantities for word in item]
+
+
+def vectorize(words: Iterable[str]) -> Vector:
+    """L2-normalized, signed feature-hashed bag of character n-grams (word order ignored)."""
+    vector: Vector = {}
+    for word in words:
+        padded = f" {word} "
+        for i in range(max(1, len(padded) - NGRAM_SIZE + 1)):
+            h = _feature_hash(padded[i:i + NGRAM_SIZE])
+            index = h % VECTOR_DIM
+            vector[index] = vector.get(index, 0.0) + (1.0 if h >> 63 else -1.0)
+
+    norm = math.sqrt(sum(v * v for v in vector.values()))
+    if not norm:
+        return {}
+    return {i: v / norm for i, v in vector.items() if v}
+
+
+def cosine(a: Vector, b: Vector) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(i, 0.0) for i, v in a.items())
+
+
+def simhash(vector: Vector) -> int:
+    """Sign of the projection onto SIGNATURE_BITS fixed random hyperplanes."""
+    acc = [0.0] * SIGNATURE_BITS
+    for index, value in vector.items():
+        plane = _hyperplane(index)
+        for bit in range(SIGNATURE_BITS):
+            acc[bit] += value if plane >> bit & 1 else -value
+    return sum(1 << bit for bit, total in enumerate(acc) if total > 0)
+
+
+def band_keys(signature: int) -> List[Tuple[int, int]]:
+    mask = (1 << ROWS) - 1
+    return [(band, signature >> (band * ROWS) & mask) for band in range(BANDS)]
+
+
+class _Entry:
+    __slots__ = ("key", "vector", "signature", "quantities", "value", "expires_at")
+
+    def __init__(self, key, vector, signature, quantities, value, expires_at):
+        self.key = key
+        self.vector = vector
+        self.signature = signature
+        self.quantities = quantities
+        self.value = value
+        self.expires_at = expires_at
+
+
+class SemanticCache:
+    """Thread-safe, bounded LRU + TTL similarity index over stored parse results."""
+
+    def __init__(
+        self,
+        threshold: float = 0.92,
+        max_entries: int = 4096,
+        ttl_seconds: float = 6 * 3600,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bands: Dict[Tuple[int, int], set] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.near_misses = 0          # best match within 0.1 below the threshold
+        self.number_mismatches = 0    # similar enough, but quantities differ
+        self.evictions = 0
+        self.expirations = 0
+        self._candidates = 0
+        self._hit_similarity = 0.0
+
+    def get(self, text: str) -> Optional[Tuple[Any, float]]:
+        """Return (copy of the stored value, similarity) for the best match, or None."""
+        words, quantities = analyze(text)
+        vector = vectorize(features(words, quantities))
+        if not vector:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        best, best_score, guarded = None, 0.0, False
+        with self._lock:
+            now = self._clock()
+            for key in self._candidate_keys(simhash(vector)):
+                entry = self._entries[key]
+                if entry.expires_at <= now:
+                    self._remove(key)
+                    self.expirations += 1
+                    continue
+                self._candidates += 1
+                score = cosine(vector, entry.vector)
+                if entry.quantities != quantities:
+                    guarded = guarded or score >= self.threshold
+                    continue
+                if score > best_score:
+                    best, best_score = entry, score
+
+            if best is None or best_score < self.threshold:
+                self.misses += 1
+                if guarded:
+                    self.number_mismatches += 1
+                elif best_score >= self.threshold - 0.1:
+                    self.near_misses += 1
+                return None
+
+            self._entries.move_to_end(best.key)
+            self.hits += 1
+            self._hit_similarity += best_score
+            value = best.value
+
+        return copy.deepcopy(value), round(best_score, 4)
+
+    def set(self, text: str, value: Any) -> None:
+        words, quantities = analyze(text)
+        vector = vectorize(features(words, quantities))
+        if not vector:
+            return
+
+        bound = tuple(f"{number}:{'+'.join(item)}" for number, item in quantities)
+        key = " ".join(bound + tuple(sorted(words)))
+        entry = _Entry(key, vector, simhash(vector), quantities, copy.deepcopy(value), self._clock() + self.ttl_seconds)
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            for band in band_keys(entry.signature):
+                self._bands.setdefault(band, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bands.clear()
+
+    def _candidate_keys(self, signature: int) -> List[str]:
+        keys = set()
+        for band in band_keys(signature):
+            keys |= self._bands.get(band, set())
+        return list(keys)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        for band in band_keys(entry.signature):
+            bucket = self._bands.get(band)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._bands[band]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "near_misses": self.near_misses,
+                "number_mismatches": self.number_mismatches,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "avg_candidates": round(self._candidates / lookups, 2) if lookups else 0.0,
+                "avg_hit_similarity": round(self._hit_similarity / self.hits, 4) if self.hits else 0.0,
+            }
+
+
+def same_parse(a: Dict, b: Dict, tolerance: float = 0.1) -> bool:
+    """Whether two results describe the same log: same intent, items and calories (within tolerance)."""
+    if a.get("intent") != b.get("intent"):
+        return False
+
+    def items(result):
+        return sorted(
+            (" ".join(map(singularize, normalize_input(i.get("name") or "").split())), i.get("quantity"))
+            for i in result.get("parsed_data") or []
+        )
+
+    if items(a) != items(b):
+        return False
+
+    cal_a = (a.get("nutrition") or {}).get("calories_kcal") or 0
+    cal_b = (b.get("nutrition") or {}).get("calories_kcal") or 0
+    return abs(cal_a - cal_b) <= tolerance * max(abs(cal_a), abs(cal_b), 1)
+
+
+def evaluate(traffic: List[Tuple[str, Dict]], thresholds: Iterable[float], **cache_kwargs) -> List[Dict]:
+    """
+    Replay (input, true result) traffic through a fresh cache per threshold.
+    A hit whose stored parse matches the true result is a true positive,
+    otherwise a false positive; a miss when an equivalent parse was already
+    stored is a false negative.
+    """
+    report = []
+    for threshold in thresholds:
+        cache = SemanticCache(threshold=threshold, **cache_kwargs)
+        seen: List[Dict] = []
+        tp = fp = fn = 0
+
+        for text, truth in traffic:
+            found = cache.get(text)
+            if found is not None:
+                if same_parse(found[0], truth):
+                    tp += 1
+                else:
+                    fp += 1
+            elif any(same_parse(prior, truth) for prior in seen):
+                fn += 1
+            cache.set(text, truth)
+            seen.append(truth)
+
+        report.append({
+            "threshold": threshold,
+            "hit_rate": round((tp + fp) / len(traffic), 4) if traffic else 0.0,
+            "precision": round(tp / (tp + fp), 4) if tp + fp else 1.0,
+            "recall": round(tp / (tp + fn), 4) if tp + fn else 1.0,
+            "true_positives": tp,
+            "false_positives": fp,
+            "false_negatives": fn,
+        })
+    return report
+
+
+_semantic_cache: Optional[SemanticCache] = None
+
+
+def get_semantic_cache() -> Optional[SemanticCache]:
+    """
+    Get or initialize the process-wide semantic cache.
+    Returns None when disabled via LLM_SEMANTIC_CACHE_ENABLED=false.
+    """
+    global _semantic_cache
+
+    if os.getenv("LLM_SEMANTIC_CACHE_ENABLED", "true").lower() != "true":
+        return None
+
+    if _semantic_cache is None:
+        _semantic_cache = SemanticCache(
+            threshold=float(os.getenv("LLM_SEMANTIC_CACHE_THRESHOLD", "0.92")),
+            max_entries=int(os.getenv("LLM_SEMANTIC_CACHE_MAX_ENTRIES", "4096")),
+            ttl_seconds=float(os.getenv("LLM_CACHE_TTL_SECONDS", str(6 * 3600))),
+        )
+
+    return _semantic_cache
@@ -1,18 +1,238 @@
-from .graph.workflow import build_graph
+from typing import Optional
+
+from .cache import get_result_cache, normalize_input
+from .semantic_cache import get_semantic_cache
+from .item_cache import get_item_cache
+from .intent_rules import get_rule_classifier
+from .singleflight import get_single_flight
+from .scheduler import get_scheduler
+from .resilience import get_resilience_policy
+from .degradation import estimate_locally, get_degradation_controller
+from .local_parser import local_parser_enabled, parse_locally
+from .batching import classifier_batch_stats
+from .http_pool import http_pool_stats
+from .llm_client import get_llm, llm_registry
+from .structured import get_parse_stats
+from .telemetry import get_telemetry, span
+
+# Intents a client may hint; "mixed" always goes through classification
+INTENT_HINTS = ("food", "exercise")
 
 _graph = None
 
-def process_user_input(text: str):
+
+def get_graph():
     global _graph
 
     if _graph is None:
+        # langgraph is slow to import; load it with the first graph, not the app
+        from .graph.workflow import build_graph
         _graph = build_graph()
 
-    state = {
+    return _graph
+
+
+def warm_up():
+    """
+    Load the LLM stack before the first request needs it: build the graph
+    (langgraph) and every node's client. Blocking; run it off the event loop.
+    """
+    get_graph()
+    for node in llm_registry():
+        get_llm(node)
+
+
+def process_user_input(
+    text: str, user_id: Optional[int] = None, intent: Optional[str] = None, degrade: bool = True
+):
+    """Blocking entry point, kept for scripts and sync callers."""
+    key, cached = lookup_cached_result(text)
+    if cached is not None:
+        return cached
+
+    intent = accept_intent_hint(text, intent)
+    estimate = degraded_estimate(text, intent) if degrade else None
+    if estimate is not None:
+        return estimate
+
+    def run():
+        with span("graph"):
+            result = finalize_result(get_graph().invoke(initial_state(text, user_id, intent)))
+        if intent is None:
+            store_result(key, result)
+        return result
+
+    # Identical in-flight inputs share one graph execution
+    result = get_single_flight().do(flight_key(key, intent), run)
+    result["input"] = text
+    return result
+
+
+async def process_user_input_async(
+    text: str, user_id: Optional[int] = None, intent: Optional[str] = None, degrade: bool = True
+):
+    """
+    Non-blocking entry point used by the API: LLM calls run as coroutines.
+    intent is an optional client hint ("food"/"exercise") that skips classification.
+    degrade=False always uses the LLM, even while it is degraded (re-enrichment).
+    """
+    key, cached = lookup_cached_result(text)
+    if cached is not None:
+        return cached
+
+    intent = accept_intent_hint(text, intent)
+    estimate = degraded_estimate(text, intent) if degrade else None
+    if estimate is not None:
+        return estimate
+
+    async def run():
+        with span("graph"):
+            result = finalize_result(await get_graph().ainvoke(initial_state(text, user_id, intent)))
+        if intent is None:
+            store_result(key, result)
+        return result
+
+    # Identical in-flight inputs share one graph execution
+    result = await get_single_flight().ado(flight_key(key, intent), run)
+    result["input"] = text
+    return result
+
+
+def accept_intent_hint(text: str, intent: Optional[str]) -> Optional[str]:
+    """
+    The hint to route on. A confident contrary rule verdict drops it, so a
+    meal typed on the workout tab is still classified (and cached) correctly.
+    Hinted results are never stored: the caches are keyed by text alone and
+    shared with unhinted callers.
+    """
+    if intent is None:
+        return None
+    if intent not in INTENT_HINTS:
+        raise ValueError(f"Unknown intent hint {intent!r}, expected one of {INTENT_HINTS}")
+
+    rules = get_rule_classifier()
+    return rules.check_hint(text, intent) if rules is not None else intent
+
+
+def degraded_estimate(text: str, intent: Optional[str]):
+    """
+    A low-confidence local estimate while the LLM is degraded, or None to use
+    the LLM (healthy, a recovery probe, or nothing to estimate from).
+    Estimates are not cached: the log is re-enriched once the LLM recovers.
+    """
+    controller = get_degradation_controller()
+    if controller is None or not controller.degraded or intent == "exercise":
+        return None
+    # Confident local parses stay on the graph's own (LLM-free) fast path
+    if local_parser_enabled() and parse_locally(text) is not None:
+        return None
+
+    with span("degraded_estimate") as attrs:
+        estimate = estimate_locally(text)
+        attrs["hit"] = estimate is not None
+    if estimate is None or controller.allow_probe():
+        return None
+
+    controller.count_estimate()
+    return estimate
+
+
+def flight_key(key: str, intent: Optional[str]) -> str:
+    # A hinted run must not hand its result to an unhinted caller mid-flight, or vice versa
+    return f"{key}|{intent}" if intent else key
+
+
+def initial_state(text: str, user_id: Optional[int] = None, intent: Optional[str] = None):
+    return {
         "input": text,
-        "intent": None,
+        "intent": intent,
         "parsed_data": None,
-        "nutrition": None
+        "nutrition": None,
+        "source": None,
+        "user_id": user_id
     }
 
-    return _graph.invoke(state)
\ No newline at end of file
+
+def finalize_result(state):
+    # Results are shared across users via the cache and single-flight
+    state.pop("user_id", None)
+    return state
+
+
+def lookup_cached_result(text: str):
+    # Cache hit: skip the graph (and every LLM call) entirely
+    key = normalize_input(text)
+    cache = get_result_cache()
+    cached = None
+
+    if cache is not None:
+        with span("cache_lookup") as attrs:
+            cached = cache.get(key)
+            attrs["hit"] = cached is not None
+
+    # Exact miss: reuse the parse of a near-duplicate ("scrambled 2 eggs")
+    semantic = get_semantic_cache()
+    if cached is None and semantic is not None:
+        with span("semantic_cache_lookup") as attrs:
+            found = semantic.get(text)
+            attrs["hit"] = found is not None
+        if found is not None:
+            cached, attrs["similarity"] = found
+            if cache is not None:
+                cache.set(key, cached)
+
+    if cached is not None:
+        cached["input"] = text
+    return key, cached
+
+
+def store_result(key: str, result):
+    # Only cache complete parses; failures and cut-off answers should be retried next time
+    if not result.get("parsed_data") or result.get("low_confidence"):
+        return
+
+    cache = get_result_cache()
+    if cache is not None:
+        cache.set(key, result)
+
+    # Local and item-cache parses are cheap to redo; only index LLM results for near-duplicates
+    semantic = get_semantic_cache()
+    if semantic is not None and result.get("source") not in ("local", "item_cache"):
+        semantic.set(result["input"], result)
+
+
+def get_llm_stats():
+    cache = get_result_cache()
+    semantic = get_semantic_cache()
+    items = get_item_cache()
+    rules = get_rule_classifier()
+    degradation = get_degradation_controller()
+    telemetry = get_telemetry().stats()
+    return {
+        "cache": cache.stats() if cache is not None else None,
+        "semantic_cache": semantic.stats() if semantic is not None else None,
+        "item_cache": items.stats() if items is not None else None,
+        "single_flight": get_single_flight().stats(),
+        "scheduler": get_scheduler().stats(),
+        "rule_classifier": rules.stats() if rules is not None else None,
+        "classifier_batch": classifier_batch_stats(),
+        "resilience": get_resilience_policy().stats(),
+        "degradation": degradation.stats() if degradation is not None else None,
+        "http_pool": http_pool_stats(),
+        "structured_output": get_parse_stats().stats(),
+        "models": model_stats(telemetry),
+        "telemetry": telemetry,
+    }
+
+
+def model_stats(telemetry):
+    """Each node's model settings next to its call latency (the {node}.llm stage)."""
+    def latency(stage):
+        histogram = telemetry["stage_ms"].get(stage)
+        return {k: histogram[k] for k in ("count", "p50", "p95")} if histogram else None
+
+    models = llm_registry()
+    for node, config in models.items():
+        config["latency_ms"] = latency(f"{node}.llm")
+        config["stream_latency_ms"] = latency(f"{node}.stream")
+    return models
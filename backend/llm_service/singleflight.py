@@ -0,0 +1,101 @@
+"""
+Single-flight coalescing for the LLM pipeline.
+Concurrent requests with the same normalized input share one in-flight
+graph execution; every waiter receives (a copy of) the same result.
+"""
+import asyncio
+import copy
+import threading
+from typing import Any, Awaitable, Callable, Dict
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls by key, for both threads and coroutines."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        # key -> (event loop, future); futures only coalesce within their own loop
+        self._async_calls: Dict[str, tuple] = {}
+
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Run fn once per key at a time; concurrent callers wait for that run."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Async variant of do(); the shared run survives a waiter being cancelled."""
+        loop = asyncio.get_running_loop()
+
+        with self._lock:
+            existing = self._async_calls.get(key)
+            if existing is not None and existing[0] is loop:
+                self.coalesced += 1
+                future = existing[1]
+                leader = False
+            else:
+                future = loop.create_task(fn())
+                self._async_calls[key] = (loop, future)
+                self.executions += 1
+                leader = True
+
+        if leader:
+            future.add_done_callback(lambda _: self._forget(key, future))
+            return await asyncio.shield(future)
+
+        return copy.deepcopy(await asyncio.shield(future))
+
+    def _forget(self, key: str, future) -> None:
+        with self._lock:
+            existing = self._async_calls.get(key)
+            if existing is not None and existing[1] is future:
+                del self._async_calls[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls) + len(self._async_calls),
+            }
+
+
+_single_flight = SingleFlight()
+
+
+def get_single_flight() -> SingleFlight:
+    return _single_flight
@@ -0,0 +1,256 @@
+"""
+Streaming variant of the LLM pipeline.
+Runs the same stages as the graph, but yields events as soon as they are
+known: the intent right after classification (or from the combined parser's
+"type" field), each food/exercise item the moment its JSON object closes in
+the streamed LLM output, and finally the full result, identical to what
+process_user_input_async would return.
+"""
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from .compact_schema import expand_streamed_item
+from .graph import nodes
+from .prompts.combined_parser import COMBINED_PARSER_PROMPT
+from .service import degraded_estimate, finalize_result, initial_state, lookup_cached_result, store_result
+from .telemetry import span
+
+Event = Tuple[str, Any]
+
+
+class ItemStreamParser:
+    """
+    Incremental scanner for parser output of the form
+        {"type": "...", "items": [{...}, {...}], "total": {...}}
+    feed() returns the items whose objects closed in this chunk; the top-level
+    "type" value is exposed as soon as it is complete. Text outside the JSON
+    (code fences) is ignored.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.intent: Optional[str] = None
+
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_key: Optional[str] = None      # last top-level key seen
+        self._awaiting_value = False              # between a top-level ":" and its value
+        self._items_depth: Optional[int] = None   # depth inside the "items" array
+        self._item_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Dict]:
+        self.text += chunk
+        items = []
+
+        while self._pos < len(self.text):
+            i = self._pos
+            ch = self.text[i]
+            self._pos += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._top_level_string(json.loads(self.text[self._string_start:i + 1]))
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch == ":" and self._depth == 1:
+                self._awaiting_value = True
+            elif ch == "," and self._depth == 1:
+                self._awaiting_value = False
+            elif ch in "{[":
+                if ch == "[" and self._depth == 1 and self._awaiting_value and self._last_key == "items":
+                    self._items_depth = 2
+                elif ch == "{" and self._items_depth is not None and self._depth == self._items_depth:
+                    self._item_start = i
+                if self._depth == 1:
+                    self._awaiting_value = False
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if ch == "}" and self._item_start is not None and self._depth == self._items_depth:
+                    try:
+                        items.append(json.loads(self.text[self._item_start:i + 1]))
+                    except json.JSONDecodeError:
+                        pass  # the final full parse decides what to do with it
+                    self._item_start = None
+                elif ch == "]" and self._depth == 1:
+                    self._items_depth = None
+
+        return items
+
+    def _top_level_string(self, value: str):
+        if not self._awaiting_value:
+            self._last_key = value
+            return
+        self._awaiting_value = False
+        if self._last_key == "type" and self.intent is None:
+            self.intent = value
+
+
+async def stream_items(
+    state,
+    prompt: str,
+    node: str,
+    sink: Dict[str, str],
+    kind: Optional[str] = None,
+    emit_intent: bool = False,
+):
+    """
+    Stream one parser call, yielding ("item", ...) events (and ("intent", ...)
+    when emit_intent); the complete response text is left in sink[node].
+    """
+    parser = ItemStreamParser()
+
+    async for chunk in nodes.astream_llm(state, prompt, node):
+        items = parser.feed(chunk)
+        if emit_intent and parser.intent is not None:
+            emit_intent = False
+            yield "intent", {"intent": parser.intent}
+        for item in items:
+            item = expand_streamed_item(node, item)
+            if kind is not None:
+                item["kind"] = kind
+            yield "item", item
+
+    sink[node] = parser.text
+
+
+async def merge_event_streams(*streams: AsyncIterator[Event]) -> AsyncIterator[Event]:
+    """Interleave several event streams in arrival order."""
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    async def pump(stream):
+        try:
+            async for event in stream:
+                await queue.put(event)
+        except Exception as e:
+            await queue.put(e)
+        finally:
+            await queue.put(done)
+
+    tasks = [asyncio.ensure_future(pump(stream)) for stream in streams]
+    try:
+        remaining = len(tasks)
+        while remaining:
+            event = await queue.get()
+            if event is done:
+                remaining -= 1
+            elif isinstance(event, Exception):
+                raise event
+            else:
+                yield event
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def result_events(result) -> List[Event]:
+    """Replay a finished result (cache hit / local parse) as stream events."""
+    events = [("intent", {"intent": result["intent"]})]
+    events += [("item", item) for item in result.get("parsed_data") or []]
+    events.append(("result", result))
+    return events
+
+
+async def astream_user_input(text: str, user_id: Optional[int] = None) -> AsyncIterator[Event]:
+    """Streaming counterpart of process_user_input_async."""
+    key, cached = lookup_cached_result(text)
+    if cached is not None:
+        for event in result_events(cached):
+            yield event
+        return
+
+    state = initial_state(text, user_id)
+    with span("local_parser"):
+        nodes.local_parser_node(state)
+
+    if state.get("source") == "local":
+        result = finalize_result(nodes.calculator_node(state))
+        store_result(key, result)
+        for event in result_events(result):
+            yield event
+        return
+
+    estimate = degraded_estimate(text, None)
+    if estimate is not None:
+        for event in result_events(estimate):
+            yield event
+        return
+
+    # Deferred with the graph itself (see service.get_graph): langchain is slow to import
+    from .graph.workflow import get_graph_mode
+
+    responses: Dict[str, str] = {}
+
+    if get_graph_mode() == "single_pass":
+        prompt = COMBINED_PARSER_PROMPT.format(input=text)
+        async for event in stream_items(state, prompt, "combined_parser", responses, emit_intent=True):
+            yield event
+        answer = await nodes.aask_llm(state, prompt, "combined_parser", responses["combined_parser"])
+        nodes.apply_combined_answer(state, answer)
+    else:
+        with span("rule_classifier"):
+            nodes.rule_classifier_node(state)
+        if state["intent"] is None:
+            with span("classifier"):
+                await nodes.aclassify_node(state)
+        yield "intent", {"intent": state["intent"]}
+
+        food_prompt = nodes.food_parser_prompt(state)
+        exercise_prompt = nodes.exercise_parser_prompt(state)
+
+        if state["intent"] == "mixed":
+            async for event in merge_event_streams(
+                stream_items(state, food_prompt, "food_parser", responses, kind="food"),
+                stream_items(state, exercise_prompt, "exercise_parser", responses, kind="exercise"),
+            ):
+                yield event
+            food, exercise = await asyncio.gather(
+                nodes.aask_llm(state, food_prompt, "food_parser", responses["food_parser"]),
+                nodes.aask_llm(state, exercise_prompt, "exercise_parser", responses["exercise_parser"]),
+            )
+            food_state = nodes.apply_food_answer({}, food)
+            exercise_state = nodes.apply_exercise_answer({}, exercise)
+            nodes.merge_mixed_results(state, food_state, exercise_state)
+        elif state["intent"] == "exercise":
+            async for event in stream_items(state, exercise_prompt, "exercise_parser", responses):
+                yield event
+            answer = await nodes.aask_llm(state, exercise_prompt, "exercise_parser", responses["exercise_parser"])
+            nodes.apply_exercise_answer(state, answer)
+        else:
+            # Items the item cache answers go out at once; only the rest are streamed
+            plan = nodes.plan_food_items(state)
+            if plan is not None:
+                for _, item in sorted(plan.known.items()):
+                    yield "item", item
+
+            if plan is not None and plan.complete:
+                nodes.apply_item_plan(state, plan, [])
+            else:
+                prompt = nodes.food_parser_prompt(state, plan)
+                async for event in stream_items(state, prompt, "food_parser", responses):
+                    yield event
+                answer = await nodes.aask_llm(state, prompt, "food_parser", responses["food_parser"])
+                nodes.apply_food_answer(state, answer, plan)
+
+    result = finalize_result(nodes.calculator_node(state))
+    store_result(key, result)
+    yield "result", result
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
@@ -0,0 +1,323 @@
+"""
+Validated parsing of the graph nodes' JSON answers.
+Every answer goes through the node's precompiled TypeAdapter. Answers that
+are not valid JSON get a local repair pass first (code fences and prose
+around the object, trailing commas, smart quotes, Python literals, output
+cut off at max_tokens); only answers that are still unusable are re-asked
+(see graph.nodes.ask_llm). An answer cut off mid-way is repaired to its
+complete items but is not accepted as is: it is re-asked too, and only used
+as a last resort, marked low confidence. Parse, repair and re-ask counts per
+node are reported by /llm/stats.
+"""
+import ast
+import json
+import os
+import re
+import threading
+from typing import Annotated, Any, Dict, List, Literal, Optional, Tuple, Union
+
+from pydantic import BeforeValidator, ConfigDict, TypeAdapter, ValidationError, with_config
+from typing_extensions import NotRequired, TypedDict
+
+from llm_service.compact_schema import expand_exercise_response, expand_food_response
+
+Number = Union[int, float]
+# Nutrients the model left empty count as 0, as in apply_food_result
+Nutrient = Annotated[Number, BeforeValidator(lambda v: 0 if v is None else v)]
+Intent = Annotated[
+    Literal["food", "exercise", "mixed"],
+    BeforeValidator(lambda v: v.strip().lower() if isinstance(v, str) else v),
+]
+
+_ANSWER_CONFIG = ConfigDict(extra="allow")
+
+
+@with_config(_ANSWER_CONFIG)
+class Nutrition(TypedDict, total=False):
+    calories_kcal: Nutrient
+    protein_g: Nutrient
+    carbs_g: Nutrient
+    fat_g: Nutrient
+    fiber_g: Nutrient
+
+
+@with_config(_ANSWER_CONFIG)
+class FoodItem(Nutrition):
+    name: str
+    quantity: NotRequired[Optional[Number]]
+    unit: NotRequired[Optional[str]]
+    preparation: NotRequired[Optional[str]]
+    confidence: NotRequired[Optional[Number]]
+
+
+@with_config(_ANSWER_CONFIG)
+class ExerciseItem(TypedDict):
+    name: str
+    duration_minutes: NotRequired[Optional[Number]]
+    distance_km: NotRequired[Optional[Number]]
+    intensity: NotRequired[Optional[str]]
+    calories_estimate: NotRequired[Optional[Number]]
+    confidence: NotRequired[Optional[Number]]
+
+
+@with_config(_ANSWER_CONFIG)
+class CombinedItem(FoodItem):
+    kind: NotRequired[Optional[str]]
+    duration_minutes: NotRequired[Optional[Number]]
+    distance_km: NotRequired[Optional[Number]]
+    intensity: NotRequired[Optional[str]]
+    calories_estimate: NotRequired[Optional[Number]]
+
+
+@with_config(_ANSWER_CONFIG)
+class ClassifierAnswer(TypedDict):
+    type: Intent
+
+
+@with_config(_ANSWER_CONFIG)
+class ClassifierBatchAnswer(TypedDict):
+    # Entries are checked one by one; a bad entry only costs its own input
+    results: List[Any]
+
+
+@with_config(_ANSWER_CONFIG)
+class FoodAnswer(TypedDict):
+    items: List[FoodItem]
+    total: NotRequired[Optional[Nutrition]]
+
+
+@with_config(_ANSWER_CONFIG)
+class ExerciseAnswer(TypedDict):
+    items: NotRequired[List[ExerciseItem]]
+
+
+@with_config(_ANSWER_CONFIG)
+class CombinedAnswer(TypedDict):
+    type: NotRequired[Optional[str]]
+    items: List[CombinedItem]
+    total: NotRequired[Optional[Nutrition]]
+
+
+# Built once at import; validation is a single pydantic-core call per answer
+ANSWER_ADAPTERS: Dict[str, TypeAdapter] = {
+    "classifier": TypeAdapter(ClassifierAnswer),
+    "classifier_batch": TypeAdapter(ClassifierBatchAnswer),
+    "food_parser": TypeAdapter(FoodAnswer),
+    "exercise_parser": TypeAdapter(ExerciseAnswer),
+    "combined_parser": TypeAdapter(CombinedAnswer),
+}
+
+# Compact-schema answers are expanded before validation
+_EXPAND = {"food_parser": expand_food_response, "exercise_parser": expand_exercise_response}
+
+REASK_PROMPT = """{prompt}
+
+Your previous answer could not be used ({error}):
+{answer}
+
+Reply with ONLY the corrected JSON object."""
+
+# Longest previous answer quoted back in a re-ask
+REASK_ANSWER_CHARS = 2000
+
+
+class AnswerError(ValueError):
+    """
+    An answer that is not usable even after local repair. partial holds the
+    validated complete part of an answer that was cut off, if any.
+    """
+
+    def __init__(self, raw: str, error: str, partial: Any = None):
+        super().__init__(error)
+        self.raw = raw
+        self.error = error
+        self.partial = partial
+
+
+def reask_enabled() -> bool:
+    return os.getenv("LLM_REASK_ENABLED", "true").lower() == "true"
+
+
+def reask_prompt(prompt: str, raw: str, error: str) -> str:
+    return REASK_PROMPT.format(prompt=prompt.rstrip(), error=error, answer=raw[:REASK_ANSWER_CHARS])
+
+
+def rejected_generation(exc: BaseException) -> Optional[str]:
+    """
+    The answer a provider refused in JSON mode (Groq answers 400
+    json_validate_failed with the text as failed_generation), so it can be
+    repaired instead of failing the request.
+    """
+    body = getattr(exc, "body", None)
+    if not isinstance(body, dict):
+        return None
+    error = body.get("error", body)
+    if not isinstance(error, dict) or error.get("code") != "json_validate_failed":
+        return None
+    generation = error.get("failed_generation")
+    return generation if isinstance(generation, str) else None
+
+
+# ---------- Parsing ----------
+def parse_answer(node: str, content: str) -> Tuple[Any, bool]:
+    """
+    The node's validated answer and whether it needed repair.
+    Raises AnswerError when it is not usable.
+    """
+    raw = content.strip()
+    if raw.startswith("```"):
+        # A fenced answer is normal model behaviour, not a repair
+        raw = _FENCE_RE.match(raw).group(1)
+    try:
+        return _validate(node, json.loads(raw, strict=False)), False
+    except json.JSONDecodeError as e:
+        decoded, truncated = _decode_repaired(raw)
+        if decoded is None:
+            raise AnswerError(raw, f"not valid JSON: {e.msg} at line {e.lineno} column {e.colno}") from None
+    except ValidationError as e:
+        raise AnswerError(raw, _describe(e)) from None
+
+    try:
+        answer = _validate(node, decoded)
+    except ValidationError as e:
+        raise AnswerError(raw, _describe(e)) from None
+    if truncated:
+        # What followed the last complete item (more items, the totals) is lost
+        raise AnswerError(raw, "the answer was cut off before it was complete; answer more briefly", answer)
+    return answer, True
+
+
+def _validate(node: str, value: Any) -> Any:
+    expand = _EXPAND.get(node)
+    if expand is not None and isinstance(value, dict):
+        value = expand(value)
+    return ANSWER_ADAPTERS[node].validate_python(value)
+
+
+def _describe(error: ValidationError) -> str:
+    problems = [
+        f"{'.'.join(map(str, e['loc'])) or 'answer'}: {e['msg']}" for e in error.errors()[:3]
+    ]
+    return "; ".join(problems)
+
+
+# ---------- Local repair ----------
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)\s*(?:```|$)", re.S | re.I)
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+_PY_LITERAL_RE = re.compile(r"\b(None|True|False)\b")
+_PY_LITERALS = {"None": "null", "True": "true", "False": "false"}
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "„": '"'})
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def _decode_repaired(raw: str) -> Tuple[Optional[Any], bool]:
+    """(value, truncated), or (None, False) when nothing can be recovered."""
+    repaired = repair_json(raw)
+    if repaired is None:
+        return None, False
+    text, truncated = repaired
+    try:
+        return json.loads(_PY_LITERAL_RE.sub(lambda m: _PY_LITERALS[m.group()], text), strict=False), truncated
+    except json.JSONDecodeError:
+        pass
+    # Single-quoted, Python-style objects
+    try:
+        value = ast.literal_eval(text)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return None, False
+    return (value, truncated) if isinstance(value, (dict, list)) else (None, False)
+
+
+def repair_json(raw: str) -> Optional[Tuple[str, bool]]:
+    """
+    The JSON value in raw, cleaned up as far as that is mechanical, and
+    whether it had been cut off; None when there is no object or array to
+    recover.
+    """
+    fenced = _FENCE_RE.search(raw)
+    text = fenced.group(1) if fenced else raw
+
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        return None
+    text = text[min(starts):].translate(_SMART_QUOTES)
+    text = _TRAILING_COMMA_RE.sub(r"\1", text)
+    return _balance(text)
+
+
+def _balance(text: str) -> Optional[Tuple[str, bool]]:
+    """
+    Cut text after its first complete top-level value (dropping prose after
+    it). Output cut off mid-value is closed after the last complete element.
+    """
+    stack: List[str] = []
+    in_string = escaped = False
+    last_complete: Optional[Tuple[int, List[str]]] = None
+
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in _CLOSERS:
+            stack.append(char)
+        elif char in "}]":
+            if not stack or _CLOSERS[stack[-1]] != char:
+                return None
+            stack.pop()
+            if not stack:
+                return text[: i + 1], False
+            last_complete = (i + 1, list(stack))
+
+    if last_complete is None:
+        return None
+    end, open_brackets = last_complete
+    head = text[:end].rstrip().rstrip(",")
+    return head + "".join(_CLOSERS[b] for b in reversed(open_brackets)), True
+
+
+# ---------- Stats ----------
+class ParseStats:
+    """
+    Per-node answer outcomes: answers parsed, repaired locally, re-asked,
+    used only in part (cut off, low confidence), and failed for good.
+    """
+
+    EVENTS = ("answers", "repaired", "reasked", "reask_recovered", "partial", "failed")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Dict[str, int]] = {}
+
+    def count(self, node: str, event: str):
+        with self._lock:
+            counts = self._counts.setdefault(node, dict.fromkeys(self.EVENTS, 0))
+            counts[event] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = {node: dict(c) for node, c in self._counts.items()}
+        for c in counts.values():
+            answers = c["answers"] or 1
+            c["repair_rate"] = round(c["repaired"] / answers, 4)
+            c["reask_rate"] = round(c["reasked"] / answers, 4)
+            c["partial_rate"] = round(c["partial"] / answers, 4)
+            c["failure_rate"] = round(c["failed"] / answers, 4)
+        return counts
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+_parse_stats = ParseStats()
+
+
+def get_parse_stats() -> ParseStats:
+    return _parse_stats
@@ -0,0 +1,217 @@
+"""
+Telemetry for the LLM pipeline.
+Histograms of per-stage wall time, token counts and response sizes, counters
+for parse failures and stage errors, and a per-request trace (carried in a
+contextvar) listing what each stage cost, e.g.:
+    classifier.llm 410ms -> classifier.parse 0.1ms -> food_parser.llm 980ms -> db 12ms
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("llm_service")
+
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+SIZE_BUCKETS_BYTES = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 65536)
+
+METRIC_BUCKETS = {
+    "stage_ms": LATENCY_BUCKETS_MS,
+    "prompt_tokens": TOKEN_BUCKETS,
+    "completion_tokens": TOKEN_BUCKETS,
+    "response_bytes": SIZE_BUCKETS_BYTES,
+}
+
+
+class Histogram:
+    """Fixed-bucket histogram; percentiles are reported as bucket upper bounds."""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot: overflow
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, pct: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = pct / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return self.buckets[i] if i < len(self.buckets) else self.max
+        return self.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        labels = [f"le_{b:g}" for b in self.buckets] + ["overflow"]
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 2) if self.count else 0.0,
+            "max": round(self.max, 2),
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "buckets": {label: n for label, n in zip(labels, self.counts) if n},
+        }
+
+
+class Trace:
+    """Stages of one request, in completion order, with their cost."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+        self.spans: List[Dict[str, Any]] = []
+        self.total_ms: Optional[float] = None
+
+    def add(self, stage: str, started: float, ms: float, **attrs):
+        span = {"stage": stage, "start_ms": round((started - self._started) * 1000, 2), "ms": round(ms, 2)}
+        span.update(attrs)
+        with self._lock:
+            self.spans.append(span)
+
+    def finish(self):
+        self.total_ms = round((time.perf_counter() - self._started) * 1000, 2)
+
+    def server_timing(self) -> str:
+        """Server-Timing header value, one entry per span."""
+        entries = [f"{span['stage']};dur={span['ms']}" for span in self.spans]
+        if self.total_ms is not None:
+            entries.append(f"total;dur={self.total_ms}")
+        return ", ".join(entries)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"name": self.name, "total_ms": self.total_ms, "spans": list(self.spans)}
+
+
+class Telemetry:
+    """Process-wide histograms, counters and a ring of recent traces."""
+
+    def __init__(self, recent_traces: int = 20):
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._counters: Dict[Tuple[str, str], int] = {}
+        self._recent = deque(maxlen=recent_traces)
+
+    def observe(self, metric: str, label: str, value: float):
+        with self._lock:
+            histogram = self._histograms.get((metric, label))
+            if histogram is None:
+                histogram = self._histograms[(metric, label)] = Histogram(METRIC_BUCKETS[metric])
+            histogram.observe(value)
+
+    def increment(self, counter: str, label: str):
+        with self._lock:
+            self._counters[(counter, label)] = self._counters.get((counter, label), 0) + 1
+
+    def record_trace(self, trace: Trace):
+        with self._lock:
+            self._recent.append(trace)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            grouped: Dict[str, Dict[str, Any]] = {metric: {} for metric in METRIC_BUCKETS}
+            for (metric, label), histogram in sorted(self._histograms.items()):
+                grouped[metric][label] = histogram.snapshot()
+
+            counters: Dict[str, Dict[str, int]] = {"parse_failures": {}, "errors": {}}
+            for (counter, label), n in sorted(self._counters.items()):
+                counters.setdefault(counter, {})[label] = n
+
+            recent = list(self._recent)
+
+        return {**grouped, **counters, "recent_traces": [t.to_dict() for t in recent]}
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._recent.clear()
+
+
+_telemetry = Telemetry()
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("llm_trace", default=None)
+
+
+def get_telemetry() -> Telemetry:
+    return _telemetry
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def traced(name: str):
+    """Start a per-request trace; spans recorded inside (incl. child tasks/threads) join it."""
+    trace = Trace(name)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        try:
+            _current_trace.reset(token)
+        except ValueError:
+            pass  # closed from another context, e.g. an abandoned streaming response
+        trace.finish()
+        _telemetry.record_trace(trace)
+
+
+@contextmanager
+def span(stage: str):
+    """
+    Time a stage into the stage_ms histogram and the current trace.
+    Yields a dict; anything the caller puts in it is attached to the span.
+    """
+    attrs: Dict[str, Any] = {}
+    started = time.perf_counter()
+    try:
+        yield attrs
+    except Exception as e:
+        attrs["error"] = type(e).__name__
+        _telemetry.increment("errors", stage)
+        raise
+    finally:
+        ms = (time.perf_counter() - started) * 1000
+        _telemetry.observe("stage_ms", stage, ms)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add(stage, started, ms, **attrs)
+
+
+def record_llm_response(node: str, response, attrs: Optional[Dict[str, Any]] = None):
+    """Token counts (when the client reports them) and response size for one call."""
+    usage = getattr(response, "usage_metadata", None) or {}
+    content = getattr(response, "content", "") or ""
+    size = len(content.encode("utf-8")) if isinstance(content, str) else 0
+
+    _telemetry.observe("response_bytes", node, size)
+    if usage:
+        _telemetry.observe("prompt_tokens", node, usage.get("input_tokens", 0))
+        _telemetry.observe("completion_tokens", node, usage.get("output_tokens", 0))
+
+    if attrs is not None:
+        attrs["response_bytes"] = size
+        if usage:
+            attrs["prompt_tokens"] = usage.get("input_tokens", 0)
+            attrs["completion_tokens"] = usage.get("output_tokens", 0)
+
+
+def record_parse_failure(node: str, raw: str):
+    _telemetry.increment("parse_failures", node)
+    logger.warning("%s returned invalid JSON: %.500s", node, raw)
@@ -2,18 +2,25 @@ from fastapi import Depends, FastAPI, Request, dependencies
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 from dotenv import load_dotenv
+import asyncio
 import os
+import time
 
 from auth_service.api import router as auth_router
 from auth_service.dependencies import get_current_user
 from database.database import SessionLocal, engine, Base
-from llm_service.api import router as llm_router
+from llm_service.api import router as llm_router, ws_router as llm_ws_router, log_jobs
+from llm_service.jobs import get_job_queue
+from food_or_workout_log_service.enrichment import get_enricher
 from profile_service.api import router as profile_router
 from goal_service.api import router as goal_router
 from weight_service.api import router as weight_router
 from water_service.api import router as water_router
 from food_or_workout_log_service.api import router as food_or_workout_router
 from speect_to_text.api import router as speech_to_text_router
+from speect_to_text.service import load_assemblyai
+from llm_service.service import warm_up as warm_up_llm
+from llm_service.http_pool import warm_connections
 from fastapi import Depends
 
 load_dotenv()
@@ -55,6 +62,8 @@ async def add_db_session(request: Request, call_next):
 app.include_router(auth_router, prefix="/auth", tags=["auth"])
 app.include_router(llm_router, prefix="/llm", tags=["llm"],
                     dependencies=[Depends(get_current_user)])
+# Authenticates from the ?token= query parameter instead of the bearer header
+app.include_router(llm_ws_router, prefix="/llm", tags=["llm"])
 app.include_router(profile_router,
                     dependencies=[Depends(get_current_user)])
 app.include_router(goal_router,
@@ -68,9 +77,52 @@ app.include_router(food_or_workout_router,
 app.include_router(speech_to_text_router,
                     dependencies=[Depends(get_current_user)])
 
+async def warm_up():
+    """
+    Import the LLM and speech-to-text stacks and open provider connections in
+    the background, so the first request doesn't pay for it.
+    """
+    steps = (
+        ("llm", lambda: asyncio.to_thread(warm_up_llm)),
+        # Runs on the serving loop, which owns the async connection pool
+        ("llm_connections", warm_connections),
+        # load_assemblyai returns the module; only the load time is worth logging
+        ("speech_to_text", lambda: asyncio.to_thread(lambda: load_assemblyai() and None)),
+    )
+    for name, load in steps:
+        started = time.perf_counter()
+        try:
+            result = await load()
+        except Exception as e:
+            # Not fatal: the stack loads again on first use and reports the error there
+            print(f"Warm-up of {name} failed: {e!r}")
+        else:
+            detail = f" ({result})" if result is not None else ""
+            print(f"Warmed up {name} in {time.perf_counter() - started:.2f}s{detail}")
+
+
 @app.on_event("startup")
 async def startup_event():
     print("Starting up the Calorie Tracking API...")
+    # AI logging job workers run on the serving loop (and requeue durable jobs)
+    await log_jobs()
+    # Re-parses logs estimated while the LLM was degraded, once it recovers
+    enricher = get_enricher()
+    if enricher is not None:
+        enricher.start()
+    # Heavy imports stay off the import path; load them once the app is serving
+    if os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true":
+        app.state.warm_up = asyncio.create_task(warm_up())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await get_job_queue().stop()
+    enricher = get_enricher()
+    if enricher is not None:
+        await enricher.stop()
+
+
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the App"}
\ No newline at end of file
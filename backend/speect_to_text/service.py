@@ -10,11 +10,20 @@ from io import BytesIO
 from typing import Optional
 
 import aiofiles
-import assemblyai as aai
 from fastapi import HTTPException
 
 logger = logging.getLogger(__name__)
 
+aai = None  # assemblyai, imported on first use (slow to import)
+
+
+def load_assemblyai():
+    global aai
+    if aai is None:
+        import assemblyai
+        aai = assemblyai
+    return aai
+
 
 class SpeechToTextService:
     """Service for transcribing audio using AssemblyAI API"""
@@ -27,7 +36,7 @@ class SpeechToTextService:
                 "ASSEMBLYAI_API_KEY environment variable is not set. "
                 "Please configure it before using the speech-to-text service."
             )
-        aai.settings.api_key = self.api_key
+        load_assemblyai().settings.api_key = self.api_key
 
     async def transcribe_audio(
         self, 
@@ -174,11 +174,14 @@ export const goalsApi = {
 
 // Food/Workout logging
 export const loggingApi = {
-  log: (input: string) => {
-    // For now, just send the input
-    // The backend will handle LLM processing
-    return api.post('/food-or-workout/log', { input });
+  log: (input: string, intent?: 'food' | 'exercise') => {
+    // The backend will handle LLM processing; an intent hint (the tab the
+    // user is on) skips its classification step
+    return api.post('/food-or-workout/log', intent ? { input, intent } : { input });
   },
+  // Several entries in one request (up to 20); each result reports whether it was logged
+  logBatch: (entries: { input: string; intent?: 'food' | 'exercise' }[]) =>
+    api.post('/food-or-workout/log/batch', { entries }),
   today: () => api.get('/food-or-workout/today'),
   logs: () => api.get('/food-or-workout/logs/today'),  // Fetch all logs for today
 };
@@ -0,0 +1,49 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from langchain_core.messages import AIMessage
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from benchmarks.fixtures import SAMPLES, compact_response, totals
+from llm_service.compact_schema import FOOD_KEYS, expand_food_response, expand_streamed_item
+from llm_service.graph import nodes
+
+
+@pytest.mark.parametrize("text", [t for t, (foods, _) in SAMPLES.items() if foods])
+def test_compact_food_response_expands_to_the_full_shape(text):
+    foods, _ = SAMPLES[text]
+    full = {"type": "food", "items": foods, "total": totals(foods)}
+
+    compact = json.dumps(compact_response(foods, FOOD_KEYS), separators=(",", ":"))
+    state = nodes.handle_food_response({}, AIMessage(content=compact))
+
+    assert state["parsed_data"] == full["items"]
+    # Totals are computed server-side from the items
+    assert state["nutrition"] == full["total"]
+    assert len(compact) < len(json.dumps(full)) * 0.7
+
+
+def test_compact_items_tolerate_bad_numbers_and_pass_full_items_through():
+    parsed = expand_food_response({"items": [
+        {"n": "toast", "q": 1, "kc": "80", "pr": None, "cb": 14.7},
+        {"name": "egg", "calories_kcal": 78},
+    ]})
+    assert parsed["items"][0]["name"] == "toast" and parsed["items"][0]["calories_kcal"] == 0
+    assert parsed["total"]["calories_kcal"] == 78
+    assert parsed["total"]["carbs_g"] == 14.7
+
+    # Full-schema responses are left alone, totals included
+    full = {"type": "food", "items": [{"name": "egg"}], "total": {"calories_kcal": 1}}
+    assert expand_food_response(full) is full
+
+
+def test_streamed_items_are_expanded_per_parser():
+    item = {"n": "running", "min": 30, "km": 5, "kc": 350}
+    assert expand_streamed_item("exercise_parser", item) == {
+        "name": "running", "duration_minutes": 30, "distance_km": 5, "calories_estimate": 350,
+    }
+    assert expand_streamed_item("combined_parser", item) is item
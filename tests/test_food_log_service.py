@@ -0,0 +1,130 @@
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from database.database import Base, get_db
+from auth_service.dependencies import get_current_user
+from auth_service.models import User
+from food_or_workout_log_service import api
+from food_or_workout_log_service.models import FoodLog, LogType
+from food_or_workout_log_service.service import process_llm_log, process_llm_logs
+
+
+@pytest.fixture
+def db():
+    """Create an isolated in-memory database session."""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    session.add(User(id=1, email="user@example.com", full_name="Test User"))
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_food_log_updates_consumed_totals(db):
+    """Test that a food log reduces remaining calories and macros."""
+    daily = process_llm_log(db, 1, {
+        "input": "2 eggs",
+        "intent": "food",
+        "parsed_data": [{"name": "egg", "quantity": 2, "calories_kcal": 140, "protein_g": 12}],
+        "nutrition": {"calories_kcal": 140, "protein_g": 12, "carbs_g": 1, "fat_g": 10},
+    })
+
+    assert daily.consumed_calories == 140
+    assert daily.remaining_calories == 2200 - 140
+    assert db.query(FoodLog).one().type == LogType.food
+
+
+def test_mixed_log_applies_food_and_exercise_in_one_call(db):
+    """Test that a mixed log records both deltas and tags items by kind."""
+    daily = process_llm_log(db, 1, {
+        "input": "had a burger then ran 5k",
+        "intent": "mixed",
+        "parsed_data": [
+            {"kind": "food", "name": "burger", "calories_kcal": 550, "protein_g": 25},
+            {"kind": "exercise", "name": "running", "calories_estimate": 320},
+        ],
+        "nutrition": {
+            "calories_kcal": 550, "protein_g": 25, "carbs_g": 40, "fat_g": 30,
+            "burned_calories_kcal": 320,
+        },
+    })
+
+    assert daily.consumed_calories == 550
+    assert daily.burned_calories == 320
+    assert daily.remaining_calories == 2200 - 550 + 320
+
+    types = {log.name: log.type for log in db.query(FoodLog).all()}
+    assert types == {"burger": LogType.food, "running": LogType.exercise}
+
+
+def food(text, calories):
+    return {
+        "input": text,
+        "intent": "food",
+        "parsed_data": [{"name": text, "calories_kcal": calories}],
+        "nutrition": {"calories_kcal": calories, "protein_g": 5, "carbs_g": 10, "fat_g": 2},
+    }
+
+
+def test_batch_applies_every_entry_in_one_commit(db, monkeypatch):
+    """Test that a batch is applied with a single commit for the logs."""
+    commits = []
+    real_commit = db.commit
+    monkeypatch.setattr(db, "commit", lambda: (commits.append(1), real_commit()))
+
+    daily = process_llm_logs(db, 1, [food("toast", 150), food("banana", 100), food("latte", 120)])
+
+    assert daily.consumed_calories == 370
+    assert daily.consumed_protein == 15
+    assert db.query(FoodLog).count() == 3
+    # daily row, the logs, best-effort meal memory
+    assert len(commits) == 3
+
+
+def test_batch_endpoint_reports_failed_entries(db, monkeypatch):
+    """Test that one failed entry does not stop the rest from being logged."""
+    async def parse(text, user_id=None, intent=None):
+        if text == "gibberish":
+            raise HTTPException(status_code=422, detail="Could not parse input")
+        return food(text, 200)
+
+    monkeypatch.setattr(api, "process_user_input_async", parse)
+    app = FastAPI()
+    app.include_router(api.router)
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: db.get(User, 1)
+
+    response = TestClient(app).post("/food-or-workout/log/batch", json={"entries": [
+        {"input": "oatmeal"}, {"input": "gibberish"}, {"input": "apple", "intent": "food"},
+    ]})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [r["logged"] for r in body["results"]] == [True, False, True]
+    assert body["results"][1]["status_code"] == 422
+    assert body["daily"]["consumed_calories"] == 400
+    assert "db.process_llm_logs" in response.headers["Server-Timing"]
+
+
+def test_batch_endpoint_limits_entries(db):
+    app = FastAPI()
+    app.include_router(api.router)
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: db.get(User, 1)
+
+    entries = [{"input": "apple"}] * (api.MAX_BATCH_ENTRIES + 1)
+    assert TestClient(app).post("/food-or-workout/log/batch", json={"entries": entries}).status_code == 422
+    assert TestClient(app).post("/food-or-workout/log/batch", json={"entries": []}).status_code == 422
@@ -0,0 +1,136 @@
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from database.database import Base
+from auth_service.models import User
+from food_or_workout_log_service import memory
+from food_or_workout_log_service.memory import (
+    FoodMemory,
+    NoUsualMealError,
+    quick_log_data,
+    recall_meal,
+    remember,
+    top_memory,
+)
+from food_or_workout_log_service.models import FoodLog, LogType, UserFoodMemory
+from food_or_workout_log_service.service import process_llm_log
+
+OATS = {
+    "input": "Oats with banana",
+    "intent": "food",
+    "parsed_data": [
+        {"name": "oats", "quantity": 40, "unit": "g", "calories_kcal": 150, "protein_g": 5},
+        {"name": "banana", "quantity": 1, "unit": "piece", "calories_kcal": 105, "protein_g": 1.3},
+    ],
+    "nutrition": {"calories_kcal": 255, "protein_g": 6.3, "carbs_g": 50, "fat_g": 3},
+}
+EGGS = {
+    "input": "2 eggs",
+    "intent": "food",
+    "parsed_data": [{"name": "egg", "quantity": 2, "unit": "piece", "calories_kcal": 140, "protein_g": 12}],
+    "nutrition": {"calories_kcal": 140, "protein_g": 12, "carbs_g": 1, "fat_g": 10},
+}
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """Isolated in-memory database and a fresh memory cache."""
+    monkeypatch.setattr(memory, "_food_memory", FoodMemory())
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    session.add(User(id=1, email="user@example.com", full_name="Test User"))
+    session.commit()
+    yield session
+    session.close()
+
+
+def at(hour):
+    return datetime.now().replace(hour=hour, minute=0)
+
+
+def test_exact_repeat_is_recalled_without_llm(db):
+    process_llm_log(db, 1, OATS)
+
+    result = recall_meal(db, 1, "oats  with Banana!")
+    assert result["source"] == "memory"
+    assert result["parsed_data"] == OATS["parsed_data"]
+    assert result["input"] == "oats  with Banana!"
+    assert recall_meal(db, 1, "oats with apple") is None
+
+
+def test_usual_meal_resolves_to_most_frequent_in_slot(db):
+    remember(db, 1, OATS, at(8))
+    remember(db, 1, OATS, at(9))
+    remember(db, 1, EGGS, at(8))
+    remember(db, 1, EGGS, at(13))
+    remember(db, 1, EGGS, at(14))
+    db.commit()
+
+    assert recall_meal(db, 1, "my usual breakfast")["parsed_data"] == OATS["parsed_data"]
+    assert recall_meal(db, 1, "had my usual lunch")["parsed_data"] == EGGS["parsed_data"]
+    assert recall_meal(db, 1, "the usual", now=at(7))["memory_key"] == "oats with banana"
+
+    with pytest.raises(NoUsualMealError) as excinfo:
+        recall_meal(db, 1, "my usual dinner")
+    assert excinfo.value.status_code == 404
+
+
+def test_relogging_recalled_meal_counts_towards_it(db):
+    process_llm_log(db, 1, OATS)
+    process_llm_log(db, 1, recall_meal(db, 1, "my usual breakfast", now=at(8)))
+
+    meal = db.query(UserFoodMemory).filter_by(kind="meal").one()
+    assert meal.key == "oats with banana"
+    assert meal.use_count == 2
+
+
+def test_snapshot_is_served_from_hot_cache_until_next_log(db):
+    process_llm_log(db, 1, EGGS)
+    cache = memory.get_food_memory()
+
+    recall_meal(db, 1, "2 eggs")
+    recall_meal(db, 1, "2 eggs")
+    assert cache.stats()["loads"] == 1
+    assert cache.stats()["hits"] == 1
+
+    process_llm_log(db, 1, OATS)            # invalidates
+    assert recall_meal(db, 1, "oats with banana") is not None
+    assert cache.stats()["loads"] == 2
+
+
+def test_memory_is_backfilled_from_food_logs(db):
+    created = datetime(2024, 1, 1, 8, 0)
+    for item in OATS["parsed_data"]:
+        db.add(FoodLog(user_id=1, type=LogType.food, raw_input="Oats with banana", created_at=created, **item))
+    db.commit()
+
+    result = recall_meal(db, 1, "oats with banana")
+    assert sorted(i["name"] for i in result["parsed_data"]) == ["banana", "oats"]
+    assert result["nutrition"]["calories_kcal"] == 255
+
+
+def test_top_items_and_quick_log(db):
+    process_llm_log(db, 1, EGGS)
+    process_llm_log(db, 1, EGGS)
+    process_llm_log(db, 1, OATS)
+
+    top = top_memory(db, 1, kind="item", limit=2)
+    assert top[0].label == "egg"
+    assert top[0].use_count == 2
+    assert len(top) == 2
+
+    data = quick_log_data(top[0], servings=1.5)
+    assert data["parsed_data"][0]["quantity"] == 3
+    assert data["nutrition"]["calories_kcal"] == 210
+
+    daily = process_llm_log(db, 1, data)
+    assert daily.consumed_calories == 140 * 2 + 255 + 210
@@ -0,0 +1,88 @@
+import asyncio
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from llm_service import http_pool, llm_client
+from llm_service.http_pool import HTTPPool
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b'{"data": []}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def provider():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def test_warmed_connections_are_reused(provider, monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+    pool = HTTPPool(base_url=provider)
+
+    async def run():
+        assert await pool.warm(connections=2) == 2
+        for _ in range(5):
+            await pool.async_client.get(f"{provider}/openai/v1/chat")
+
+    asyncio.run(run())
+    stats = pool.stats()
+
+    assert stats["requests"] == 7
+    assert stats["connects"] == 2
+    assert stats["async_connections"] == {"open": 2, "idle": 2, "active": 0}
+    assert stats["reuse_ratio"] == round(1 - 2 / 7, 4)
+
+
+def test_warm_up_failures_are_not_fatal(monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+    pool = HTTPPool(base_url="http://127.0.0.1:9")
+    assert asyncio.run(pool.warm(connections=2, timeout=1)) == 0
+    assert pool.stats()["errors"] == 2
+
+
+def test_warm_up_is_skipped_without_an_api_key(provider, monkeypatch):
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+    pool = HTTPPool(base_url=provider)
+
+    assert asyncio.run(pool.warm(connections=2)) == 0
+    assert pool.stats()["requests"] == 0
+
+
+def test_http2_needs_h2(monkeypatch):
+    monkeypatch.setattr(http_pool.importlib.util, "find_spec", lambda name: None)
+    assert HTTPPool(http2=True).http2 is False
+
+
+def test_node_clients_share_the_pool(monkeypatch):
+    monkeypatch.setenv("LLM_BACKEND", "groq")
+    monkeypatch.setenv("GROQ_API_KEY", "fake")
+    monkeypatch.setattr(llm_client, "_clients", {})
+    monkeypatch.setattr(http_pool, "_http_pool", None)
+
+    classifier = llm_client.get_llm("classifier")
+    parser = llm_client.get_llm("food_parser")
+
+    pool = http_pool.get_http_pool()
+    assert classifier.http_async_client is parser.http_async_client is pool.async_client
+    assert classifier.http_client is pool.client
@@ -0,0 +1,134 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from langchain_core.messages import AIMessage
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from llm_service import intent_rules
+from llm_service.graph import nodes
+from llm_service.graph.workflow import build_graph
+from llm_service.intent_rules import classify_by_rules
+from llm_service import service
+from llm_service.cache import ResultCache
+from llm_service.semantic_cache import SemanticCache
+from llm_service.service import accept_intent_hint, lookup_cached_result, process_user_input
+
+
+@pytest.mark.parametrize("text, intent", [
+    ("2 boiled eggs and toast", "food"),
+    ("I ate a big bowl of pasta for dinner", "food"),
+    ("ran 5k", "exercise"),
+    ("3x10 squats", "exercise"),
+    ("had a burger then ran 5k", "mixed"),
+])
+def test_obvious_inputs_are_confident(text, intent):
+    verdict = classify_by_rules(text)
+    assert verdict.intent == intent
+    assert verdict.confidence >= 0.9
+
+
+def test_weak_or_conflicting_evidence_is_not_confident():
+    assert classify_by_rules("some pizza").confidence < 0.9
+    # "had" is food evidence against the exercise reading
+    assert classify_by_rules("had a 5k run").confidence < classify_by_rules("ran 5k").confidence
+    assert classify_by_rules("feeling great today").intent is None
+
+
+class IntentLLM:
+    """Classifies everything as exercise and parses one run."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        if "Classify" in prompt:
+            return AIMessage(content=json.dumps({"type": "exercise"}))
+        return AIMessage(content=json.dumps({
+            "items": [{"name": "running", "duration_minutes": 30, "calories_estimate": 300}],
+        }))
+
+
+def run_graph(monkeypatch, mode, text):
+    monkeypatch.setenv("LLM_LOCAL_PARSER_ENABLED", "false")
+    monkeypatch.setenv("LLM_RULE_CLASSIFIER_MODE", mode)
+    monkeypatch.setattr(intent_rules, "_rule_classifier", None)
+    llm = IntentLLM()
+    monkeypatch.setattr(nodes, "llm", llm)
+
+    state = build_graph("two_step").invoke({"input": text, "intent": None, "user_id": 1})
+    return state, llm
+
+
+def test_confident_verdict_skips_llm_classifier(monkeypatch):
+    state, llm = run_graph(monkeypatch, "on", "ran 5k")
+
+    assert state["intent"] == "exercise"
+    assert len(llm.prompts) == 1 and "Classify" not in llm.prompts[0]
+    assert intent_rules.get_rule_classifier().stats()["decided"] == 1
+
+
+def test_unsure_verdict_defers_to_llm(monkeypatch):
+    state, llm = run_graph(monkeypatch, "on", "did 50 push ups")
+
+    assert state["intent"] == "exercise"
+    assert "Classify" in llm.prompts[0]
+    assert intent_rules.get_rule_classifier().stats()["deferred"] == 1
+
+
+def test_shadow_mode_records_agreement(monkeypatch):
+    run_graph(monkeypatch, "shadow", "ran 5k")
+    rules = intent_rules.get_rule_classifier()
+    nodes.observe_rule_agreement({"input": "2 boiled eggs and toast", "intent": "exercise"})
+
+    stats = rules.stats()
+    assert stats["decided"] == 0
+    assert stats["compared"] == 2
+    assert stats["agreement"] == 0.5
+    assert stats["by_confidence"]["0.95"]["compared"] == 2
+    assert stats["disagreements"] == {"food->exercise": 1}
+
+
+@pytest.mark.parametrize("mode", ["two_step", "single_pass"])
+def test_intent_hint_goes_straight_to_its_parser(monkeypatch, mode):
+    monkeypatch.setenv("LLM_LOCAL_PARSER_ENABLED", "false")
+    llm = IntentLLM()
+    monkeypatch.setattr(nodes, "llm", llm)
+
+    state = build_graph(mode).invoke({"input": "did 50 push ups", "intent": "exercise", "user_id": 1})
+
+    assert state["parsed_data"][0]["name"] == "running"
+    [prompt] = llm.prompts
+    assert "Classify" not in prompt and "exercise" in prompt.lower()
+
+
+def test_confident_rules_override_a_wrong_tab_hint(monkeypatch):
+    monkeypatch.setenv("LLM_RULE_CLASSIFIER_MODE", "shadow")
+    monkeypatch.setattr(intent_rules, "_rule_classifier", None)
+
+    assert accept_intent_hint("2 boiled eggs and toast", "exercise") is None
+    assert accept_intent_hint("did 50 push ups", "exercise") == "exercise"
+    assert intent_rules.get_rule_classifier().stats()["hints"] == {"accepted": 1, "overridden": 1}
+
+    with pytest.raises(ValueError):
+        accept_intent_hint("had a burger then ran 5k", "mixed")
+
+
+def test_hinted_results_stay_out_of_the_shared_caches(monkeypatch):
+    """Test that a result routed by a tab hint is never served to an unhinted caller."""
+    monkeypatch.setenv("LLM_LOCAL_PARSER_ENABLED", "false")
+    monkeypatch.setenv("LLM_ITEM_CACHE_ENABLED", "false")
+    monkeypatch.setattr(intent_rules, "_rule_classifier", None)
+    monkeypatch.setattr(service, "get_result_cache", lambda cache=ResultCache(): cache)
+    monkeypatch.setattr(service, "get_semantic_cache", lambda cache=SemanticCache(): cache)
+    monkeypatch.setattr(nodes, "llm", IntentLLM())
+
+    hinted = process_user_input("protein shake", user_id=1, intent="exercise")
+    assert hinted["intent"] == "exercise"
+
+    _, cached = lookup_cached_result("protein shake")
+    assert cached is None
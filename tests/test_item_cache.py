@@ -0,0 +1,135 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from langchain_core.messages import AIMessage
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from llm_service.graph import nodes
+from llm_service.item_cache import ItemCache
+
+EGGS = {"name": "boiled egg", "quantity": 2, "unit": "piece", "preparation": "boiled",
+        "calories_kcal": 155, "protein_g": 12.6, "carbs_g": 1.1, "fat_g": 10.6, "fiber_g": 0, "confidence": 0.9}
+TOAST = {"name": "toast", "quantity": 1, "unit": "slice", "preparation": "toasted",
+         "calories_kcal": 80, "protein_g": 3, "carbs_g": 14, "fat_g": 1, "fiber_g": 1, "confidence": 0.8}
+RICE = {"name": "rice", "quantity": 200, "unit": "g", "preparation": "cooked",
+        "calories_kcal": 260, "protein_g": 5.4, "carbs_g": 56, "fat_g": 0.6, "fiber_g": 0.8, "confidence": 0.9}
+
+
+def learned(*pairs):
+    cache = ItemCache()
+    for text, items in pairs:
+        cache.learn(cache.plan(text), items)
+    return cache
+
+
+def test_quantity_scales_from_what_was_learned():
+    """Test that "3 eggs" reuses the per-egg nutrition learned from "2 eggs"."""
+    cache = learned(("2 boiled eggs", [EGGS]))
+
+    [item] = cache.plan("3 boiled eggs").known.values()
+    assert item["quantity"] == 3
+    assert item["calories_kcal"] == 232.5
+    assert item["unit"] == "piece"
+
+
+def test_weights_scale_and_units_stay_separate():
+    cache = learned(("200g rice", [RICE]))
+
+    assert cache.plan("150 grams rice").known[0]["calories_kcal"] == 195
+    # A cup of rice was never learned, so it still needs the LLM
+    assert cache.plan("1 cup rice").unknown == [0]
+
+
+def test_partial_plan_sends_only_unknown_phrases():
+    cache = learned(("2 boiled eggs and toast", [EGGS, TOAST]))
+
+    plan = cache.plan("toast, 1 boiled egg and 200g rice")
+    assert sorted(plan.known) == [0, 1]
+    assert plan.llm_input == "200 g rice"
+
+    items = plan.merge([RICE])
+    assert [item["name"] for item in items] == ["toast", "boiled egg", "rice"]
+
+
+def test_untrusted_items_are_not_learned():
+    low = dict(TOAST, confidence=0.3)
+    cache = learned(("toast", [low]), ("2 boiled eggs and toast", [dict(EGGS, name="egg and toast")]))
+
+    assert cache.plan("toast").unknown == [0]
+    # One merged item for two phrases: neither phrase can claim it
+    assert cache.plan("2 boiled eggs").unknown == [0]
+    assert cache.stats()["learned"] == 0
+
+
+def test_reordered_items_are_paired_by_name():
+    """Test that the LLM answering in a different order never swaps nutrition between foods."""
+    cache = learned(("2 boiled eggs and 200g rice", [RICE, dict(EGGS, name="egg")]))
+
+    [egg] = cache.plan("3 boiled eggs").known.values()
+    assert egg["calories_kcal"] == 232.5
+    assert cache.plan("100g rice").known[0]["calories_kcal"] == 130
+
+    # Same count, but a name that matches no phrase: nothing is learned
+    cache = learned(("2 boiled eggs", [dict(TOAST, quantity=2)]))
+    assert cache.stats()["learned"] == 0
+
+
+class PromptLog:
+    def __init__(self, items):
+        self.items = items
+        self.prompts = []
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        return AIMessage(content=json.dumps({"type": "food", "items": self.items, "total": {"calories_kcal": 1}}))
+
+    async def ainvoke(self, prompt):
+        return self.invoke(prompt)
+
+
+@pytest.fixture
+def item_cache(monkeypatch):
+    cache = ItemCache()
+    monkeypatch.setattr(nodes, "get_item_cache", lambda: cache)
+    return cache
+
+
+def test_food_parser_only_asks_llm_for_new_items(item_cache, monkeypatch):
+    first = PromptLog([EGGS, TOAST])
+    monkeypatch.setattr(nodes, "llm", first)
+    nodes.food_parser_node({"input": "2 boiled eggs and toast", "intent": "food"})
+
+    second = PromptLog([RICE])
+    monkeypatch.setattr(nodes, "llm", second)
+    state = asyncio.run(nodes.afood_parser_node({"input": "3 boiled eggs with 200g rice", "intent": "food"}))
+
+    [prompt] = second.prompts
+    assert "200 g rice" in prompt and "egg" not in prompt.split("User input:")[1]
+    assert [item["name"] for item in state["parsed_data"]] == ["boiled egg", "rice"]
+    assert state["nutrition"]["calories_kcal"] == 232.5 + 260
+
+
+def test_fully_cached_input_skips_llm(item_cache, monkeypatch):
+    monkeypatch.setattr(nodes, "llm", PromptLog([EGGS, TOAST]))
+    nodes.food_parser_node({"input": "2 boiled eggs and toast", "intent": "food"})
+
+    unused = PromptLog([])
+    monkeypatch.setattr(nodes, "llm", unused)
+    state = nodes.food_parser_node({"input": "toast and 4 boiled eggs", "intent": "food"})
+
+    assert unused.prompts == []
+    assert state["source"] == "item_cache"
+    assert state["nutrition"]["calories_kcal"] == 80 + 310
+
+
+def test_mixed_inputs_bypass_the_item_cache(item_cache, monkeypatch):
+    llm = PromptLog([EGGS])
+    monkeypatch.setattr(nodes, "llm", llm)
+
+    nodes.food_parser_node({"input": "2 boiled eggs then ran 5k", "intent": "mixed"})
+    assert item_cache.stats()["learned"] == 0
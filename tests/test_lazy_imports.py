@@ -0,0 +1,34 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# Add backend directory to path
+BACKEND = Path(__file__).parent.parent / "backend"
+sys.path.insert(0, str(BACKEND))
+
+from benchmarks.import_profile import LAZY_STACKS
+
+
+def imported_after(statement):
+    """Top-level packages loaded by running statement in a fresh interpreter."""
+    code = f"{statement}; import sys; print(' '.join(sorted({{m.split('.')[0] for m in sys.modules}})))"
+    env = dict(os.environ, DATABASE_URL="sqlite://", WARMUP_ON_STARTUP="false")
+    proc = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND, capture_output=True, text=True, env=env, check=True,
+    )
+    return set(proc.stdout.split())
+
+
+def test_importing_the_app_skips_llm_and_stt_stacks():
+    assert not imported_after("import main") & set(LAZY_STACKS)
+
+
+def test_warm_up_loads_the_graph_and_clients(monkeypatch):
+    # Building the Groq clients needs a key, never a real one
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+    loaded = imported_after(
+        "import os; os.environ['LLM_BACKEND'] = 'groq'; "
+        "from llm_service.service import warm_up; warm_up()"
+    )
+    assert {"langgraph", "langchain_groq"} <= loaded
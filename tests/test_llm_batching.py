@@ -0,0 +1,142 @@
+import asyncio
+import json
+import re
+import sys
+from pathlib import Path
+
+import pytest
+from langchain_core.messages import AIMessage
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from llm_service import batching
+from llm_service.batching import MicroBatcher
+from llm_service.graph import nodes
+
+
+def test_concurrent_submissions_share_one_batch():
+    calls = []
+
+    async def run_batch(items):
+        calls.append(items)
+        return [item * 10 for item in items]
+
+    async def main():
+        batcher = MicroBatcher(run_batch, window_seconds=0.01, max_size=16)
+        return await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+    assert asyncio.run(main()) == [0, 10, 20, 30, 40]
+    assert calls == [[0, 1, 2, 3, 4]]
+
+
+def test_full_batches_flush_without_waiting_for_window():
+    calls = []
+
+    async def run_batch(items):
+        calls.append(items)
+        return items
+
+    async def main():
+        batcher = MicroBatcher(run_batch, window_seconds=60, max_size=3)
+        return await asyncio.wait_for(asyncio.gather(*(batcher.submit(i) for i in range(6))), 1)
+
+    assert asyncio.run(main()) == list(range(6))
+    assert calls == [[0, 1, 2], [3, 4, 5]]
+
+
+def test_items_accumulate_while_batches_are_in_flight():
+    """Test that batches grow under load instead of staying one window wide."""
+    calls = []
+
+    async def run_batch(items):
+        calls.append(items)
+        await asyncio.sleep(0.05)
+        return items
+
+    async def main():
+        batcher = MicroBatcher(run_batch, window_seconds=0.001, max_size=16, max_in_flight=1)
+        first = asyncio.ensure_future(batcher.submit("a"))
+        await asyncio.sleep(0.01)                       # "a" is now in flight
+        rest = [asyncio.ensure_future(batcher.submit(x)) for x in "bcd"]
+        await asyncio.sleep(0.01)
+        return await asyncio.gather(first, *rest)
+
+    assert asyncio.run(main()) == ["a", "b", "c", "d"]
+    assert calls == [["a"], ["b", "c", "d"]]
+
+
+def test_batch_failure_reaches_every_waiter():
+    async def run_batch(items):
+        raise RuntimeError("provider down")
+
+    async def main():
+        batcher = MicroBatcher(run_batch, window_seconds=0.001)
+        return await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert [type(r) for r in results] == [RuntimeError, RuntimeError]
+
+
+class ClassifierLLM:
+    """Answers single and batched classifier prompts; batch answers can be tampered with."""
+
+    def __init__(self, intents, batch_answer=None):
+        self.intents = intents
+        self.batch_answer = batch_answer
+        self.prompts = []
+
+    async def ainvoke(self, prompt):
+        self.prompts.append(prompt)
+        if "numbered" in prompt:
+            if self.batch_answer is not None:
+                return AIMessage(content=self.batch_answer)
+            texts = [json.loads(q) for q in re.findall(r'^\d+\. (".*")$', prompt, re.MULTILINE)]
+            results = [{"id": i, "type": self.intents[t]} for i, t in enumerate(texts, 1)]
+            return AIMessage(content=json.dumps({"results": results}))
+        text = prompt.rsplit("Input:", 1)[1].strip()
+        return AIMessage(content=json.dumps({"type": self.intents[text]}))
+
+
+INTENTS = {"2 eggs": "food", "ran 5k": "exercise", "burger then ran 5k": "mixed"}
+
+
+@pytest.fixture
+def batched(monkeypatch):
+    monkeypatch.setenv("LLM_CLASSIFIER_BATCH_ENABLED", "true")
+    monkeypatch.setenv("LLM_CLASSIFIER_BATCH_WINDOW_MS", "10")
+    monkeypatch.setattr(batching, "_classifier_batcher", None)
+
+
+def classify_all(texts):
+    async def main():
+        states = await asyncio.gather(*(nodes.aclassify_node({"input": t, "user_id": 1}) for t in texts))
+        return [state["intent"] for state in states]
+    return asyncio.run(main())
+
+
+def test_concurrent_classifications_use_one_prompt(batched, monkeypatch):
+    llm = ClassifierLLM(INTENTS)
+    monkeypatch.setattr(nodes, "llm", llm)
+
+    assert classify_all(list(INTENTS)) == list(INTENTS.values())
+    assert len(llm.prompts) == 1
+    assert batching.classifier_batch_stats()["avg_size"] == 3
+
+
+def test_unusable_batch_answers_fall_back_to_single_calls(batched, monkeypatch):
+    partial = json.dumps({"results": [{"id": 1, "type": "food"}, {"id": 2, "type": "dance"}]})
+    llm = ClassifierLLM(INTENTS, batch_answer=partial)
+    monkeypatch.setattr(nodes, "llm", llm)
+
+    assert classify_all(list(INTENTS)) == list(INTENTS.values())
+    # One batch, then single calls for the invalid and the missing answer
+    assert len(llm.prompts) == 3
+
+
+def test_unparseable_batch_answer_falls_back_for_everyone(batched, monkeypatch):
+    llm = ClassifierLLM(INTENTS, batch_answer="not json")
+    monkeypatch.setattr(nodes, "llm", llm)
+
+    assert classify_all(["2 eggs", "ran 5k"]) == ["food", "exercise"]
+    assert len(llm.prompts) == 3
@@ -0,0 +1,88 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from llm_service.cache import ResultCache, normalize_input
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.parametrize("a, b", [
+    ("2 boiled eggs and toast", "  Two Boiled Eggs and toast!! "),
+    ("200g chicken breast", "200 G chicken-breast"),
+    ("1.0 cup rice", "one cup rice"),
+    ("1,000 ml water", "1000ml water."),
+    ("1/2 cup oats", "0.50 cup oats"),
+])
+def test_normalize_input_folds_equivalent_inputs(a, b):
+    """Test that formatting-only differences map to the same key."""
+    assert normalize_input(a) == normalize_input(b)
+
+
+def test_normalize_input_keeps_quantities_distinct():
+    """Test that different quantities never share a key."""
+    assert normalize_input("2 eggs") != normalize_input("3 eggs")
+    assert normalize_input("1.5 cups rice") != normalize_input("15 cups rice")
+
+
+def test_cache_hit_miss_and_copy_semantics():
+    """Test counters and that callers cannot mutate cached values."""
+    cache = ResultCache(max_entries=10)
+    assert cache.get("k") is None
+
+    cache.set("k", {"parsed_data": [{"name": "egg"}]})
+    value = cache.get("k")
+    value["parsed_data"].clear()
+
+    assert cache.get("k") == {"parsed_data": [{"name": "egg"}]}
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+
+
+def test_cache_evicts_least_recently_used():
+    """Test that the entry bound evicts the LRU entry first."""
+    cache = ResultCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_respects_byte_budget():
+    """Test that the byte budget evicts entries even under the entry bound."""
+    cache = ResultCache(max_entries=100, max_bytes=64)
+    for i in range(10):
+        cache.set(f"key-{i}", "x" * 20)
+
+    stats = cache.stats()
+    assert stats["bytes"] <= 64
+    assert stats["evictions"] > 0
+
+
+def test_cache_entries_expire():
+    """Test that entries past their TTL are treated as misses."""
+    clock = FakeClock()
+    cache = ResultCache(ttl_seconds=10, clock=clock)
+    cache.set("k", 1)
+
+    clock.now = 9
+    assert cache.get("k") == 1
+
+    clock.now = 11
+    assert cache.get("k") is None
+    assert cache.stats()["expirations"] == 1
@@ -0,0 +1,189 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from auth_service.models import User
+from database.database import Base
+from food_or_workout_log_service import enrichment
+from food_or_workout_log_service.enrichment import Enricher
+from food_or_workout_log_service.models import DailyNutrition, FoodLog, PendingEnrichment
+from food_or_workout_log_service.service import process_llm_log
+from llm_service import degradation
+from llm_service.degradation import DegradationController, estimate_locally
+from llm_service.graph import nodes
+from llm_service.service import process_user_input_async
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def degraded_controller(clock):
+    controller = DegradationController(
+        p95_threshold_ms=1000, min_samples=5, probe_interval_seconds=10, recovery_probes=2, clock=clock
+    )
+    for _ in range(5):
+        controller.record(2.0, failed=False)
+    return controller
+
+
+def test_slow_calls_degrade_and_healthy_probes_recover():
+    clock = FakeClock()
+    controller = degraded_controller(clock)
+    assert controller.degraded
+    assert controller.stats()["reason"].startswith("p95 2000 ms")
+
+    # One probe per interval while degraded
+    assert not controller.allow_probe()
+    clock.now = 10
+    assert controller.allow_probe()
+    assert not controller.allow_probe()
+
+    controller.record(0.2, failed=False)
+    controller.record(3.0, failed=False)     # too slow: the streak starts over
+    controller.record(0.2, failed=False)
+    assert controller.degraded
+    controller.record(0.2, failed=False)
+    assert not controller.degraded
+    assert controller.stats()["transitions"] == 1
+
+
+def test_error_rate_degrades():
+    controller = DegradationController(min_samples=4, error_rate_threshold=0.5, clock=FakeClock())
+    for failed in (True, False, True, True):
+        controller.record(0.1, failed=failed)
+    assert controller.degraded
+    assert "error rate" in controller.reason
+
+
+def test_local_estimate_is_low_confidence_and_keeps_unknown_items():
+    estimate = estimate_locally("2 eggs and mystery stew")
+
+    assert estimate["source"] == "estimate" and estimate["low_confidence"]
+    egg, stew = estimate["parsed_data"]
+    assert egg["name"] == "egg" and egg["calories_kcal"] > 0 and egg["confidence"] <= 0.5
+    assert stew["name"] == "mystery stew" and stew["calories_kcal"] == 0
+    assert estimate["nutrition"]["calories_kcal"] == egg["calories_kcal"]
+
+    assert estimate_locally("ran 5k") is None
+    assert estimate_locally("mystery stew") is None
+
+
+class FailingLLM:
+    def invoke(self, prompt):
+        raise AssertionError("the LLM should not be called while degraded")
+
+    async def ainvoke(self, prompt):
+        self.invoke(prompt)
+
+
+def test_degraded_requests_are_estimated_without_the_llm(monkeypatch):
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "false")
+    monkeypatch.setenv("LLM_SEMANTIC_CACHE_ENABLED", "false")
+    monkeypatch.setattr(degradation, "_controller", degraded_controller(FakeClock()))
+    monkeypatch.setattr(nodes, "llm", FailingLLM())
+
+    result = asyncio.run(process_user_input_async("2 eggs and mystery stew", user_id=1))
+
+    assert result["source"] == "estimate"
+    assert degradation.get_degradation_controller().stats()["estimated"] == 1
+    # Confident local parses keep their usual path and confidence
+    assert asyncio.run(process_user_input_async("2 eggs", user_id=1))["source"] == "local"
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine, expire_on_commit=False)
+    session = factory()
+    session.add(User(id=1, email="user@example.com", full_name="Test User"))
+    session.commit()
+    session.close()
+    return factory
+
+
+def test_estimated_log_is_replaced_once_the_llm_recovers(session_factory, monkeypatch):
+    monkeypatch.setattr(degradation, "_controller", None)
+    db = session_factory()
+    process_llm_log(db, 1, estimate_locally("2 eggs and mystery stew"))
+    assert db.query(PendingEnrichment).one().status == "pending"
+    db.close()
+
+    async def parse(text, user_id=None, intent=None, degrade=True):
+        assert not degrade
+        return {
+            "input": text,
+            "intent": "food",
+            "parsed_data": [
+                {"name": "egg", "quantity": 2, "calories_kcal": 150, "protein_g": 12, "confidence": 0.9},
+                {"name": "beef stew", "quantity": 1, "calories_kcal": 400, "protein_g": 30, "confidence": 0.8},
+            ],
+            "nutrition": {"calories_kcal": 550, "protein_g": 42, "carbs_g": 20, "fat_g": 25},
+            "source": "llm",
+        }
+
+    monkeypatch.setattr(enrichment, "process_user_input_async", parse)
+    enricher = Enricher(session_factory=session_factory)
+    assert asyncio.run(enricher.run_once()) == 1
+
+    db = session_factory()
+    assert {log.name for log in db.query(FoodLog)} == {"egg", "beef stew"}
+    daily = db.query(DailyNutrition).one()
+    assert daily.consumed_calories == pytest.approx(550)
+    assert daily.consumed_protein == pytest.approx(42)
+    assert db.query(PendingEnrichment).one().status == "done"
+    assert asyncio.run(enricher.run_once()) == 0
+
+
+def test_failing_log_is_given_up_without_blocking_the_queue(session_factory, monkeypatch):
+    monkeypatch.setattr(degradation, "_controller", None)
+    db = session_factory()
+    # The oldest pending log is the one the LLM keeps rejecting
+    process_llm_log(db, 1, estimate_locally("2 eggs and mystery stew"))
+    process_llm_log(db, 1, estimate_locally("1 banana"))
+    db.close()
+
+    async def parse(text, user_id=None, intent=None, degrade=True):
+        if "stew" in text:
+            raise ValueError("content filter")
+        return {
+            "input": text,
+            "intent": "food",
+            "parsed_data": [{"name": "banana", "quantity": 1, "calories_kcal": 105}],
+            "nutrition": {"calories_kcal": 105},
+            "source": "llm",
+        }
+
+    monkeypatch.setattr(enrichment, "process_user_input_async", parse)
+    enricher = Enricher(max_attempts=2, session_factory=session_factory)
+    assert asyncio.run(enricher.run_once()) == 1
+    assert asyncio.run(enricher.run_once()) == 0
+
+    db = session_factory()
+    tasks = {task.raw_input: task for task in db.query(PendingEnrichment)}
+    assert tasks["1 banana"].status == "done"
+    failed = tasks["2 eggs and mystery stew"]
+    assert (failed.status, failed.attempts) == ("failed", 2)
+    assert "content filter" in failed.last_error
+    assert enricher.stats()["given_up"] == 1
+
+
+def test_enrichment_waits_while_degraded(session_factory, monkeypatch):
+    monkeypatch.setattr(degradation, "_controller", degraded_controller(FakeClock()))
+    enricher = Enricher(session_factory=session_factory)
+
+    assert asyncio.run(enricher.run_once()) == 0
+    assert enricher.stats()["skipped_degraded"] == 1
@@ -0,0 +1,163 @@
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from auth_service.dependencies import get_current_user
+from auth_service.models import User
+from database.database import Base, get_db
+from llm_service import api, jobs
+from llm_service.jobs import DBJobStore, Job, JobNotFoundError, JobQueue, JobQueueFullError
+from llm_service.models import LogJob
+
+
+async def parse(user_id, text):
+    await asyncio.sleep(0.01)
+    if text == "gibberish":
+        raise HTTPException(422, "Could not parse input")
+    return {"llm_result": {"input": text}, "daily_nutrition": {"consumed_calories": 100}}
+
+
+def test_jobs_run_in_the_background_and_report_results():
+    async def scenario():
+        queue = JobQueue(workers=2)
+        await queue.start(parse)
+        ok = await queue.submit(1, "2 eggs")
+        bad = await queue.submit(1, "gibberish")
+        assert ok.status == "queued"
+
+        ok = await queue.wait(ok.id, 1, timeout=5)
+        bad = await queue.wait(bad.id, 1, timeout=5)
+        await queue.stop()
+        return queue, ok, bad
+
+    queue, ok, bad = asyncio.run(scenario())
+    assert ok.payload()["llm_result"] == {"input": "2 eggs"}
+    assert ok.payload()["daily_nutrition"]["consumed_calories"] == 100
+    assert bad.status == "failed" and bad.error == {"status": 422, "detail": "Could not parse input"}
+    assert queue.stats()["completed"] == 1 and queue.stats()["failed"] == 1
+
+
+def test_idempotency_key_ownership_and_limit():
+    async def scenario():
+        queue = JobQueue(workers=1, max_pending=1)
+        await queue.start(parse)
+        first = await queue.submit(1, "2 eggs", idempotency_key="abc")
+        assert await queue.submit(1, "2 eggs", idempotency_key="abc") is first
+
+        with pytest.raises(JobNotFoundError):
+            await queue.get(first.id, user_id=2)
+        # The worker has taken the first job; one more fits, the next does not
+        await asyncio.sleep(0)
+        await queue.submit(1, "toast")
+        with pytest.raises(JobQueueFullError) as e:
+            await queue.submit(1, "banana")
+        await queue.stop()
+        return queue, e.value
+
+    queue, error = asyncio.run(scenario())
+    assert error.status_code == 429 and "Retry-After" in error.headers
+    assert queue.stats()["deduplicated"] == 1 and queue.stats()["rejected"] == 1
+
+
+@pytest.fixture
+def db_store():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine, expire_on_commit=False)
+    session = session_factory()
+    session.add(User(id=1, email="user@example.com", full_name="Test User"))
+    session.commit()
+    session.close()
+    return DBJobStore(session_factory)
+
+
+def test_durable_store_requeues_queued_jobs_and_fails_interrupted_ones(db_store):
+    db_store.save(Job(id="queued", user_id=1, text="2 eggs"))
+    db_store.save(Job(id="running", user_id=1, text="toast", status="running"))
+    db_store.save(Job(id="old", user_id=1, text="tea", status="done",
+                      finished_at=datetime.now() - timedelta(hours=1)))
+
+    async def scenario():
+        queue = JobQueue(workers=1, retention_seconds=60, store=db_store)
+        await queue.start(parse)
+        job = await queue.wait("queued", 1, timeout=5)
+        await queue.stop()
+        return job
+
+    assert asyncio.run(scenario()).status == "done"
+    assert db_store.get("queued").payload()["llm_result"] == {"input": "2 eggs"}
+    assert db_store.get("running").status == "failed"
+    assert db_store.get("old") is None
+
+
+def test_idempotency_key_is_unique_across_processes(db_store):
+    async def scenario():
+        # Two processes over one database: neither knows the other's in-memory keys
+        first = JobQueue(workers=1, store=db_store)
+        second = JobQueue(workers=1, store=db_store)
+        await first.start(parse)
+        await second.start(parse)
+        jobs = [await queue.submit(1, "2 eggs", idempotency_key="k1") for queue in (first, second)]
+        await first.stop()
+        await second.stop()
+        return jobs, second.stats()
+
+    (original, repeat), stats = asyncio.run(scenario())
+    assert repeat.id == original.id
+    assert stats["submitted"] == 0 and stats["deduplicated"] == 1
+    # The unique constraint catches submits that both missed the lookup
+    duplicate = Job(id="duplicate", user_id=1, text="2 eggs", idempotency_key="k1")
+    assert db_store.save(duplicate).id == original.id
+    assert db_store.get("duplicate") is None
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(jobs, "_job_queue", None)
+    monkeypatch.setattr(api, "run_log_job", parse)
+    monkeypatch.setattr(api, "load_profile_and_goal", lambda db, user_id: (object(), object()))
+    monkeypatch.setattr(api, "user_from_token", lambda token: SimpleNamespace(id=1))
+
+    app = FastAPI()
+    app.include_router(api.router, prefix="/llm")
+    app.include_router(api.ws_router, prefix="/llm")
+    app.dependency_overrides[get_db] = lambda: None
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=1)
+    with TestClient(app) as client:
+        yield client
+
+
+def test_job_endpoints_accept_then_deliver_by_poll_and_websocket(client):
+    response = client.post("/llm/log/jobs", json={"text": "2 eggs"}, headers={"Idempotency-Key": "k1"})
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    assert response.headers["Location"] == f"/llm/log/jobs/{job_id}"
+
+    retry = client.post("/llm/log/jobs", json={"text": "2 eggs"}, headers={"Idempotency-Key": "k1"})
+    assert retry.json()["job_id"] == job_id
+
+    polled = client.get(f"/llm/log/jobs/{job_id}", params={"wait": 5}).json()
+    assert polled["status"] == "done"
+    assert polled["daily_nutrition"]["consumed_calories"] == 100
+
+    second = client.post("/llm/log/jobs", json={"text": "gibberish"}).json()["job_id"]
+    with client.websocket_connect(f"/llm/log/jobs/{second}/ws?token=t") as ws:
+        messages = [ws.receive_json()]
+        if messages[0]["status"] not in ("done", "failed"):
+            messages.append(ws.receive_json())
+    assert messages[-1]["status"] == "failed"
+    assert messages[-1]["error"]["status"] == 422
+
+    assert client.get("/llm/log/jobs/missing").status_code == 404
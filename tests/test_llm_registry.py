@@ -0,0 +1,120 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from langchain_core.messages import AIMessage
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from llm_service import llm_client
+from llm_service.graph import nodes
+from llm_service.llm_client import DEFAULT_MODEL, SMALL_MODEL, get_llm_config
+from llm_service.resilience import LLMUnavailableError, ResiliencePolicy
+from llm_service.service import get_llm_stats
+from llm_service.telemetry import traced
+
+
+def test_classifier_defaults_to_the_small_model():
+    assert get_llm_config("classifier").model == SMALL_MODEL
+    assert get_llm_config("classifier").max_tokens == 64
+    assert get_llm_config("food_parser").model == DEFAULT_MODEL
+
+
+def test_env_overrides_one_node_only(monkeypatch):
+    monkeypatch.setenv("LLM_MODEL", "big")
+    monkeypatch.setenv("LLM_EXERCISE_PARSER_MODEL", "medium")
+    monkeypatch.setenv("LLM_EXERCISE_PARSER_TEMPERATURE", "0.3")
+    monkeypatch.setenv("LLM_EXERCISE_PARSER_TIMEOUT_SECONDS", "5")
+
+    config = get_llm_config("exercise_parser")
+    assert (config.model, config.temperature, config.timeout) == ("medium", 0.3, 5.0)
+    assert get_llm_config("food_parser").model == "big"
+
+    with pytest.raises(ValueError):
+        get_llm_config("summarizer")
+
+
+def test_live_clients_are_shared_per_distinct_config(monkeypatch):
+    monkeypatch.setenv("LLM_BACKEND", "groq")
+    monkeypatch.setenv("GROQ_API_KEY", "fake")
+    monkeypatch.setattr(llm_client, "_clients", {})
+
+    classifier = llm_client.get_llm("classifier")
+    food = llm_client.get_llm("food_parser")
+
+    assert classifier.model_name == SMALL_MODEL
+    assert classifier.max_tokens == 64
+    assert food.model_name == DEFAULT_MODEL
+    assert llm_client.get_llm("exercise_parser") is food
+
+
+class ModelLLM:
+    def __init__(self, content):
+        self.content = content
+        self.calls = 0
+
+    async def ainvoke(self, prompt):
+        self.calls += 1
+        return AIMessage(content=json.dumps(self.content))
+
+
+def test_nodes_call_their_registry_client(monkeypatch):
+    """Test that each node reaches its own client and reports the model it used."""
+    clients = {
+        "classifier": ModelLLM({"type": "exercise"}),
+        "exercise_parser": ModelLLM({"type": "exercise", "exercise": {"name": "run", "calories_burned": 300}}),
+    }
+    monkeypatch.setattr(nodes, "get_llm", lambda node: clients[node])
+
+    async def run():
+        with traced("test") as trace:
+            state = await nodes.aclassify_node({"input": "ran 5k", "user_id": 1})
+            await nodes.aexercise_parser_node(state)
+        return trace
+
+    trace = asyncio.run(run())
+    assert [c.calls for c in clients.values()] == [1, 1]
+
+    models = {s["stage"]: s["model"] for s in trace.spans if "model" in s}
+    assert models == {"classifier.llm": SMALL_MODEL, "exercise_parser.llm": DEFAULT_MODEL}
+
+    stats = get_llm_stats()["models"]
+    assert stats["classifier"]["model"] == SMALL_MODEL
+    assert stats["classifier"]["latency_ms"]["count"] >= 1
+
+
+def test_per_node_timeout_overrides_the_policy_default():
+    policy = ResiliencePolicy(attempt_timeout=10, max_attempts=1)
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    with pytest.raises(LLMUnavailableError):
+        asyncio.run(policy.acall("classifier", slow, timeout=0.01))
+    assert policy.stats()["timeouts"] == 1
+
+
+def test_short_node_timeouts_survive_a_local_backlog(monkeypatch):
+    """Test that queueing behind other calls never eats into the classifier's timeout."""
+    from llm_service import resilience, scheduler
+
+    monkeypatch.setenv("LLM_CLASSIFIER_TIMEOUT_SECONDS", "0.1")
+    monkeypatch.setattr(scheduler, "_scheduler", scheduler.LLMScheduler(max_concurrency=1, max_wait_seconds=10))
+    monkeypatch.setattr(resilience, "_policy", ResiliencePolicy(max_attempts=1))
+
+    class SlowLLM:
+        async def ainvoke(self, prompt):
+            await asyncio.sleep(0.04)
+            return AIMessage(content='{"type": "food"}')
+
+    monkeypatch.setattr(nodes, "llm", SlowLLM())
+
+    async def run():
+        states = [{"input": f"meal {i}", "user_id": i} for i in range(6)]
+        return await asyncio.gather(*(nodes.aclassify_single(state) for state in states))
+
+    assert asyncio.run(run()) == ["food"] * 6
+    assert resilience.get_resilience_policy().stats()["timeouts"] == 0
@@ -0,0 +1,127 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from langchain_core.messages import AIMessage
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from benchmarks.fixtures import SAMPLES, classifier_batch_resolver, write_recordings
+from llm_service import llm_client
+from llm_service.replay import (
+    LatencyModel,
+    RecordingLLM,
+    ReplayLLM,
+    ReplayMissError,
+    load_recordings,
+    prompt_key,
+)
+
+
+class EchoLLM:
+    def invoke(self, prompt):
+        return AIMessage(content=f"echo: {prompt}")
+
+    async def ainvoke(self, prompt):
+        return self.invoke(prompt)
+
+
+def test_prompt_key_ignores_whitespace():
+    """Test that reformatted prompts still hit their recording."""
+    assert prompt_key("Input:\n  2 eggs\n") == prompt_key("Input: 2 eggs")
+    assert prompt_key("2 eggs") != prompt_key("3 eggs")
+
+
+def test_record_then_replay_round_trip(tmp_path):
+    """Test that recorded calls are served back offline, sync and async."""
+    path = tmp_path / "recordings.jsonl"
+    recorder = RecordingLLM(EchoLLM(), path)
+    recorder.invoke("classify: 2 eggs")
+    asyncio.run(recorder.ainvoke("parse: 2 eggs"))
+
+    replay = ReplayLLM(load_recordings(path))
+    assert replay.invoke("classify: 2 eggs").content == "echo: classify: 2 eggs"
+    assert asyncio.run(replay.ainvoke("parse: 2 eggs")).content == "echo: parse: 2 eggs"
+
+    with pytest.raises(ReplayMissError):
+        replay.invoke("never recorded")
+    assert replay.stats()["hits"] == 2
+    assert replay.stats()["misses"] == 1
+
+
+def test_replay_default_response_on_miss():
+    """Test that a default response covers unrecorded prompts."""
+    replay = ReplayLLM({}, default_response='{"type": "food"}')
+    assert replay.invoke("anything").content == '{"type": "food"}'
+
+
+def test_batch_resolver_answers_batched_classifier_prompts():
+    """Test that batch prompts, which cannot be recorded verbatim, are answered from the samples."""
+    from llm_service.prompts.classifier_batch import CLASSIFIER_BATCH_PROMPT
+
+    replay = ReplayLLM({}, resolver=classifier_batch_resolver())
+    prompt = CLASSIFIER_BATCH_PROMPT.format(inputs='1. "ran 5k in 30 minutes"\n2. "coffee with milk"')
+
+    answer = json.loads(replay.invoke(prompt).content)
+    assert answer == {"results": [{"id": 1, "type": "exercise"}, {"id": 2, "type": "food"}]}
+    with pytest.raises(ReplayMissError):
+        replay.invoke("something else")
+
+
+@pytest.mark.parametrize("spec, low, high", [
+    ("none", 0, 0),
+    ("fixed:250", 0.25, 0.25),
+    ("uniform:100:200", 0.1, 0.2),
+    ("lognormal:400:0.3", 0.05, 5),
+])
+def test_latency_model_specs(spec, low, high):
+    """Test that latency samples fall inside the configured distribution."""
+    model = LatencyModel(spec, seed=7)
+    samples = [model.sample() for _ in range(200)]
+    assert all(low <= s <= high for s in samples)
+
+
+@pytest.mark.parametrize("spec", ["gaussian:1", "fixed", "uniform:1"])
+def test_latency_model_rejects_bad_specs(spec):
+    with pytest.raises(ValueError):
+        LatencyModel(spec)
+
+
+def test_get_llm_selects_replay_backend(tmp_path, monkeypatch):
+    """Test that LLM_BACKEND=replay swaps the client for the fixture replayer."""
+    path = tmp_path / "fixtures.jsonl"
+    write_recordings(path)
+    monkeypatch.setenv("LLM_BACKEND", "replay")
+    monkeypatch.setenv("LLM_REPLAY_FILE", str(path))
+    monkeypatch.setattr(llm_client, "_llm_instance", None)
+
+    llm = llm_client.get_llm()
+    assert isinstance(llm, ReplayLLM)
+    # classifier, food, exercise and combined parsers, plus the compact food/exercise variants
+    assert llm.stats()["recordings"] == len(SAMPLES) * 6
+
+
+@pytest.mark.parametrize("mode, schema", [("two_step", "full"), ("single_pass", "full"), ("two_step", "compact")])
+def test_fixtures_cover_every_graph_prompt(tmp_path, monkeypatch, mode, schema):
+    """Test that each sample runs through the graph on recordings alone."""
+    from llm_service.graph import nodes
+    from llm_service.graph.workflow import build_graph
+    from llm_service.service import initial_state
+
+    path = tmp_path / "fixtures.jsonl"
+    write_recordings(path)
+    replay = ReplayLLM(load_recordings(path))
+    monkeypatch.setattr(nodes, "llm", replay)
+    monkeypatch.setenv("LLM_LOCAL_PARSER_ENABLED", "false")
+    monkeypatch.setenv("LLM_ITEM_CACHE_ENABLED", "false")
+    monkeypatch.setenv("LLM_PARSER_SCHEMA", schema)
+
+    graph = build_graph(mode)
+    for text, (foods, exercises) in SAMPLES.items():
+        result = graph.invoke(initial_state(text))
+        assert len(result["parsed_data"]) == len(foods) + len(exercises)
+
+    assert replay.stats()["misses"] == 0
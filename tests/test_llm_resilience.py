@@ -0,0 +1,217 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from llm_service.resilience import CircuitBreaker, LLMUnavailableError, ResiliencePolicy
+from llm_service.scheduler import LLMOverloadedError
+
+
+def make_policy(**kwargs):
+    kwargs.setdefault("retry_base_seconds", 0)
+    kwargs.setdefault("retry_max_wait_seconds", 0)
+    return ResiliencePolicy(**kwargs)
+
+
+class Flaky:
+    """Fails with the given errors, then returns "ok"."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+def test_transient_errors_are_retried():
+    """Test that connection errors are retried until a call succeeds."""
+    policy = make_policy(max_attempts=3)
+    fn = Flaky(httpx.ConnectError("boom"), httpx.ConnectError("boom"))
+
+    assert policy.call("classifier", fn) == "ok"
+    assert fn.calls == 3
+    assert policy.stats()["retries"] == 2
+    assert policy.stats()["failures"]["transient"] == 2
+
+
+def test_permanent_errors_are_not_retried():
+    """Test that non-transient errors surface immediately."""
+    policy = make_policy(max_attempts=3)
+    fn = Flaky(ValueError("bad request"))
+
+    with pytest.raises(ValueError):
+        policy.call("classifier", fn)
+    assert fn.calls == 1
+    assert policy.breaker.stats()["consecutive_failures"] == 0
+
+
+def test_scheduler_rejections_are_not_retried():
+    """Test that our own 429 passes straight through the policy."""
+    policy = make_policy(max_attempts=3)
+    fn = Flaky(LLMOverloadedError("queue full", 2))
+
+    with pytest.raises(LLMOverloadedError):
+        policy.call("classifier", fn)
+    assert fn.calls == 1
+
+
+def test_exhausted_retries_become_503():
+    """Test that a provider that keeps failing yields a 503 with Retry-After."""
+    policy = make_policy(max_attempts=2)
+    fn = Flaky(*[httpx.ConnectError("down")] * 5)
+
+    with pytest.raises(LLMUnavailableError) as exc:
+        policy.call("classifier", fn)
+    assert exc.value.status_code == 503
+    assert "Retry-After" in exc.value.headers
+    assert fn.calls == 2
+
+
+def test_breaker_opens_fails_fast_and_recovers():
+    """Test closed -> open -> half-open -> closed transitions."""
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=30, clock=lambda: now[0])
+    policy = make_policy(max_attempts=1, breaker=breaker)
+
+    for _ in range(2):
+        with pytest.raises(LLMUnavailableError):
+            policy.call("classifier", Flaky(httpx.ConnectError("down")))
+    assert breaker.stats()["state"] == "open"
+
+    # Open: fails fast without calling the provider
+    fn = Flaky()
+    with pytest.raises(LLMUnavailableError, match="circuit open"):
+        policy.call("classifier", fn)
+    assert fn.calls == 0
+    assert breaker.stats()["short_circuited"] == 1
+
+    # After the reset window one trial call goes through and closes the breaker
+    now[0] = 31
+    assert policy.call("classifier", fn) == "ok"
+    assert breaker.stats()["state"] == "closed"
+    assert breaker.stats()["opened_count"] == 1
+
+
+def test_async_attempt_timeout_is_enforced():
+    """Test that a hung async call times out per attempt and is retried."""
+    policy = make_policy(attempt_timeout=0.05, max_attempts=2)
+    calls = []
+
+    async def hang():
+        calls.append(1)
+        await asyncio.sleep(10)
+
+    with pytest.raises(LLMUnavailableError):
+        asyncio.run(policy.acall("classifier", hang))
+    assert len(calls) == 2
+    assert policy.stats()["timeouts"] == 2
+
+
+def test_slow_async_call_is_hedged():
+    """Test that a call past the latency percentile races a second request."""
+    policy = make_policy(hedge_percentile=95)
+    for _ in range(50):
+        policy._record_success("classifier", time.monotonic())  # seed ~0s latencies
+
+    delays = [1.0, 0.0]
+
+    async def call():
+        await asyncio.sleep(delays.pop(0))
+        return "ok"
+
+    async def main():
+        return await asyncio.wait_for(policy.acall("classifier", call), 0.5)
+
+    assert asyncio.run(main()) == "ok"
+    assert policy.stats()["hedges"] == {"launched": 1, "won": 1}
+
+
+@pytest.mark.parametrize("content", ["not json", '{"type": "snack"}', '["food"]'])
+def test_classifier_falls_back_to_food(content):
+    """Test that malformed classifier output no longer raises."""
+    from llm_service.graph.nodes import handle_classifier_response
+
+    state = handle_classifier_response({"input": "x"}, SimpleNamespace(content=content))
+    assert state["intent"] == "food"
+
+
+def test_queue_wait_does_not_count_against_the_attempt_timeout():
+    """Test that callers queued behind a healthy provider neither time out nor trip the breaker."""
+    from llm_service.scheduler import LLMScheduler
+
+    scheduler = LLMScheduler(max_concurrency=1, max_wait_seconds=10)
+    policy = make_policy(attempt_timeout=0.1, breaker=CircuitBreaker(failure_threshold=2))
+
+    async def provider():
+        await asyncio.sleep(0.03)
+        return "ok"
+
+    async def main():
+        calls = [policy.acall("classifier", provider, slot=scheduler.aslot) for _ in range(8)]
+        return await asyncio.gather(*calls)
+
+    assert asyncio.run(main()) == ["ok"] * 8
+    stats = policy.stats()
+    assert stats["timeouts"] == 0 and stats["retries"] == 0
+    assert stats["breaker"]["state"] == "closed"
+
+
+def test_queue_rejections_are_not_breaker_failures():
+    """Test that a full local queue answers 429 without touching provider health."""
+    from llm_service.scheduler import LLMScheduler
+
+    scheduler = LLMScheduler(max_concurrency=1, max_queue=0)
+    breaker = CircuitBreaker(failure_threshold=1)
+    policy = make_policy(breaker=breaker)
+
+    async def main():
+        async with scheduler.aslot():
+            with pytest.raises(LLMOverloadedError):
+                await policy.acall("classifier", lambda: asyncio.sleep(0), slot=scheduler.aslot)
+
+    asyncio.run(main())
+    assert breaker.stats()["consecutive_failures"] == 0
+    assert policy.stats()["attempts"] == 0
+
+
+def test_only_provider_attempts_are_reported_to_degradation():
+    """Test that on_attempt sees provider time only, never queue waits, 429s or 4xx answers."""
+    from llm_service.scheduler import LLMScheduler
+
+    scheduler = LLMScheduler(max_concurrency=1, max_queue=4, max_wait_seconds=10)
+    attempts = []
+    policy = make_policy(on_attempt=lambda seconds, failed: attempts.append((seconds, failed)))
+
+    async def provider():
+        await asyncio.sleep(0.03)
+        return "ok"
+
+    async def main():
+        calls = [policy.acall("classifier", provider, slot=scheduler.aslot) for _ in range(5)]
+        await asyncio.gather(*calls)
+
+        full = LLMScheduler(max_concurrency=1, max_queue=0)
+        async with full.aslot():
+            with pytest.raises(LLMOverloadedError):
+                await policy.acall("classifier", provider, slot=full.aslot)
+
+    asyncio.run(main())
+    # Later callers waited up to ~0.12 s in the queue; only the 0.03 s calls count
+    assert len(attempts) == 5
+    assert all(seconds < 0.1 and not failed for seconds, failed in attempts)
+
+    with pytest.raises(ValueError):
+        policy.call("classifier", Flaky(ValueError("bad request")))
+    policy.call("classifier", Flaky(httpx.ConnectError("boom")))
+    assert [failed for _, failed in attempts[5:]] == [True, False]
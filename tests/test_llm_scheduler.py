@@ -0,0 +1,102 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from llm_service.scheduler import LLMOverloadedError, LLMScheduler
+
+
+def test_concurrency_cap_is_enforced():
+    """Test that no more than max_concurrency calls run at once."""
+    scheduler = LLMScheduler(max_concurrency=2, max_queue=100, max_wait_seconds=5)
+    running = []
+    peak = []
+
+    async def call(i):
+        async with scheduler.aslot(user_id=i):
+            running.append(i)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.remove(i)
+
+    async def main():
+        await asyncio.gather(*[call(i) for i in range(10)])
+
+    asyncio.run(main())
+    assert max(peak) == 2
+    assert scheduler.stats()["active"] == 0
+    assert scheduler.stats()["peak_queue_depth"] > 0
+
+
+def test_waiters_are_served_round_robin_across_users():
+    """Test that a burst from one user does not starve another."""
+    scheduler = LLMScheduler(max_concurrency=1, max_queue=100, max_wait_seconds=5)
+    order = []
+
+    async def call(user, label):
+        async with scheduler.aslot(user_id=user):
+            order.append(label)
+            await asyncio.sleep(0.001)
+
+    async def main():
+        tasks = [asyncio.create_task(call("heavy", f"heavy-{i}")) for i in range(4)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(call("light", "light-0")))
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    # heavy-0 held the slot; light is served right after the next heavy waiter
+    assert order.index("light-0") <= 2
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    """Test that overflow beyond the wait queue returns 429 immediately."""
+    scheduler = LLMScheduler(max_concurrency=1, max_queue=1, max_wait_seconds=5)
+
+    async def hold():
+        async with scheduler.aslot(user_id=1):
+            await asyncio.sleep(0.05)
+
+    async def main():
+        first = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        second = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        with pytest.raises(LLMOverloadedError) as exc:
+            async with scheduler.aslot(user_id=2):
+                pass
+        await asyncio.gather(first, second)
+        return exc.value
+
+    error = asyncio.run(main())
+    assert error.status_code == 429
+    assert int(error.headers["Retry-After"]) >= 1
+    assert scheduler.stats()["rejected"]["queue_full"] == 1
+
+
+def test_waiter_times_out_at_deadline():
+    """Test that a queued call past its wait budget is rejected and dequeued."""
+    scheduler = LLMScheduler(max_concurrency=1, max_queue=10, max_wait_seconds=0.02)
+    scheduler._service_time = 0.001
+
+    async def hold():
+        async with scheduler.aslot():
+            await asyncio.sleep(0.1)
+
+    async def main():
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        with pytest.raises(LLMOverloadedError):
+            async with scheduler.aslot():
+                pass
+        await holder
+
+    asyncio.run(main())
+    stats = scheduler.stats()
+    assert stats["rejected"]["timeout"] == 1
+    assert stats["queue_depth"] == 0
+    assert stats["active"] == 0
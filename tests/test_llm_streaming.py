@@ -0,0 +1,93 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from benchmarks.fixtures import SAMPLES, write_recordings
+from llm_service.graph import nodes
+from llm_service.replay import ReplayLLM, load_recordings
+from llm_service.service import process_user_input_async
+from llm_service.streaming import ItemStreamParser, astream_user_input, sse_event
+
+RESPONSE = json.dumps({
+    "type": "food",
+    "items": [
+        {"name": "egg {boiled}", "quantity": 2, "note": "say \"hi\" ]"},
+        {"name": "toast", "quantity": 1},
+    ],
+    "total": {"calories_kcal": 235},
+})
+
+
+def test_parser_emits_each_item_as_soon_as_it_closes():
+    """Test that items arrive mid-stream, char by char, despite braces in strings."""
+    parser = ItemStreamParser()
+    emitted_at = []
+
+    for i, ch in enumerate(RESPONSE):
+        for item in parser.feed(ch):
+            emitted_at.append((i, item["name"]))
+
+    names = [name for _, name in emitted_at]
+    assert names == ["egg {boiled}", "toast"]
+    # The first item is out long before the response completes
+    assert emitted_at[0][0] < RESPONSE.index("toast")
+    assert parser.intent == "food"
+    assert json.loads(parser.text) == json.loads(RESPONSE)
+
+
+def test_parser_ignores_code_fences_and_nested_objects():
+    parser = ItemStreamParser()
+    text = '```json\n{"type": "mixed", "items": [{"name": "run", "meta": {"km": 5}}], "total": {}}\n```'
+
+    items = parser.feed(text[:30]) + parser.feed(text[30:])
+    assert items == [{"name": "run", "meta": {"km": 5}}]
+    assert parser.intent == "mixed"
+
+
+@pytest.fixture
+def replay(tmp_path, monkeypatch):
+    path = tmp_path / "fixtures.jsonl"
+    write_recordings(path)
+    monkeypatch.setattr(nodes, "llm", ReplayLLM(load_recordings(path)))
+    monkeypatch.setenv("LLM_LOCAL_PARSER_ENABLED", "false")
+    monkeypatch.setenv("LLM_ITEM_CACHE_ENABLED", "false")
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "false")
+    monkeypatch.setattr("llm_service.service.get_result_cache", lambda: None)
+    monkeypatch.setattr("llm_service.service.get_semantic_cache", lambda: None)
+
+
+async def collect(text):
+    return [event async for event in astream_user_input(text)]
+
+
+@pytest.mark.parametrize("mode", ["two_step", "single_pass"])
+@pytest.mark.parametrize("text", ["2 boiled eggs and toast", "ran 5k in 30 minutes", "had a burger then ran 5k"])
+def test_stream_matches_blocking_result(replay, monkeypatch, mode, text):
+    """Test event order (intent, items, result) and parity with the blocking path."""
+    monkeypatch.setenv("LLM_GRAPH_MODE", mode)
+    monkeypatch.setattr("llm_service.service._graph", None)
+
+    events = asyncio.run(collect(text))
+    kinds = [event for event, _ in events]
+    foods, exercises = SAMPLES[text]
+
+    assert kinds[0] == "intent"
+    assert kinds[-1] == "result"
+    assert kinds.count("item") == len(foods) + len(exercises)
+
+    expected = asyncio.run(process_user_input_async(text))
+    result = events[-1][1]
+    assert result["intent"] == expected["intent"] == events[0][1]["intent"]
+    assert result["parsed_data"] == expected["parsed_data"]
+    assert result["nutrition"] == expected["nutrition"]
+    monkeypatch.setattr("llm_service.service._graph", None)
+
+
+def test_sse_event_format():
+    assert sse_event("intent", {"intent": "food"}) == 'event: intent\ndata: {"intent": "food"}\n\n'
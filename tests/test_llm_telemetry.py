@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from benchmarks.fixtures import write_recordings
+from llm_service.graph import nodes
+from llm_service.graph.workflow import build_graph
+from llm_service.replay import ReplayLLM, load_recordings
+from llm_service.service import initial_state
+from llm_service.telemetry import Histogram, get_telemetry, span, traced
+
+
+@pytest.fixture
+def replay_graph(tmp_path, monkeypatch):
+    """Two-step graph running on the benchmark fixtures, LLM only."""
+    path = tmp_path / "fixtures.jsonl"
+    write_recordings(path)
+    monkeypatch.setattr(nodes, "llm", ReplayLLM(load_recordings(path)))
+    monkeypatch.setenv("LLM_LOCAL_PARSER_ENABLED", "false")
+    monkeypatch.setenv("LLM_ITEM_CACHE_ENABLED", "false")
+    get_telemetry().reset()
+    return build_graph("two_step")
+
+
+def test_histogram_percentiles_use_bucket_bounds():
+    histogram = Histogram((10, 100, 1000))
+    for value in [5] * 90 + [50] * 9 + [5000]:
+        histogram.observe(value)
+
+    assert histogram.percentile(50) == 10
+    assert histogram.percentile(95) == 100
+    assert histogram.percentile(100) == 5000
+    assert histogram.snapshot()["buckets"] == {"le_10": 90, "le_100": 9, "overflow": 1}
+
+
+def test_span_records_errors_and_reraises():
+    get_telemetry().reset()
+    with pytest.raises(ValueError):
+        with span("flaky_stage"):
+            raise ValueError("boom")
+
+    assert get_telemetry().stats()["errors"] == {"flaky_stage": 1}
+
+
+def test_async_trace_covers_every_stage(replay_graph):
+    """Test that nodes, LLM calls and parsing (incl. the mixed fan-out) join the trace."""
+    async def run():
+        with traced("test") as trace:
+            await replay_graph.ainvoke(initial_state("had a burger then ran 5k"))
+        return trace
+
+    trace = asyncio.run(run())
+    stages = {s["stage"] for s in trace.spans}
+
+    assert {
+        "local_parser", "classifier", "classifier.llm", "classifier.parse", "mixed_parser",
+        "food_parser.llm", "food_parser.parse", "exercise_parser.llm", "calculator",
+    } <= stages
+    llm_span = next(s for s in trace.spans if s["stage"] == "classifier.llm")
+    assert llm_span["prompt_tokens"] > 0 and llm_span["response_bytes"] > 0
+    assert "total;dur=" in trace.server_timing()
+
+
+def test_sync_trace_crosses_mixed_worker_threads(replay_graph):
+    with traced("test") as trace:
+        replay_graph.invoke(initial_state("had a burger then ran 5k"))
+
+    stages = {s["stage"] for s in trace.spans}
+    assert {"food_parser.llm", "exercise_parser.llm"} <= stages
+
+
+def test_stats_expose_histograms_and_recent_traces(replay_graph):
+    with traced("test"):
+        replay_graph.invoke(initial_state("2 boiled eggs and toast"))
+
+    stats = get_telemetry().stats()
+    assert stats["stage_ms"]["classifier"]["count"] == 1
+    assert stats["prompt_tokens"]["food_parser"]["count"] == 1
+    assert stats["response_bytes"]["classifier"]["count"] == 1
+    assert stats["recent_traces"][-1]["name"] == "test"
+
+
+def test_parse_failures_are_counted_and_logged(caplog):
+    get_telemetry().reset()
+    with caplog.at_level(logging.WARNING, logger="llm_service"):
+        state = nodes.handle_food_response({"input": "x"}, SimpleNamespace(content="not json"))
+
+    assert state["parsed_data"] == []
+    assert get_telemetry().stats()["parse_failures"] == {"food_parser": 1}
+    assert "food_parser returned invalid JSON" in caplog.text
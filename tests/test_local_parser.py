@@ -0,0 +1,61 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from llm_service.food_grammar import parse_phrase, split_items
+from llm_service.local_parser import parse_locally
+
+
+def test_split_items_on_conjunctions_and_commas():
+    """Test that inputs are split into item phrases."""
+    assert split_items("2 eggs, toast and 1 cup milk") == ["2 eggs", "toast", "1 cup milk"]
+
+
+@pytest.mark.parametrize("text, quantity, unit, name", [
+    ("200g chicken breast", 200, "g", "chicken breast"),
+    ("1 cup rice", 1, "cup", "rice"),
+    ("a glass of milk", 250, "ml", "milk"),
+    ("2 kg potatoes", 2000, "g", "potatoes"),
+    ("3 eggs", 3, None, "eggs"),
+])
+def test_parse_phrase_reads_quantity_and_unit(text, quantity, unit, name):
+    """Test the quantity/unit grammar."""
+    phrase = parse_phrase(text)
+    assert phrase.quantity == quantity
+    assert phrase.unit == unit
+    assert phrase.name == name
+
+
+def test_parse_locally_matches_food_parser_shape():
+    """Test that local results carry the same keys as the LLM food parser."""
+    result = parse_locally("3 eggs")
+
+    assert result["intent"] == "food"
+    item = result["parsed_data"][0]
+    for key in ("name", "quantity", "unit", "preparation", "calories_kcal",
+                "protein_g", "carbs_g", "fat_g", "fiber_g", "confidence"):
+        assert key in item
+    assert item["quantity"] == 3
+    assert result["nutrition"]["calories_kcal"] == pytest.approx(232.5)
+
+
+def test_parse_locally_scales_by_weight():
+    """Test that gram quantities scale the per-100g values."""
+    result = parse_locally("200g chicken breast")
+    assert result["nutrition"]["calories_kcal"] == pytest.approx(330)
+    assert result["nutrition"]["protein_g"] == pytest.approx(62)
+
+
+@pytest.mark.parametrize("text", [
+    "had a burger then ran 5k",   # unknown food + exercise
+    "1 cup rice and chicken curry",  # one unknown item poisons the whole input
+    "rice",  # mass food with no amount
+    "coffee with milk",  # milk amount unknown
+])
+def test_parse_locally_defers_uncertain_inputs(text):
+    """Test that anything not fully resolvable falls through to the LLM."""
+    assert parse_locally(text) is None
@@ -0,0 +1,127 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from llm_service.semantic_cache import SemanticCache, evaluate, same_parse
+
+EGGS = {"intent": "food", "parsed_data": [{"name": "egg", "quantity": 2}], "nutrition": {"calories_kcal": 155}}
+
+
+@pytest.mark.parametrize("paraphrase", [
+    "scrambled 2 eggs",
+    "Two eggs, scrambled",
+    "i had 2 scrambled egg",
+])
+def test_paraphrases_reuse_the_stored_parse(paraphrase):
+    cache = SemanticCache(threshold=0.9)
+    cache.set("two eggs scrambled", EGGS)
+
+    found = cache.get(paraphrase)
+    assert found is not None
+    value, similarity = found
+    assert value == EGGS
+    assert similarity >= 0.9
+
+
+def test_different_quantities_never_match():
+    """Test that the number guard blocks "3 eggs" from reusing "2 eggs"."""
+    cache = SemanticCache(threshold=0.9)
+    cache.set("2 scrambled eggs", EGGS)
+
+    assert cache.get("3 scrambled eggs") is None
+    assert cache.stats()["number_mismatches"] == 1
+
+
+@pytest.mark.parametrize("stored, swapped", [
+    ("2 eggs and 1 toast", "1 egg and 2 toasts"),
+    ("100g rice and 200g chicken", "200g rice and 100g chicken"),
+    ("2 eggs 1 toast", "1 egg 2 toast"),
+])
+def test_swapped_quantities_never_match(stored, swapped):
+    """Test that each number is bound to its own item, not compared as a bag."""
+    cache = SemanticCache(threshold=0.9)
+    cache.set(stored, EGGS)
+
+    assert cache.get(swapped) is None
+    assert cache.get(stored) is not None
+
+
+def test_different_foods_miss():
+    cache = SemanticCache(threshold=0.9)
+    cache.set("2 boiled eggs", EGGS)
+
+    assert cache.get("2 fried eggs") is None
+    assert cache.get("coffee with milk") is None
+
+
+def test_returned_values_are_copies():
+    cache = SemanticCache()
+    cache.set("two eggs scrambled", EGGS)
+
+    cache.get("scrambled 2 eggs")[0]["parsed_data"].clear()
+    assert cache.get("scrambled 2 eggs")[0]["parsed_data"] == EGGS["parsed_data"]
+
+
+def test_entries_are_bounded_with_lru_eviction():
+    cache = SemanticCache(max_entries=2)
+    cache.set("2 boiled eggs", EGGS)
+    cache.set("coffee with milk", EGGS)
+    cache.get("boiled 2 eggs")              # touch: eggs becomes most recent
+    cache.set("chicken biryani", EGGS)
+
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["evictions"] == 1
+    assert cache.get("milk coffee") is None
+    assert cache.get("2 boiled eggs") is not None
+
+
+def test_entries_expire():
+    now = [0.0]
+    cache = SemanticCache(ttl_seconds=10, clock=lambda: now[0])
+    cache.set("2 boiled eggs", EGGS)
+
+    now[0] = 11
+    assert cache.get("boiled 2 eggs") is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_same_parse_compares_items_and_calories():
+    assert same_parse(EGGS, dict(EGGS, nutrition={"calories_kcal": 160}))
+    assert not same_parse(EGGS, dict(EGGS, nutrition={"calories_kcal": 300}))
+    assert not same_parse(EGGS, dict(EGGS, parsed_data=[{"name": "egg", "quantity": 3}]))
+
+
+def test_evaluate_reports_precision_and_recall():
+    toast = {"intent": "food", "parsed_data": [{"name": "toast", "quantity": 1}], "nutrition": {"calories_kcal": 80}}
+    traffic = [
+        ("two eggs scrambled", EGGS),
+        ("scrambled 2 eggs", EGGS),      # true positive
+        ("1 toast", toast),
+        ("toast 1 slice", toast),        # too different to hit: false negative
+    ]
+
+    [row] = evaluate(traffic, [0.9])
+    assert row["true_positives"] == 1
+    assert row["false_positives"] == 0
+    assert row["precision"] == 1.0
+    assert 0 < row["recall"] <= 1.0
+
+
+def test_service_reuses_near_duplicate(monkeypatch):
+    """Test that lookup_cached_result falls back to the semantic cache on an exact miss."""
+    from llm_service import service
+
+    semantic = SemanticCache()
+    monkeypatch.setattr(service, "get_result_cache", lambda: None)
+    monkeypatch.setattr(service, "get_semantic_cache", lambda: semantic)
+
+    service.store_result("2 eggs scrambled", dict(EGGS, input="two eggs scrambled", source="llm"))
+    _, cached = service.lookup_cached_result("scrambled 2 eggs")
+
+    assert cached["parsed_data"] == EGGS["parsed_data"]
+    assert cached["input"] == "scrambled 2 eggs"
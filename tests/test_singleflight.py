@@ -0,0 +1,71 @@
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from llm_service.singleflight import SingleFlight
+
+
+def test_concurrent_threads_share_one_execution():
+    """Test that identical concurrent sync calls run the function once."""
+    flight = SingleFlight()
+    calls = []
+
+    def work():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"value": 42}
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(flight.do("k", work)))
+        for _ in range(10)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [{"value": 42}] * 10
+    assert flight.stats() == {"executions": 1, "coalesced": 9, "in_flight": 0}
+
+
+def test_concurrent_coroutines_share_one_execution():
+    """Test that identical concurrent async calls run the coroutine once."""
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"value": 7}
+
+    async def main():
+        return await asyncio.gather(*[flight.ado("k", work) for _ in range(10)])
+
+    results = asyncio.run(main())
+
+    assert len(calls) == 1
+    assert results == [{"value": 7}] * 10
+    assert flight.stats()["coalesced"] == 9
+
+
+def test_errors_propagate_to_all_waiters():
+    """Test that a failed shared run raises in every waiter and is not remembered."""
+    flight = SingleFlight()
+
+    async def boom():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("provider down")
+
+    async def main():
+        return await asyncio.gather(*[flight.ado("k", boom) for _ in range(3)], return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert flight.stats()["in_flight"] == 0
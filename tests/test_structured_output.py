@@ -0,0 +1,187 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from langchain_core.messages import AIMessage
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from llm_service.graph import nodes
+from llm_service.llm_client import get_llm_config
+from llm_service.structured import AnswerError, get_parse_stats, parse_answer
+
+EGG = {"name": "egg", "quantity": 2, "unit": "piece", "calories_kcal": 156, "protein_g": 12.6}
+VALID_FOOD = json.dumps({"type": "food", "items": [EGG], "total": {"calories_kcal": 156}})
+# Cut off at max_tokens in the middle of the second item
+CUT_OFF_FOOD = VALID_FOOD.replace("]", ', {"name": "toast", "quantity": 1, "calories_kc')
+
+
+@pytest.fixture(autouse=True)
+def reset_stats(monkeypatch):
+    monkeypatch.setenv("LLM_ITEM_CACHE_ENABLED", "false")
+    get_parse_stats().reset()
+
+
+@pytest.mark.parametrize("content", [
+    'Here is the JSON:\n```json\n{"type": "food", "items": [{"name": "egg", "calories_kcal": 156,}],}\n```\nEnjoy!',
+    "{'type': 'food', 'items': [{'name': 'egg', 'calories_kcal': 156, 'preparation': None}]}",
+    '{"type": "food", "items": [{"name": "egg", “calories_kcal”: 156, "preparation": None}]}',
+])
+def test_malformed_answers_are_repaired_locally(content):
+    answer, repaired = parse_answer("food_parser", content)
+
+    assert repaired
+    assert answer["items"][0]["name"] == "egg"
+    assert answer["items"][0]["calories_kcal"] == 156
+
+
+def test_cut_off_answers_keep_their_complete_items_as_partial():
+    with pytest.raises(AnswerError, match="cut off") as info:
+        parse_answer("food_parser", CUT_OFF_FOOD)
+
+    assert [item["name"] for item in info.value.partial["items"]] == ["egg"]
+
+
+def test_fenced_valid_answers_are_not_counted_as_repairs():
+    answer, repaired = parse_answer("food_parser", f"```json\n{VALID_FOOD}\n```")
+    assert answer["items"] == [EGG] and not repaired
+
+
+def test_answers_are_validated_and_coerced():
+    answer, _ = parse_answer("food_parser", json.dumps({"items": [{"name": "egg", "quantity": "2", "fat_g": None}]}))
+    assert answer["items"][0]["quantity"] == 2 and answer["items"][0]["fat_g"] == 0
+
+    assert parse_answer("classifier", '{"type": " Mixed"}')[0]["type"] == "mixed"
+    with pytest.raises(AnswerError, match="type"):
+        parse_answer("classifier", '{"type": "snack"}')
+    with pytest.raises(AnswerError, match="items.0.name"):
+        parse_answer("food_parser", '{"items": [{"calories_kcal": 100}]}')
+
+
+class ScriptedLLM:
+    """Answers prompts in order with the given contents."""
+
+    def __init__(self, *contents):
+        self.contents = list(contents)
+        self.prompts = []
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        return AIMessage(content=self.contents.pop(0))
+
+    async def ainvoke(self, prompt):
+        return self.invoke(prompt)
+
+
+def test_unrepairable_answers_are_reasked_once(monkeypatch):
+    client = ScriptedLLM('{"type": "food", "items": [{"calories_kcal": 156}]}', VALID_FOOD)
+    monkeypatch.setattr(nodes, "llm", client)
+
+    state = nodes.food_parser_node({"input": "2 eggs", "intent": "food"})
+
+    assert state["parsed_data"] == [EGG]
+    assert state["nutrition"]["calories_kcal"] == 156
+    # The re-ask repeats the task with the rejected answer and what was wrong with it
+    assert client.prompts[1].startswith(client.prompts[0].rstrip())
+    assert "items.0.name: Field required" in client.prompts[1]
+
+    stats = get_parse_stats().stats()["food_parser"]
+    assert (stats["answers"], stats["reasked"], stats["reask_recovered"], stats["failed"]) == (1, 1, 1, 0)
+
+
+def test_answers_that_stay_invalid_fall_back(monkeypatch):
+    monkeypatch.setattr(nodes, "llm", ScriptedLLM("no idea", "still no idea"))
+
+    state = asyncio.run(nodes.aexercise_parser_node({"input": "ran 5k"}))
+
+    assert state["parsed_data"] == [] and state["nutrition"] == {"calories_kcal": 0}
+    stats = get_parse_stats().stats()["exercise_parser"]
+    assert stats["failed"] == 1 and stats["failure_rate"] == 1.0
+
+
+def test_reask_can_be_disabled(monkeypatch):
+    monkeypatch.setenv("LLM_REASK_ENABLED", "false")
+    client = ScriptedLLM('{"type": "snack"}')
+    monkeypatch.setattr(nodes, "llm", client)
+
+    assert nodes.classify_node({"input": "x"})["intent"] == "food"
+    assert len(client.prompts) == 1
+
+
+def test_cut_off_answers_are_reasked(monkeypatch):
+    toast = {"name": "toast", "quantity": 1, "calories_kcal": 80}
+    complete = json.dumps({"type": "food", "items": [EGG, toast]})
+    client = ScriptedLLM(CUT_OFF_FOOD, complete)
+    monkeypatch.setattr(nodes, "llm", client)
+
+    state = nodes.food_parser_node({"input": "2 eggs and toast", "intent": "food"})
+
+    assert state["parsed_data"] == [EGG, toast] and not state.get("low_confidence")
+    assert "cut off" in client.prompts[1]
+    stats = get_parse_stats().stats()["food_parser"]
+    assert (stats["reasked"], stats["reask_recovered"], stats["partial"]) == (1, 1, 0)
+
+
+@pytest.mark.parametrize("reask", ["true", "false"])
+def test_cut_off_answers_are_used_only_with_low_confidence(monkeypatch, reask):
+    from llm_service import service
+    from llm_service.cache import ResultCache
+    from llm_service.item_cache import ItemCache
+    from llm_service.semantic_cache import SemanticCache
+
+    items, results, similar = ItemCache(), ResultCache(), SemanticCache()
+    monkeypatch.setattr(nodes, "get_item_cache", lambda: items)
+    monkeypatch.setattr(service, "get_result_cache", lambda: results)
+    monkeypatch.setattr(service, "get_semantic_cache", lambda: similar)
+    monkeypatch.setenv("LLM_REASK_ENABLED", reask)
+    monkeypatch.setattr(nodes, "llm", ScriptedLLM(CUT_OFF_FOOD, CUT_OFF_FOOD))
+
+    state = nodes.food_parser_node({"input": "2 eggs and toast", "intent": "food"})
+
+    # The egg is kept, but the lost toast must not be cached or learned as a complete parse
+    assert [item["name"] for item in state["parsed_data"]] == ["egg"]
+    assert state["low_confidence"] and state["nutrition"]["calories_kcal"] == 156
+    assert items.stats()["learned"] == 0
+    service.store_result("2 eggs and toast", dict(state, source="llm"))
+    assert results.get("2 eggs and toast") is None and similar.get("2 eggs and toast") is None
+
+    stats = get_parse_stats().stats()["food_parser"]
+    assert (stats["partial"], stats["failed"]) == (1, 0)
+
+
+class JSONValidateFailed(Exception):
+    body = {"error": {
+        "code": "json_validate_failed",
+        "failed_generation": '{"type": "exercise", "items": [{"name": "run", "calories_estimate": 300},],}',
+    }}
+
+
+class RejectingLLM:
+    def invoke(self, prompt):
+        raise JSONValidateFailed()
+
+
+def test_json_mode_rejections_are_repaired(monkeypatch):
+    monkeypatch.setattr(nodes, "llm", RejectingLLM())
+
+    state = nodes.exercise_parser_node({"input": "ran 5k"})
+
+    assert state["parsed_data"][0]["name"] == "run"
+    assert state["nutrition"] == {"calories_kcal": 300}
+    assert get_parse_stats().stats()["exercise_parser"]["repair_rate"] == 1.0
+
+
+def test_streaming_clients_leave_json_mode_off(monkeypatch):
+    calls = []
+    monkeypatch.setattr(nodes, "get_llm", lambda node, json_mode=None: calls.append(json_mode))
+
+    assert get_llm_config("food_parser").json_mode
+    nodes.llm_for("food_parser")
+    nodes.llm_for("food_parser", streaming=True)
+    assert calls == [None, False]
+
+    monkeypatch.setenv("LLM_FOOD_PARSER_JSON_MODE", "false")
+    assert not get_llm_config("food_parser").json_mode